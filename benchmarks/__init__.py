@@ -0,0 +1,15 @@
+"""
+Benchmark suite: a fake Paperless-NGX server, a scripted model and a
+synthetic PDF corpus, driven by `python -m benchmarks.run`, plus cold-start
+import times (`python -m benchmarks.import_time`).
+
+Importing the package puts this checkout's `src` first on `sys.path`, so the
+benchmarks run from the repository root without PYTHONPATH and always
+measure this code rather than an installed copy of `paperless_app`.
+"""
+import sys
+from pathlib import Path
+
+_SRC = str(Path(__file__).resolve().parent.parent / "src")
+if _SRC not in sys.path:
+    sys.path.insert(0, _SRC)
@@ -0,0 +1,248 @@
+"""
+Deterministic corpus of synthetic PDFs for the benchmarks.
+
+Every document carries its metadata as plain text on the first page
+("Fornecedor: ...", "Tipo: ...", "Data: ...", ...), followed by filler
+pages, so the scripted model can "read" it from the extracted text and the
+fake Paperless server can index it without OCR. The PDFs are written by hand
+(uncompressed, Helvetica, WinAnsi), so no PDF library is needed.
+
+Usage:
+    python -m benchmarks.corpus /tmp/corpus --documents 100 --pages 3
+"""
+import argparse
+import json
+import random
+import re
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional
+
+DOCUMENT_TYPES = [
+    "nota fiscal",
+    "boleto",
+    "contrato",
+    "extrato bancário",
+    "recibo",
+    "apólice de seguro",
+    "conta de energia",
+    "conta de água",
+    "declaração",
+    "laudo médico",
+]
+COMPANY_PREFIXES = [
+    "Companhia",
+    "Banco",
+    "Seguradora",
+    "Clínica",
+    "Construtora",
+    "Distribuidora",
+    "Escola",
+    "Farmácia",
+]
+COMPANY_NAMES = [
+    "Aurora",
+    "Horizonte",
+    "Paulista",
+    "Atlântico",
+    "Cerrado",
+    "Litoral",
+    "Serra Azul",
+    "Boa Vista",
+    "Itaú",
+    "Central",
+]
+KEYWORDS = [
+    "pagamento",
+    "vencimento",
+    "imposto",
+    "aluguel",
+    "condomínio",
+    "saúde",
+    "educação",
+    "veículo",
+    "residência",
+    "trabalho",
+    "viagem",
+    "manutenção",
+]
+FILLER_WORDS = (
+    "o valor referente ao período foi apurado conforme as condições gerais do contrato "
+    "e deverá ser quitado até a data de vencimento indicada neste documento sob pena de "
+    "multa juros e correção monetária previstos na legislação vigente"
+).split()
+
+_FIELD_RE = re.compile(r"^(Fornecedor|Tipo|Data|Título|Palavras-chave|Valor):\s*(.+)$", re.M)
+_TEXT_OP_RE = re.compile(rb"\(((?:\\.|[^\\)])*)\)\s*Tj")
+
+
+@dataclass
+class SyntheticDocument:
+    """Ground truth of one generated PDF."""
+
+    filename: str
+    correspondent: str
+    document_type: str
+    date: str
+    title: str
+    keywords: list = field(default_factory=list)
+    amount: str = ""
+    pages: int = 1
+
+
+def correspondent_pool(size: int, seed: int = 0) -> list[str]:
+    """Deterministic list of `size` distinct company names."""
+    rng = random.Random(seed)
+    names = []
+    for i in range(size):
+        prefix = COMPANY_PREFIXES[i % len(COMPANY_PREFIXES)]
+        base = COMPANY_NAMES[(i // len(COMPANY_PREFIXES)) % len(COMPANY_NAMES)]
+        names.append(f"{prefix} {base} {i // (len(COMPANY_PREFIXES) * len(COMPANY_NAMES)) + 1}")
+    rng.shuffle(names)
+    return names
+
+
+def _escape(text: str) -> bytes:
+    raw = text.encode("cp1252", errors="replace")
+    return raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def render_pdf(pages: list[list[str]]) -> bytes:
+    """Builds a minimal, valid PDF with one text line per list item."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Pages, preenchido depois de conhecer os filhos
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    kids = []
+    for lines in pages:
+        stream = b"BT /F1 10 Tf 50 800 Td 13 TL\n"
+        stream += b"".join(b"(" + _escape(line) + b") Tj T*\n" for line in lines)
+        stream += b"ET"
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842]"
+            b" /Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids),
+        len(kids),
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    return bytes(out)
+
+
+def pdf_text(data: bytes) -> str:
+    """Text of a PDF written by `render_pdf` (cheap stand-in for OCR)."""
+    lines = []
+    for match in _TEXT_OP_RE.finditer(data):
+        raw = re.sub(rb"\\(.)", rb"\1", match.group(1))
+        lines.append(raw.decode("cp1252", errors="replace"))
+    return "\n".join(lines)
+
+
+def parse_fields(text: str) -> dict:
+    """Metadata fields from the first page text, keyed as in the PDF."""
+    return {key: value.strip() for key, value in _FIELD_RE.findall(text or "")}
+
+
+def make_document(
+    index: int, rng: random.Random, correspondents: list[str], pages: int
+) -> tuple[SyntheticDocument, bytes]:
+    document_type = rng.choice(DOCUMENT_TYPES)
+    correspondent = rng.choice(correspondents)
+    date = f"20{rng.randint(18, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    keywords = rng.sample(KEYWORDS, 2)
+    amount = f"{rng.randint(10, 9999)},{rng.randint(0, 99):02d}"
+    title = f"{document_type.capitalize()} {correspondent} {date[:7]}"
+    doc = SyntheticDocument(
+        filename=f"doc_{index:05d}.pdf",
+        correspondent=correspondent,
+        document_type=document_type,
+        date=date,
+        title=title,
+        keywords=keywords,
+        amount=amount,
+        pages=pages,
+    )
+    first = [
+        f"Fornecedor: {correspondent}",
+        f"Tipo: {document_type}",
+        f"Data: {date}",
+        f"Título: {title}",
+        f"Palavras-chave: {', '.join(keywords)}",
+        f"Valor: R$ {amount}",
+        f"Documento número {index}",
+    ]
+    filler = [
+        [" ".join(rng.choice(FILLER_WORDS) for _ in range(14)) for _ in range(55)]
+        for _ in range(pages - 1)
+    ]
+    return doc, render_pdf([first] + filler)
+
+
+def generate_corpus(
+    directory: Path,
+    documents: int,
+    pages: int = 2,
+    correspondents: int = 40,
+    seed: int = 0,
+    start_index: int = 0,
+) -> list[SyntheticDocument]:
+    """
+    Writes `documents` PDFs and a `manifest.json` with their ground truth.
+    The same arguments always produce byte-identical files.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    pool = correspondent_pool(correspondents, seed)
+    manifest = []
+    for index in range(start_index, start_index + documents):
+        doc, data = make_document(index, rng, pool, max(1, pages))
+        (directory / doc.filename).write_bytes(data)
+        manifest.append(doc)
+    (directory / "manifest.json").write_text(
+        json.dumps([asdict(doc) for doc in manifest], indent=2, ensure_ascii=False)
+    )
+    return manifest
+
+
+def load_manifest(directory: Path) -> Optional[list[SyntheticDocument]]:
+    path = Path(directory) / "manifest.json"
+    if not path.exists():
+        return None
+    return [SyntheticDocument(**item) for item in json.loads(path.read_text())]
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic PDF corpus.")
+    parser.add_argument("directory")
+    parser.add_argument("--documents", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=2)
+    parser.add_argument("--correspondents", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    generate_corpus(
+        Path(args.directory), args.documents, args.pages, args.correspondents, args.seed
+    )
+    print(f"Wrote {args.documents} PDFs to {args.directory}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
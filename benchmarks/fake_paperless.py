@@ -0,0 +1,421 @@
+"""
+Local stand-in for the Paperless-NGX REST API, for benchmarks.
+
+Implements the endpoints used by `paperless_app.agent.tools.paperless_api`
+(taxonomy lists/creation, document list/search/filters, `post_document/`
+and `/api/tasks/`) over in-memory state, with configurable per-request
+latency and taxonomy size. Uploaded PDFs are "consumed" after a delay: the
+text is read straight from the PDF (see `benchmarks.corpus.pdf_text`) and a
+document is created, so the task tracker, checksum index and search all see
+realistic behaviour. Every request is counted per route (`GET /__stats`).
+
+Usage:
+    python -m benchmarks.fake_paperless --port 8010 --latency 0.02 --taxonomy-size 500
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import socket
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from email.parser import BytesParser
+from email.policy import HTTP
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from benchmarks.corpus import correspondent_pool, pdf_text
+
+_TAXONOMIES = ("correspondents", "tags", "document_types")
+_ID_RE = re.compile(r"/\d+/")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class FakePaperless:
+    """
+    In-memory Paperless state.
+
+    Args:
+        latency: Seconds added to every request.
+        jitter: Extra uniformly random latency (0..jitter seconds).
+        consume_delay: Seconds between `post_document/` and the document existing.
+        taxonomy_size: Correspondents, tags and document types created up front.
+        max_page_size: Upper bound applied to `page_size`, like the real server.
+        seed: Seed for the generated taxonomy and jitter.
+        task_id_in_filter: Honour `task_id__in` on `/api/tasks/`; set to False to
+            mimic servers that ignore it and return every task.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        consume_delay: float = 0.05,
+        taxonomy_size: int = 100,
+        max_page_size: int = 100000,
+        seed: int = 0,
+        task_id_in_filter: bool = True,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.consume_delay = consume_delay
+        self.max_page_size = max_page_size
+        self._rng = random.Random(seed)
+        self.calls: Counter = Counter()
+        self.bytes_in = 0
+        self.taxonomy: dict = {kind: {} for kind in _TAXONOMIES}
+        self._next_id = {kind: 1 for kind in _TAXONOMIES + ("documents",)}
+        self.documents: dict = {}
+        self._checksums: set = set()
+        self.tasks: dict = {}
+        self.task_id_in_filter = task_id_in_filter
+
+        for name in correspondent_pool(taxonomy_size, seed):
+            self.create("correspondents", name)
+        for i in range(taxonomy_size):
+            self.create("tags", f"tag {i:04d}")
+            self.create("document_types", f"tipo {i:04d}")
+
+    # --- State ---
+
+    def create(self, kind: str, name: str) -> Optional[dict]:
+        """Creates a taxonomy entry; returns None when the name is taken."""
+        lowered = name.lower()
+        if any(item["name"].lower() == lowered for item in self.taxonomy[kind].values()):
+            return None
+        item_id = self._next_id[kind]
+        self._next_id[kind] += 1
+        item = {"id": item_id, "name": name, "slug": lowered.replace(" ", "-")}
+        if kind == "tags":
+            item["color"] = "#a6cee3"
+        self.taxonomy[kind][item_id] = item
+        return item
+
+    def ensure(self, kind: str, name: str) -> int:
+        """ID of the taxonomy entry with this name, creating it if needed."""
+        lowered = name.lower()
+        for item in self.taxonomy[kind].values():
+            if item["name"].lower() == lowered:
+                return item["id"]
+        return self.create(kind, name)["id"]
+
+    def add_document(self, data: bytes, fields: dict, filename: str) -> Optional[int]:
+        """Stores a document like the consumer would; None for a duplicate checksum."""
+        checksum = hashlib.md5(data).hexdigest()
+        if checksum in self._checksums:
+            return None
+        self._checksums.add(checksum)
+        doc_id = self._next_id["documents"]
+        self._next_id["documents"] += 1
+        now = _now()
+        self.documents[doc_id] = {
+            "id": doc_id,
+            "title": fields.get("title") or filename,
+            "content": pdf_text(data),
+            "correspondent": _int(fields.get("correspondent")),
+            "document_type": _int(fields.get("document_type")),
+            "tags": [int(t) for t in fields.get("tags", [])],
+            "created": (fields.get("created") or now)[:10],
+            "added": now,
+            "modified": now,
+            "checksum": checksum,
+            "original_file_name": filename,
+        }
+        return doc_id
+
+    def consume(self, task_id: str, data: bytes, fields: dict, filename: str) -> None:
+        """Turns an uploaded file into a document and marks its task as done."""
+        doc_id = self.add_document(data, fields, filename)
+        task = self.tasks[task_id]
+        if doc_id is None:
+            task.update(status="FAILURE", result=f"{filename}: Not consuming: It is a duplicate.")
+        else:
+            task.update(status="SUCCESS", result="Success.", related_document=str(doc_id))
+
+    def reset_stats(self) -> None:
+        self.calls.clear()
+        self.bytes_in = 0
+
+    def stats(self) -> dict:
+        return {
+            "calls": dict(self.calls),
+            "total_calls": sum(self.calls.values()),
+            "bytes_in": self.bytes_in,
+            "documents": len(self.documents),
+            "tasks": len(self.tasks),
+        }
+
+    # --- Queries ---
+
+    def filter_documents(self, params) -> list[dict]:
+        docs = list(self.documents.values())
+        if params.get("id__in"):
+            wanted = {int(v) for v in params["id__in"].split(",") if v}
+            docs = [d for d in docs if d["id"] in wanted]
+        if params.get("checksum__iexact"):
+            docs = [d for d in docs if d["checksum"] == params["checksum__iexact"].lower()]
+        if params.get("correspondent__id"):
+            docs = [d for d in docs if d["correspondent"] == int(params["correspondent__id"])]
+        if params.get("document_type__id"):
+            docs = [d for d in docs if d["document_type"] == int(params["document_type__id"])]
+        if params.get("tags__id__in"):
+            wanted = {int(v) for v in params["tags__id__in"].split(",") if v}
+            docs = [d for d in docs if wanted & set(d["tags"])]
+        if params.get("created__date__gt"):
+            docs = [d for d in docs if d["created"] > params["created__date__gt"]]
+        if params.get("created__date__lt"):
+            docs = [d for d in docs if d["created"] < params["created__date__lt"]]
+        if params.get("modified__gt"):
+            docs = [d for d in docs if d["modified"] > params["modified__gt"]]
+
+        query = params.get("query")
+        if query:
+            words = [w.lower() for w in _WORD_RE.findall(query) if len(w) > 2]
+            scored = []
+            for doc in docs:
+                haystack = self._searchable(doc)
+                score = sum(haystack.count(w) for w in words)
+                if score and all(w in haystack for w in words):
+                    scored.append((score, doc))
+            scored.sort(key=lambda item: -item[0])
+            return [
+                {**doc, "__search_hit__": {"score": score, "highlights": doc["content"][:200]}}
+                for score, doc in scored
+            ]
+
+        ordering = params.get("ordering")
+        if ordering:
+            key = ordering.lstrip("-")
+            docs.sort(key=lambda d: (d.get(key) or "", d["id"]), reverse=ordering.startswith("-"))
+        return docs
+
+    def _searchable(self, doc: dict) -> str:
+        names = [self.taxonomy["correspondents"].get(doc["correspondent"], {}).get("name", "")]
+        names.append(self.taxonomy["document_types"].get(doc["document_type"], {}).get("name", ""))
+        names.extend(self.taxonomy["tags"].get(t, {}).get("name", "") for t in doc["tags"])
+        return " ".join([doc["title"], doc["content"], *names]).lower()
+
+    def page(self, request: Request, items: list[dict], transform=None) -> dict:
+        params = request.query_params
+        page_size = min(int(params.get("page_size", 25)), self.max_page_size)
+        page = int(params.get("page", 1))
+        start = (page - 1) * page_size
+        chunk = items[start : start + page_size]
+        if transform:
+            chunk = [transform(item) for item in chunk]
+        next_url = None
+        if start + page_size < len(items):
+            next_url = str(request.url.include_query_params(page=page + 1))
+        previous = str(request.url.include_query_params(page=page - 1)) if page > 1 else None
+        return {"count": len(items), "next": next_url, "previous": previous, "results": chunk}
+
+
+def _int(value) -> Optional[int]:
+    try:
+        return int(value) if value not in (None, "") else None
+    except ValueError:
+        return None
+
+
+def _parse_multipart(content_type: str, body: bytes) -> tuple[dict, Optional[bytes], str]:
+    """Parses a multipart/form-data body with the stdlib (no python-multipart)."""
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + body
+    )
+    fields, data, filename = {"tags": []}, None, "document.pdf"
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        payload = part.get_payload(decode=True) or b""
+        if name == "document":
+            data = payload
+            filename = part.get_filename() or filename
+        elif name == "tags":
+            fields["tags"].append(payload.decode())
+        elif name:
+            fields[name] = payload.decode()
+    return fields, data, filename
+
+
+def _select_fields(doc: dict, fields: Optional[str], truncate: bool) -> dict:
+    if truncate and doc.get("content"):
+        doc = {**doc, "content": doc["content"][:1000]}
+    if not fields:
+        return doc
+    wanted = set(fields.split(",")) | {"__search_hit__"}
+    return {k: v for k, v in doc.items() if k in wanted}
+
+
+def create_app(state: FakePaperless) -> FastAPI:
+    """FastAPI app serving `state` with the Paperless-NGX URL layout."""
+    app = FastAPI(title="Fake Paperless-NGX")
+    app.state.paperless = state
+
+    @app.middleware("http")
+    async def count_and_delay(request: Request, call_next):
+        route = _ID_RE.sub("/{id}/", request.url.path)
+        if not route.startswith("/__"):
+            state.calls[f"{request.method} {route}"] += 1
+            delay = state.latency + (state._rng.uniform(0, state.jitter) if state.jitter else 0)
+            if delay:
+                await asyncio.sleep(delay)
+        return await call_next(request)
+
+    @app.get("/__stats")
+    async def stats():
+        return state.stats()
+
+    @app.post("/__reset_stats")
+    async def reset_stats():
+        state.reset_stats()
+        return {"status": "ok"}
+
+    def taxonomy_routes(kind: str) -> None:
+        @app.get(f"/api/{kind}/", name=f"list_{kind}")
+        async def list_items(request: Request):
+            items = list(state.taxonomy[kind].values())
+            name = request.query_params.get("name__iexact")
+            if name:
+                items = [i for i in items if i["name"].lower() == name.lower()]
+            body = state.page(request, items)
+            etag = f'"{kind}-{len(state.taxonomy[kind])}-{state._next_id[kind]}"'
+            return JSONResponse(body, headers={"ETag": etag})
+
+        @app.post(f"/api/{kind}/", name=f"create_{kind}")
+        async def create_item(request: Request):
+            payload = await request.json()
+            item = state.create(kind, payload.get("name", ""))
+            if item is None:
+                return JSONResponse(
+                    {"name": [f"{kind[:-1]} with this name already exists."]}, status_code=400
+                )
+            return JSONResponse(item, status_code=201)
+
+    for kind in _TAXONOMIES:
+        taxonomy_routes(kind)
+
+    @app.get("/api/documents/")
+    async def list_documents(request: Request):
+        params = request.query_params
+        docs = state.filter_documents(params)
+        truncate = params.get("truncate_content") == "true"
+        return state.page(
+            request, docs, lambda doc: _select_fields(doc, params.get("fields"), truncate)
+        )
+
+    @app.post("/api/documents/post_document/")
+    async def post_document(request: Request):
+        body = await request.body()
+        state.bytes_in += len(body)
+        fields, data, filename = _parse_multipart(request.headers["content-type"], body)
+        if data is None:
+            return JSONResponse({"document": ["No file was submitted."]}, status_code=400)
+        task_id = str(uuid.uuid4())
+        state.tasks[task_id] = {
+            "id": len(state.tasks) + 1,
+            "task_id": task_id,
+            "task_file_name": filename,
+            "date_created": _now(),
+            "status": "PENDING",
+            "result": None,
+            "related_document": None,
+        }
+        asyncio.get_running_loop().call_later(
+            state.consume_delay, state.consume, task_id, data, fields, filename
+        )
+        return JSONResponse(task_id)
+
+    @app.get("/api/tasks/")
+    async def list_tasks(request: Request):
+        params = request.query_params
+        wanted = set()
+        if params.get("task_id"):
+            wanted.add(params["task_id"])
+        if params.get("task_id__in") and state.task_id_in_filter:
+            wanted.update(params["task_id__in"].split(","))
+        tasks = state.tasks.values()
+        return [task for task in tasks if not wanted or task["task_id"] in wanted]
+
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FakePaperlessServer:
+    """
+    Runs the fake API with uvicorn on a background thread.
+
+    Usage:
+        with FakePaperlessServer(FakePaperless(latency=0.01)) as server:
+            os.environ["PAPERLESS_URL"] = server.url
+    """
+
+    def __init__(self, state: FakePaperless, port: int = 0):
+        self.state = state
+        self.port = port or free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        config = uvicorn.Config(
+            create_app(state), host="127.0.0.1", port=self.port, log_level="warning"
+        )
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    def start(self) -> "FakePaperlessServer":
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("Fake Paperless server did not start.")
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+    def __enter__(self) -> "FakePaperlessServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Run a fake Paperless-NGX API.")
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--consume-delay", type=float, default=0.05)
+    parser.add_argument("--taxonomy-size", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    state = FakePaperless(
+        latency=args.latency,
+        jitter=args.jitter,
+        consume_delay=args.consume_delay,
+        taxonomy_size=args.taxonomy_size,
+        seed=args.seed,
+    )
+    print(json.dumps({"url": f"http://127.0.0.1:{args.port}", **state.stats()}))
+    uvicorn.run(create_app(state), host="127.0.0.1", port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,185 @@
+"""
+Cold-start benchmark: how long importing each entry module takes.
+
+Every sample runs in a fresh interpreter, so nothing is cached in
+`sys.modules`. For each target it reports the median import time, the
+wall time of the whole process (interpreter start-up included, i.e. what a
+new worker or test collection pays) and which heavy dependencies the import
+pulled in. A target written as `module:function` also times the first call
+of `function` after the import, e.g. building the agent tree.
+
+Usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --repeat 10 --output imports.json
+    python -m benchmarks.import_time --budget 0.3 paperless_app.agent.definition
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+
+TARGETS = (
+    "paperless_app.config",
+    "paperless_app.agent.tools.paperless_api",
+    "paperless_app.agent.definition",
+    "paperless_app.agent_runtime",
+    "paperless_app.bulk_ingest",
+    "paperless_app.index_sync",
+    "paperless_app.api_server",
+    "paperless_app.app",
+    "paperless_app.agent.definition:get_root_agent",
+)
+
+# Dependências que só deveriam ser carregadas no primeiro uso
+HEAVY_MODULES = (
+    "google.genai.types",
+    "google.adk.agents.llm_agent",
+    "google.adk.runners",
+    "httpx",
+    "pdfplumber",
+    "numpy",
+    "fastapi",
+    "streamlit",
+)
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+imported = time.perf_counter() - started
+first_use = None
+if {function!r}:
+    started = time.perf_counter()
+    getattr(sys.modules[{module!r}], {function!r})()
+    first_use = time.perf_counter() - started
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"import": imported, "first_use": first_use, "heavy": heavy}}))
+"""
+
+
+def _environment(workdir: str) -> dict:
+    """Dummy settings, so the probe measures imports and not a missing .env."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [str(ROOT / "src"), str(ROOT), env.get("PYTHONPATH", "")]
+    ).rstrip(os.pathsep)
+    env.setdefault("PAPERLESS_URL", "http://127.0.0.1:9")
+    env.setdefault("PAPERLESS_API_TOKEN", "import-time")
+    env["PROJECT_ROOT"] = workdir
+    # Sem exportador OTLP nem servidor /metrics durante a medição
+    env["TELEMETRY_METRICS_PORT"] = "0"
+    env.pop("OTEL_EXPORTER_OTLP_ENDPOINT", None)
+    return env
+
+
+def sample(target: str, env: dict) -> dict:
+    """Imports `target` once in a new interpreter."""
+    module, _, function = target.partition(":")
+    code = _PROBE.format(module=module, function=function or None, heavy=HEAVY_MODULES)
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", code], env=env, capture_output=True, text=True, cwd=ROOT
+    )
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        return {"error": lines[-1] if lines else f"exit code {result.returncode}"}
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+    data["process"] = wall
+    return data
+
+
+def _median(values: list) -> Optional[float]:
+    values = [value for value in values if value is not None]
+    return round(statistics.median(values), 4) if values else None
+
+
+def measure(target: str, repeat: int, env: dict) -> dict:
+    """Median import, first-use and process times of `target` over `repeat` runs."""
+    samples = [sample(target, env) for _ in range(repeat)]
+    errors = [s["error"] for s in samples if "error" in s]
+    if errors:
+        return {"target": target, "error": errors[0]}
+    return {
+        "target": target,
+        "import_seconds": _median([s["import"] for s in samples]),
+        "import_seconds_min": round(min(s["import"] for s in samples), 4),
+        "first_use_seconds": _median([s["first_use"] for s in samples]),
+        "process_seconds": _median([s["process"] for s in samples]),
+        "heavy_modules": samples[0]["heavy"],
+    }
+
+
+def _format(result: dict) -> str:
+    if "error" in result:
+        return f"{result['target']:<50} skipped: {result['error']}"
+    first_use = result["first_use_seconds"]
+    line = (
+        f"{result['target']:<50} import {result['import_seconds']:7.3f}s"
+        f"  process {result['process_seconds']:7.3f}s"
+    )
+    if first_use is not None:
+        line += f"  first use {first_use:7.3f}s"
+    if result["heavy_modules"]:
+        line += f"  [{', '.join(result['heavy_modules'])}]"
+    return line
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure cold-start import times.")
+    parser.add_argument(
+        "targets", nargs="*", default=list(TARGETS), help="module or module:function"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per target")
+    parser.add_argument("--output", help="Write the JSON results to this path")
+    parser.add_argument(
+        "--budget",
+        type=float,
+        help="Exit non-zero if a median import (without first use) exceeds this many seconds",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list = None) -> int:
+    """CLI entry point. Exit code 1 means a target went over `--budget`."""
+    args = parse_args(argv)
+    repeat = max(1, args.repeat)
+    with tempfile.TemporaryDirectory(prefix="paperless-import-") as workdir:
+        env = _environment(workdir)
+        baseline = measure("sys", repeat, env)
+        print(f"{'python (interpreter start-up)':<50} process {baseline['process_seconds']:7.3f}s")
+        results = []
+        for target in args.targets:
+            result = measure(target, repeat, env)
+            print(_format(result), flush=True)
+            results.append(result)
+
+    over = [
+        r["target"]
+        for r in results
+        if args.budget is not None and r.get("import_seconds", 0) > args.budget
+    ]
+    if args.output:
+        payload = {
+            "python": sys.version.split()[0],
+            "repeat": repeat,
+            "interpreter_seconds": baseline["process_seconds"],
+            "results": results,
+        }
+        Path(args.output).write_text(json.dumps(payload, indent=2))
+    if over:
+        print(f"Over the {args.budget}s budget: {', '.join(over)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
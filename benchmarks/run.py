@@ -0,0 +1,533 @@
+"""
+Reproducible end-to-end benchmarks for the Paperless orchestrator.
+
+Runs the real agents, tools, caches and HTTP client against a local fake
+Paperless-NGX (`benchmarks.fake_paperless`) with a scripted model
+(`benchmarks.scripted_llm`) over a synthetic PDF corpus (`benchmarks.corpus`),
+so results depend only on this code and the chosen parameters.
+
+Scenarios:
+    single  one chat turn per document through the root agent (interactive path)
+    bulk    `BulkIngestPipeline` over a folder, waiting for consumption
+    search  chat turns that route to the search agent over a seeded corpus
+
+For each scenario it reports throughput, p50/p90/p99 latency (per turn and
+per span: agent, model, tool, HTTP request, stage), memory, tokens, cache
+results and HTTP calls per route. Results are written as JSON; pass
+`--baseline` to compare with a previous run and exit non-zero on regressions.
+
+Usage:
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --scenarios bulk --documents 200 --latency 0.02
+    python -m benchmarks.run --baseline bench.json --max-regression 0.2
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from benchmarks.corpus import SyntheticDocument, generate_corpus
+from benchmarks.fake_paperless import FakePaperless, FakePaperlessServer
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+logger = logging.getLogger("benchmarks")
+
+SCENARIOS = ("single", "bulk", "search")
+USER_ID = "bench"
+
+# Métricas comparadas com o baseline: caminho no JSON -> "higher"/"lower" é melhor
+REGRESSION_METRICS = {
+    "throughput_per_second": "higher",
+    "latency.p50": "lower",
+    "latency.p99": "lower",
+    "http.total_calls": "lower",
+    "memory.python_peak_mb": "lower",
+}
+# Diferenças de latência abaixo disso são ruído, não regressão
+LATENCY_NOISE_FLOOR = 0.005
+
+
+# --- Statistics ---
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(q / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def distribution(values: list) -> dict:
+    values = sorted(values)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 6),
+        "p50": round(percentile(values, 50), 6),
+        "p90": round(percentile(values, 90), 6),
+        "p99": round(percentile(values, 99), 6),
+        "max": round(values[-1], 6),
+    }
+
+
+class SpanRecorder:
+    """Keeps the raw duration of every finished span (telemetry only keeps buckets)."""
+
+    def __init__(self):
+        self.samples: dict = defaultdict(list)
+        self.errors: dict = defaultdict(int)
+
+    def __call__(self, span, status: str) -> None:
+        key = f"{span.kind} {span.name}"
+        self.samples[key].append(span.duration)
+        if status != "ok":
+            self.errors[key] += 1
+
+    def summary(self) -> dict:
+        result = {}
+        for key, values in sorted(self.samples.items()):
+            result[key] = distribution(values)
+            if self.errors.get(key):
+                result[key]["errors"] = self.errors[key]
+        return result
+
+
+def _counter_delta(before: dict, after: dict) -> dict:
+    delta = {}
+    for labels, value in after.items():
+        diff = value - before.get(labels, 0)
+        if diff:
+            delta["/".join(labels)] = diff
+    return dict(sorted(delta.items()))
+
+
+def _rss_peak_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KiB; macOS, bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class Measurement:
+    """Collects spans, tokens, cache results, memory and HTTP calls for one scenario."""
+
+    def __init__(self, fake: FakePaperless, telemetry_module):
+        self.fake = fake
+        self.telemetry = telemetry_module
+        self.recorder = SpanRecorder()
+
+    def __enter__(self) -> "Measurement":
+        self.fake.reset_stats()
+        self.telemetry.add_span_listener(self.recorder)
+        self._tokens = self.telemetry.LLM_TOKENS.snapshot()
+        self._cache = self.telemetry.CACHE_REQUESTS.snapshot()
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.elapsed = time.perf_counter() - self.started
+        self.telemetry.remove_span_listener(self.recorder)
+
+    def result(self, items: int, latencies: list, errors: int, **extra) -> dict:
+        stats = self.fake.stats()
+        memory = {"rss_peak_mb": _rss_peak_mb()}
+        if tracemalloc.is_tracing():
+            memory["python_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        return {
+            "items": items,
+            "errors": errors,
+            "elapsed_seconds": round(self.elapsed, 4),
+            "throughput_per_second": round(items / self.elapsed, 3) if self.elapsed else 0.0,
+            "latency": distribution(latencies),
+            "spans": self.recorder.summary(),
+            "http": {
+                "total_calls": stats["total_calls"],
+                "calls_per_item": round(stats["total_calls"] / items, 3) if items else 0.0,
+                "calls": dict(sorted(stats["calls"].items())),
+                "upload_bytes": stats["bytes_in"],
+            },
+            "tokens": _counter_delta(self._tokens, self.telemetry.LLM_TOKENS.snapshot()),
+            "cache": _counter_delta(self._cache, self.telemetry.CACHE_REQUESTS.snapshot()),
+            "memory": memory,
+            **extra,
+        }
+
+
+# --- Scenarios ---
+
+
+async def bench_single(ctx: dict, documents: list[SyntheticDocument], corpus_dir: Path) -> dict:
+    """One interactive ingestion turn per document, sequentially."""
+    service, paperless_api = ctx["service"], ctx["paperless_api"]
+    latencies, errors, task_ids = [], 0, []
+    with Measurement(ctx["fake"], ctx["telemetry"]) as measure:
+        for doc in documents:
+            filename = f"{uuid.uuid4()}.pdf"
+            shutil.copyfile(corpus_dir / doc.filename, ctx["temp_dir"] / filename)
+            session_id = f"single_{uuid.uuid4().hex}"
+            await service.ensure_session(USER_ID, session_id)
+            started = time.perf_counter()
+            await service.run_turn(USER_ID, session_id, f"Processar o arquivo: {filename}")
+            latencies.append(time.perf_counter() - started)
+
+            session = await service.get_session(USER_ID, session_id)
+            upload = (session.state.get("upload_result") if session else None) or {}
+            info = (session.state.get("document_info") if session else None) or {}
+            if upload.get("status") != "success" or info.get("correspondent_name") != (
+                doc.correspondent
+            ):
+                errors += 1
+                logger.warning("Ingestion of %s failed: %s", doc.filename, upload)
+            elif upload.get("task_id"):
+                task_ids.append(upload["task_id"])
+            await service.delete_session(USER_ID, session_id)
+
+        consumed = await asyncio.gather(
+            *(paperless_api.task_tracker.wait(task_id) for task_id in task_ids)
+        )
+    consumption = [task["latency_seconds"] for task in consumed if task.get("latency_seconds")]
+    return measure.result(
+        len(documents),
+        latencies,
+        errors,
+        consumed=sum(1 for task in consumed if task["status"] == "success"),
+        consumption_latency=distribution(consumption),
+    )
+
+
+async def bench_bulk(ctx: dict, documents: list[SyntheticDocument], corpus_dir: Path) -> dict:
+    """`BulkIngestPipeline` over the whole folder, waiting for Paperless to consume it."""
+    from benchmarks.scripted_llm import install_scripted_models
+    from paperless_app.agent.definition import build_document_analyzer_agent
+    from paperless_app.bulk_ingest import BulkIngestPipeline
+
+    analyzer = build_document_analyzer_agent()
+    install_scripted_models(analyzer, latency=ctx["llm_latency"])
+    pipeline = BulkIngestPipeline(
+        llm_concurrency=ctx["args"].llm_concurrency,
+        write_concurrency=ctx["args"].write_concurrency,
+        wait_for_tasks=True,
+        analyzer_agent=analyzer,
+    )
+    with Measurement(ctx["fake"], ctx["telemetry"]) as measure:
+        report = await pipeline.run([corpus_dir / doc.filename for doc in documents])
+
+    stages = defaultdict(list)
+    for job in report.jobs:
+        for stage, seconds in job.timings.items():
+            stages[stage].append(seconds)
+    return measure.result(
+        len(documents),
+        stages.pop("end_to_end", []),
+        report.failed + report.consume_failed,
+        consumed=report.consumed,
+        stages={stage: distribution(values) for stage, values in sorted(stages.items())},
+    )
+
+
+def search_queries(documents: list[SyntheticDocument], count: int) -> list[str]:
+    """Deterministic mix of keyword, correspondent and document type queries."""
+    queries = []
+    for doc in documents:
+        queries.append(doc.correspondent)
+        queries.append(f"{doc.document_type} {doc.date[:4]}")
+        queries.append(" ".join(doc.keywords))
+    # Repetições são intencionais: exercitam o cache de busca como um usuário real
+    return [queries[i % len(queries)] for i in range(count)]
+
+
+def seed_search_corpus(fake: FakePaperless, documents: list, corpus_dir: Path) -> None:
+    """Loads documents straight into the fake server (no HTTP, not measured)."""
+    for doc in documents:
+        fields = {
+            "title": doc.title,
+            "correspondent": fake.ensure("correspondents", doc.correspondent),
+            "document_type": fake.ensure("document_types", doc.document_type),
+            "tags": [fake.ensure("tags", keyword) for keyword in doc.keywords],
+            "created": doc.date,
+        }
+        fake.add_document((corpus_dir / doc.filename).read_bytes(), fields, doc.filename)
+
+
+async def bench_search(ctx: dict, queries: list[str]) -> dict:
+    """One chat turn per query, routed by the root agent to the search agent."""
+    service = ctx["service"]
+    latencies, errors = [], 0
+    with Measurement(ctx["fake"], ctx["telemetry"]) as measure:
+        for query in queries:
+            session_id = f"search_{uuid.uuid4().hex}"
+            await service.ensure_session(USER_ID, session_id)
+            started = time.perf_counter()
+            answer = await service.run_turn(USER_ID, session_id, query)
+            latencies.append(time.perf_counter() - started)
+            if not answer.startswith("Encontrei"):
+                errors += 1
+                logger.warning("Search turn for %r failed: %s", query, answer)
+            await service.delete_session(USER_ID, session_id)
+    return measure.result(len(queries), latencies, errors)
+
+
+# --- Comparison ---
+
+
+def _lookup(data: dict, path: str):
+    for key in path.split("."):
+        if not isinstance(data, dict) or key not in data:
+            return None
+        data = data[key]
+    return data
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> list[str]:
+    """
+    Compares scenario metrics with a baseline run.
+
+    Returns:
+        list[str]: One line per regression beyond `max_regression` (relative).
+    """
+    regressions = []
+    for scenario, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(scenario)
+        if not previous:
+            continue
+        for path, better in REGRESSION_METRICS.items():
+            now, before = _lookup(current, path), _lookup(previous, path)
+            if not isinstance(now, (int, float)) or not isinstance(before, (int, float)):
+                continue
+            if path.startswith("latency") and abs(now - before) < LATENCY_NOISE_FLOOR:
+                continue
+            if before == 0:
+                worse = now > 0 if better == "lower" else False
+                change = float("inf") if worse else 0.0
+            else:
+                change = (now - before) / before
+                worse = change > max_regression if better == "lower" else -change > max_regression
+            if worse:
+                regressions.append(
+                    f"{scenario}.{path}: {before} -> {now} ({change:+.1%}, {better} is better)"
+                )
+    return regressions
+
+
+# --- Entry point ---
+
+
+def _configure_environment(url: str, workdir: Path, args: argparse.Namespace) -> None:
+    """Points the app at the fake server. Must run before importing paperless_app."""
+    os.environ["PAPERLESS_URL"] = url
+    os.environ["PAPERLESS_API_TOKEN"] = "benchmark"
+    os.environ["PROJECT_ROOT"] = str(workdir)
+    os.environ.setdefault("INGESTION_FAST_PATH", "true")
+    os.environ.setdefault("TELEMETRY_ENABLED", "true")
+    os.environ.setdefault("TELEMETRY_METRICS_PORT", "0")
+    # O consumo no servidor falso leva milissegundos; o polling padrão (1s) dominaria
+    os.environ.setdefault("TASK_POLL_MIN_INTERVAL", str(args.task_poll_interval))
+    os.environ.setdefault("TASK_POLL_MAX_INTERVAL", str(max(args.task_poll_interval, 1.0)))
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_benchmarks(args: argparse.Namespace, fake: FakePaperless, workdir: Path) -> dict:
+    # A configuração é lida no import, depois de _configure_environment
+    from benchmarks.scripted_llm import install_scripted_models
+    from paperless_app import config, telemetry
+    from paperless_app.agent.definition import build_root_agent
+    from paperless_app.agent.tools import paperless_api
+    from paperless_app.agent.tools.http_client import aclose_client
+    from paperless_app.agent_runtime import AgentService
+
+    if not config.INGESTION_FAST_PATH:
+        raise SystemExit("The benchmark needs INGESTION_FAST_PATH=true (no scripted LLM upload).")
+    config.TEMP_DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+    root_agent = build_root_agent()
+    install_scripted_models(root_agent, latency=args.llm_latency)
+    ctx = {
+        "args": args,
+        "fake": fake,
+        "telemetry": telemetry,
+        "paperless_api": paperless_api,
+        "service": AgentService(root_agent),
+        "temp_dir": config.TEMP_DATA_DIR,
+        "llm_latency": args.llm_latency,
+    }
+
+    # Corpora distintos por cenário: o mesmo PDF seria descartado como duplicata
+    corpora = {}
+    offset = 0
+    sizes = {
+        "single": args.single_documents,
+        "bulk": args.documents,
+        "search": args.search_documents,
+    }
+    for index, name in enumerate(SCENARIOS):
+        corpus_dir = workdir / "corpus" / name
+        corpora[name] = (
+            generate_corpus(
+                corpus_dir,
+                sizes[name],
+                pages=args.pages,
+                correspondents=args.correspondents,
+                seed=args.seed + index,
+                start_index=offset,
+            ),
+            corpus_dir,
+        )
+        offset += sizes[name]
+
+    scenarios = {}
+    try:
+        # Turno descartado: a primeira execução monta declarações de tools e clientes
+        await ctx["service"].ensure_session(USER_ID, "warmup")
+        await ctx["service"].run_turn(USER_ID, "warmup", "aquecimento")
+        await ctx["service"].delete_session(USER_ID, "warmup")
+
+        for name in args.scenarios:
+            documents, corpus_dir = corpora[name]
+            logger.info("Running scenario %s...", name)
+            if name == "single":
+                scenarios[name] = await bench_single(ctx, documents, corpus_dir)
+            elif name == "bulk":
+                scenarios[name] = await bench_bulk(ctx, documents, corpus_dir)
+            else:
+                seed_search_corpus(fake, documents, corpus_dir)
+                queries = search_queries(documents, args.searches)
+                scenarios[name] = await bench_search(ctx, queries)
+            logger.info(
+                "%s: %.2f/s, p50 %.4fs, p99 %.4fs, %s HTTP calls, %s errors",
+                name,
+                scenarios[name]["throughput_per_second"],
+                scenarios[name]["latency"].get("p50", 0.0),
+                scenarios[name]["latency"].get("p99", 0.0),
+                scenarios[name]["http"]["total_calls"],
+                scenarios[name]["errors"],
+            )
+    finally:
+        await aclose_client()
+    return scenarios
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the Paperless orchestrator benchmarks.")
+    parser.add_argument(
+        "--scenarios",
+        default=",".join(SCENARIOS),
+        type=lambda value: [s for s in value.split(",") if s],
+        help=f"Comma-separated subset of {','.join(SCENARIOS)}",
+    )
+    parser.add_argument("--documents", type=int, default=50, help="PDFs for the bulk scenario")
+    parser.add_argument("--single-documents", type=int, default=20, help="PDFs for single turns")
+    parser.add_argument("--search-documents", type=int, default=200, help="Seeded search corpus")
+    parser.add_argument("--searches", type=int, default=50, help="Search turns")
+    parser.add_argument("--pages", type=int, default=2, help="Pages per synthetic PDF")
+    parser.add_argument("--correspondents", type=int, default=40, help="Distinct correspondents")
+    parser.add_argument("--taxonomy-size", type=int, default=200, help="Pre-existing entries")
+    parser.add_argument("--latency", type=float, default=0.005, help="Fake Paperless latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency (s)")
+    parser.add_argument("--consume-delay", type=float, default=0.05, help="OCR stand-in (s)")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Scripted model delay (s)")
+    parser.add_argument("--llm-concurrency", type=int, default=4)
+    parser.add_argument("--write-concurrency", type=int, default=8)
+    parser.add_argument("--task-poll-interval", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tracemalloc", action="store_true", help="Track Python heap peaks")
+    parser.add_argument("--workdir", help="Keep corpus and caches here (default: temp dir)")
+    parser.add_argument("--output", help="Write the JSON results to this path")
+    parser.add_argument("--baseline", help="Compare with a previous JSON result")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv: list = None) -> int:
+    """CLI entry point. Exit code 1 means a regression against the baseline."""
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    logger.setLevel(logging.INFO)
+
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="paperless-bench-"))
+    fake = FakePaperless(
+        latency=args.latency,
+        jitter=args.jitter,
+        consume_delay=args.consume_delay,
+        taxonomy_size=args.taxonomy_size,
+        seed=args.seed,
+    )
+    if args.tracemalloc:
+        tracemalloc.start()
+    with FakePaperlessServer(fake) as server:
+        _configure_environment(server.url, workdir, args)
+        scenarios = asyncio.run(run_benchmarks(args, fake, workdir))
+    if not args.workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    params = {k: v for k, v in vars(args).items() if k not in ("output", "baseline", "verbose")}
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": params,
+        },
+        "scenarios": scenarios,
+    }
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(text)
+    else:
+        print(text)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare(results, baseline, args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+        print("No regressions against the baseline.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
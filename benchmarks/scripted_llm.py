@@ -0,0 +1,193 @@
+"""
+Deterministic stand-in for Gemini that replays scripted tool calls.
+
+Each LlmAgent in the tree gets its own `ScriptedLlm`; the script decides the
+next step from the conversation (the user's message and the response of the
+last tool call), so a full ingestion or search turn runs through the real
+ADK flow, tools and callbacks without network access or model variance.
+Token usage is reported from the request size, so the token metrics keep
+working.
+"""
+import asyncio
+import re
+from dataclasses import dataclass, field
+from typing import AsyncGenerator, Callable, Optional, Union
+
+from google.adk.agents import LlmAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from benchmarks.corpus import parse_fields
+
+_FILENAME_RE = re.compile(r"[\w.-]+\.pdf", re.I)
+
+
+@dataclass
+class ScriptContext:
+    """What a script step can look at to build its arguments."""
+
+    user_text: str
+    last_response: dict = field(default_factory=dict)
+
+    @property
+    def filename(self) -> Optional[str]:
+        match = _FILENAME_RE.search(self.user_text)
+        return match.group(0) if match else None
+
+
+@dataclass
+class Call:
+    """Scripted tool call. `args` may be a callable receiving the `ScriptContext`."""
+
+    name: str
+    args: Union[dict, Callable[[ScriptContext], dict]] = field(default_factory=dict)
+
+
+@dataclass
+class Reply:
+    """Scripted final text answer."""
+
+    text: Union[str, Callable[[ScriptContext], str]]
+
+
+Script = Callable[[ScriptContext], list]
+
+
+class ScriptedLlm(BaseLlm):
+    """
+    Replays `script(context)` one step per model call.
+
+    The step index is derived from the request itself: if the last content is
+    the response to one of the script's tool calls, the next step follows it;
+    otherwise the script starts over. This keeps the model stateless, so the
+    same instance serves concurrent sessions.
+    """
+
+    model: str = "scripted-llm"
+    script: Script
+    latency: float = 0.0
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        context = _context_of(llm_request)
+        steps = self.script(context)
+        calls = [i for i, step in enumerate(steps) if isinstance(step, Call)]
+        last_call = _last_function_response_name(llm_request)
+        index = next((i + 1 for i in calls if steps[i].name == last_call), 0)
+        step = steps[index] if index < len(steps) else Reply("ok")
+
+        if isinstance(step, Call):
+            args = step.args(context) if callable(step.args) else step.args
+            part = types.Part(function_call=types.FunctionCall(name=step.name, args=args))
+            output = f"{step.name}({args})"
+        else:
+            text = step.text(context) if callable(step.text) else step.text
+            part = types.Part(text=text)
+            output = text
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[part]),
+            usage_metadata=_usage(llm_request, output),
+        )
+
+
+def _context_of(llm_request: LlmRequest) -> ScriptContext:
+    user_text, last_response = "", {}
+    for content in llm_request.contents or []:
+        for part in content.parts or []:
+            if content.role == "user" and part.text and not user_text:
+                # A primeira mensagem do usuário é o pedido original do turno
+                user_text = part.text
+            if part.function_response:
+                last_response = part.function_response.response or {}
+    return ScriptContext(user_text=user_text, last_response=last_response)
+
+
+def _last_function_response_name(llm_request: LlmRequest) -> Optional[str]:
+    contents = llm_request.contents or []
+    if not contents:
+        return None
+    for part in contents[-1].parts or []:
+        if part.function_response:
+            return part.function_response.name
+    return None
+
+
+def _usage(llm_request: LlmRequest, output: str) -> types.GenerateContentResponseUsageMetadata:
+    chars = len(str(llm_request.config.system_instruction or "")) if llm_request.config else 0
+    for content in llm_request.contents or []:
+        for part in content.parts or []:
+            chars += len(part.text or "") + len(str(part.function_response or ""))
+    prompt, candidates = chars // 4 + 1, len(output) // 4 + 1
+    return types.GenerateContentResponseUsageMetadata(
+        prompt_token_count=prompt,
+        candidates_token_count=candidates,
+        total_token_count=prompt + candidates,
+    )
+
+
+# --- Scripts for the agents in paperless_app.agent.definition ---
+
+
+def root_script(context: ScriptContext) -> list:
+    if context.filename:
+        return [
+            Call("save_filename_to_state", {"filename": context.filename}),
+            Call("transfer_to_agent", {"agent_name": "ingestion_workflow_agent"}),
+        ]
+    return [Call("transfer_to_agent", {"agent_name": "search_agent"})]
+
+
+def _document_info(context: ScriptContext) -> dict:
+    fields = parse_fields(context.last_response.get("result", ""))
+    keywords = [k.strip() for k in fields.get("Palavras-chave", "").split(",") if k.strip()]
+    return {
+        "correspondent_name": fields.get("Fornecedor", "Desconhecido"),
+        "document_date": fields.get("Data"),
+        "document_type": fields.get("Tipo"),
+        "title": fields.get("Título"),
+        "keywords": keywords,
+    }
+
+
+def analyzer_script(context: ScriptContext) -> list:
+    return [
+        Call("extract_text_from_pdf", lambda ctx: {"filename": ctx.filename}),
+        Call("save_document_info", _document_info),
+        Reply("✓ Documento analisado."),
+    ]
+
+
+def search_script(context: ScriptContext) -> list:
+    return [
+        Call("search_documents", lambda ctx: {"query": ctx.user_text}),
+        Reply(lambda ctx: f"Encontrei {ctx.last_response.get('count', 0)} documento(s)."),
+    ]
+
+
+SCRIPTS = {
+    "paperless_root_agent": root_script,
+    "document_analyzer_agent": analyzer_script,
+    "search_agent": search_script,
+}
+
+
+def install_scripted_models(agent, latency: float = 0.0, scripts: dict = None) -> int:
+    """
+    Replaces the model of every LlmAgent in the tree that has a script.
+
+    Returns:
+        int: Number of agents patched.
+    """
+    scripts = scripts or SCRIPTS
+    patched = 0
+    if isinstance(agent, LlmAgent) and agent.name in scripts:
+        agent.model = ScriptedLlm(script=scripts[agent.name], latency=latency)
+        patched += 1
+    for sub_agent in agent.sub_agents:
+        patched += install_scripted_models(sub_agent, latency, scripts)
+    return patched
@@ -1,164 +1,82 @@
-import streamlit as st
-import asyncio
-import time
+import logging
 import os
+import shutil
 import sys
-import logging
-import traceback
-
-# Custom Log Handler for Streamlit
-class StreamlitLogHandler(logging.Handler):
-    def emit(self, record):
-        try:
-            # Check if we are in a Streamlit context and if session_state is available
-            # We initialize the log list here to ensure it exists across different sessions
-            if "debug_logs" not in st.session_state:
-                st.session_state.debug_logs = []
-            
-            log_entry = self.format(record)
-            st.session_state.debug_logs.append(log_entry)
-            
-            # Keep only the last 100 logs
-            if len(st.session_state.debug_logs) > 100:
-                st.session_state.debug_logs.pop(0)
-        except (AttributeError, RuntimeError, KeyError):
-            # If st.session_state is not accessible (e.g. called from a separate thread 
-            # or before Streamlit is fully ready), we just skip it to avoid crashing.
-            pass
+import time
+import uuid
+
+import streamlit as st
+
+from paperless_app import log_buffer
 
 # Configure basic logging
 logger = logging.getLogger("paperless_app")
 logger.setLevel(logging.INFO)
 
-# Clear existing handlers to avoid duplicates on rerun
-if logger.handlers:
-    logger.handlers.clear()
-
 # Add standard stream handler
 stream_handler = logging.StreamHandler(sys.stdout)
 stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-logger.addHandler(stream_handler)
 
-# Add Streamlit handler
-st_handler = StreamlitLogHandler()
-st_handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
-logger.addHandler(st_handler)
+# Registros vão por uma fila para o stdout e para o buffer do painel de debug,
+# sem bloquear quem loga (inclusive a thread do runtime); idempotente entre reruns
+log_buffer.install(logger, handlers=[stream_handler])
 
-from google.adk.sessions import InMemorySessionService
-from google.adk.runners import Runner
-from google.genai import types as genai_types
-from paperless_app.agent.definition import root_agent
+from paperless_app.agent_runtime import AgentRuntime, get_runtime
+from paperless_app.bulk_ingest import BulkIngestPipeline, IngestJob
+from paperless_app.config import TEMP_DATA_DIR, UPLOAD_CHUNK_SIZE
 
-APP_NAME_FOR_ADK = "paperless_orchestrator_app"
 USER_ID = "streamlit_user"
 ADK_SESSION_KEY = "adk_session_id"
+INGEST_OWNER_KEY = "ingest_owner_id"
+# Uploads aguardando na fila; o pipeline os move para temp-data ao processar
+UPLOAD_STAGING_DIR = TEMP_DATA_DIR / "uploads"
 
 @st.cache_resource
-def get_runner():
-    """Initializes and caches the ADK Runner."""
-    session_service = InMemorySessionService()
-    runner = Runner(
-        agent=root_agent,
-        app_name=APP_NAME_FOR_ADK,
-        session_service=session_service
-    )
-    return runner, session_service
+def get_runner() -> AgentRuntime:
+    """
+    Returns the shared ADK runtime. The Runner lives on a long-lived background
+    event loop, so every Streamlit session reuses the same loop and pooled resources.
+    """
+    return get_runtime()
 
 def initialize_adk():
     """
-    Initializes the Google ADK Runner and manages the ADK session.
+    Initializes the Google ADK runtime and manages the ADK session.
     """
-    runner, session_service = get_runner()
+    runtime = get_runner()
     
     if ADK_SESSION_KEY not in st.session_state:
         session_id = f"streamlit_adk_session_{int(time.time())}_{os.urandom(4).hex()}"
         st.session_state[ADK_SESSION_KEY] = session_id
         logger.info(f"Creating new ADK session: {session_id}")
-        
-        asyncio.run(session_service.create_session(
-            app_name=APP_NAME_FOR_ADK,
-            user_id=USER_ID,
-            session_id=session_id
-        ))
     else:
         session_id = st.session_state[ADK_SESSION_KEY]
         logger.info(f"Using existing ADK session: {session_id}")
-        
-        session_exists = asyncio.run(session_service.get_session(
-            app_name=APP_NAME_FOR_ADK, user_id=USER_ID, session_id=session_id
-        ))
-        if not session_exists:
-            logger.warning(f"Session {session_id} not found in service, recreating...")
-            asyncio.run(session_service.create_session(
-                app_name=APP_NAME_FOR_ADK,
-                user_id=USER_ID,
-                session_id=session_id
-            ))
-    return runner, session_id
-
-async def run_adk_async(runner: Runner, session_id: str, user_message_text: str):
-    """
-    Asynchronously runs a single turn of the ADK agent conversation.
-    """
-    logger.info(f"Running agent turn for session {session_id}")
-    
-    session = await runner.session_service.get_session(app_name=APP_NAME_FOR_ADK, user_id=USER_ID, session_id=session_id)
-    if not session:
-        error_msg = "Error: ADK session not found."
-        logger.error(error_msg)
-        return error_msg
 
-    content = genai_types.Content(role='user', parts=[genai_types.Part(text=user_message_text)])
-    final_response_text = "[Agent did not provide a response]"
+    # Cria a sessão se ainda não existir (ou se o serviço foi reiniciado)
+    runtime.call(runtime.ensure_session(USER_ID, session_id))
+    return runtime, session_id
 
+def run_adk_sync(runtime: AgentRuntime, session_id: str, user_message_text: str) -> str:
+    """
+    Runs one agent turn on the runtime loop and waits for the response.
+    """
     try:
-        async for event in runner.run_async(user_id=USER_ID, session_id=session_id, new_message=content):
-            # Log all events for debugging
-            event_type = type(event).__name__
-            logger.info(f"ADK Event: {event_type}")
-            
-            if event.is_final_response():
-                if event.content and event.content.parts and hasattr(event.content.parts[0], 'text'):
-                    final_response_text = event.content.parts[0].text
-                    logger.info(f"Agent response received: {final_response_text[:50]}...")
-                # Do NOT break here, as there might be more events or internal transitions
-            
-            elif hasattr(event, 'tool_call') and event.tool_call:
-                logger.info(f"Tool call: {event.tool_call.function_call.name}")
-            
-            elif hasattr(event, 'tool_response') and event.tool_response:
-                logger.info(f"Tool response received for: {event.tool_response.function_response.name}")
-
+        return runtime.call(runtime.run_turn(USER_ID, session_id, user_message_text))
     except Exception as e:
-        full_traceback = traceback.format_exc()
-        logger.error(f"ADK Runner failed: {str(e)}\n{full_traceback}")
-        final_response_text = f"**Agent Error:**\n\n```\n{e}\n```\n\n*Check the debug logs for more details.*"
-        
-    return final_response_text
+        logger.error(f"Error in run_adk_sync: {str(e)}", exc_info=True)
+        return f"**System Error:** {str(e)}"
 
-def run_adk_sync(runner: Runner, session_id: str, user_message_text: str) -> str:
+def stream_adk_sync(runtime: AgentRuntime, session_id: str, user_message_text: str):
     """
-    Synchronous wrapper for running ADK by managing the event loop.
+    Runs one agent turn in streaming mode, yielding partial text and tool events
+    (see `agent_runtime.stream_items_of`) as soon as the runtime loop produces them.
     """
     try:
-        # Improved loop management for Streamlit
-        try:
-            loop = asyncio.get_running_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-        if loop.is_running():
-            # If we are in an environment where the loop is already running (like some versions of Streamlit)
-            # we might need a different approach, but usually streamlit threads don't have a running loop.
-            import nest_asyncio
-            nest_asyncio.apply()
-            return loop.run_until_complete(run_adk_async(runner, session_id, user_message_text))
-        else:
-            return loop.run_until_complete(run_adk_async(runner, session_id, user_message_text))
+        yield from runtime.iterate(runtime.stream_turn(USER_ID, session_id, user_message_text))
     except Exception as e:
-        logger.error(f"Error in run_adk_sync: {str(e)}", exc_info=True)
-        return f"**System Error:** {str(e)}"
+        logger.error(f"Error in stream_adk_sync: {str(e)}", exc_info=True)
+        yield {"type": "error", "text": f"**System Error:** {str(e)}"}
 
 def reset_adk_session():
     """
@@ -167,4 +85,67 @@ def reset_adk_session():
     if ADK_SESSION_KEY in st.session_state:
         old_session = st.session_state[ADK_SESSION_KEY]
         del st.session_state[ADK_SESSION_KEY]
+        # Remove a sessão antiga do serviço para não acumular sessões a cada arquivo
+        runtime = get_runner()
+        runtime.submit(runtime.delete_session(USER_ID, old_session))
         logger.info(f"ADK session {old_session} reset.")
+
+def read_debug_logs(after: int = 0, min_level: int = logging.INFO, all_sessions: bool = False) -> list:
+    """
+    Returns log records newer than `after` for the debug panel: the current
+    ADK session's records, or every record with `all_sessions`.
+    """
+    buffer = log_buffer.get_log_buffer()
+    if buffer is None:
+        return []
+    session_id = None if all_sessions else st.session_state.get(ADK_SESSION_KEY)
+    if session_id is None and not all_sessions:
+        return []
+    return buffer.read(session=session_id, after=after, min_level=min_level)
+
+@st.cache_resource
+def get_ingest_queue() -> BulkIngestPipeline:
+    """
+    Returns the ingestion job queue shared by all Streamlit sessions. Its
+    workers run on the ADK runtime loop, so uploads never block a script run
+    and concurrency is bounded per process, not per browser tab.
+    """
+    runtime = get_runner()
+    pipeline = BulkIngestPipeline(wait_for_tasks=True)
+    runtime.call(pipeline.start())
+    return pipeline
+
+def _ingest_owner() -> str:
+    if INGEST_OWNER_KEY not in st.session_state:
+        st.session_state[INGEST_OWNER_KEY] = uuid.uuid4().hex
+    return st.session_state[INGEST_OWNER_KEY]
+
+def enqueue_uploads(uploaded_files) -> list[IngestJob]:
+    """
+    Saves uploaded PDFs to the staging folder and enqueues one ingestion job
+    per file. Returns immediately; progress is read with `list_ingest_jobs`.
+    """
+    pipeline = get_ingest_queue()
+    runtime = get_runner()
+    owner = _ingest_owner()
+    UPLOAD_STAGING_DIR.mkdir(parents=True, exist_ok=True)
+
+    jobs = []
+    for uploaded_file in uploaded_files:
+        path = UPLOAD_STAGING_DIR / f"{uuid.uuid4()}.pdf"
+        # Copia em blocos para não criar mais uma cópia do PDF inteiro na memória
+        uploaded_file.seek(0)
+        with open(path, "wb") as f:
+            shutil.copyfileobj(uploaded_file, f, UPLOAD_CHUNK_SIZE)
+        job = runtime.call(
+            pipeline.submit(path, name=uploaded_file.name, owner=owner, move_source=True)
+        )
+        logger.info(f"Queued '{uploaded_file.name}' for ingestion ({path.name}).")
+        jobs.append(job)
+    return jobs
+
+def list_ingest_jobs() -> list[IngestJob]:
+    """Jobs submitted from this browser session, oldest first."""
+    if INGEST_OWNER_KEY not in st.session_state:
+        return []
+    return get_ingest_queue().jobs_for(st.session_state[INGEST_OWNER_KEY])
@@ -3,21 +3,30 @@ Agent definitions for the Paperless Orchestrator system using the Google ADK.
 
 This file defines a multi-agent architecture with specialized sub-agents.
 
+Agents are built by the `build_*` factories instead of at import time, so
+importing this module does not load the ADK agent classes or the Gemini SDK.
+`get_root_agent()` builds the tree once per process; the `root_agent` module
+attribute (used by `adk web`) resolves to the same instance.
 """
-from google.adk.agents import Agent, SequentialAgent
-from google.adk.tools import FunctionTool, load_artifacts
-from google.adk.tools.tool_context import ToolContext
-from dotenv import load_dotenv
+import asyncio
+import hashlib
 import logging
-import base64
-import uuid
-from typing import Optional
-from google.genai import types
-from pathlib import Path
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
+
+from google.adk.tools.tool_context import ToolContext
 
+from paperless_app import telemetry
 from paperless_app.agent import prompts
-from paperless_app.agent.tools import paperless_api, document_analyzer, file_manager
-from paperless_app.config import TEMP_DATA_DIR
+from paperless_app.agent.tools import document_analyzer, file_manager, paperless_api
+from paperless_app.agent.tools.extraction_cache import get_extraction_cache
+from paperless_app.agent.tools.hashing import file_sha256
+from paperless_app.config import INGESTION_FAST_PATH, TEMP_DATA_DIR, VECTOR_INDEX_ENABLED
+
+if TYPE_CHECKING:
+    from google.adk.agents import Agent, BaseAgent, SequentialAgent
+    from google.adk.agents.callback_context import CallbackContext
+    from google.genai import types
 
 MODEL = "gemini-2.0-flash"
 logger = logging.getLogger(__name__)
@@ -31,80 +40,229 @@ async def save_filename_to_state(tool_context: ToolContext, filename: str) -> st
 
 
 
-# Document Analyzer Agent
-document_analyzer_agent = Agent(
-    name="document_analyzer_agent",
-    model=MODEL,
-    description="Analisa documentos e extrai metadados usando capacidades de visão nativas",
-    instruction=prompts.DOCUMENT_ANALYZER_INSTRUCTION,
-    tools=[
-        FunctionTool(func=document_analyzer.save_document_info),
-        FunctionTool(func=file_manager.extract_text_from_pdf),
-    ],
-    output_key="document_metadata",
-)
-
-# Metadata Creator Agent
-metadata_creator_agent = Agent(
-    name="metadata_creator_agent",
-    model=MODEL,
-    description="Cria correspondentes e tags necessários no Paperless-NGX",
-    instruction=prompts.METADATA_CREATOR_INSTRUCTION,
-    tools=[
-        FunctionTool(func=paperless_api.get_or_create_correspondent),
-        FunctionTool(func=paperless_api.get_or_create_tag),
-        FunctionTool(func=paperless_api.get_or_create_document_type),
-    ],
-    output_key="metadata_ids",
-)
-
-# Document Uploader Agent
-document_uploader_agent = Agent(
-    name="document_uploader_agent",
-    model=MODEL,
-    description="Faz upload do documento com todos os metadados coletados",
-    instruction=prompts.DOCUMENT_UPLOADER_INSTRUCTION,
-    tools=[
-        FunctionTool(func=paperless_api.post_document),
-    ],
-    output_key="upload_result",
-)
-
-# Ingestion Workflow Agent (Sequential)
-ingestion_workflow_agent = SequentialAgent(
-    name="ingestion_workflow_agent",
-    description="Fluxo completo de cadastro de documentos: análise → metadados → upload",
-    sub_agents=[
-        document_analyzer_agent,
-        metadata_creator_agent,
-        document_uploader_agent,
-    ],
-)
-
-# Search Agent
-search_agent = Agent(
-    name="search_agent",
-    model=MODEL,
-    description="Busca documentos no Paperless-NGX usando linguagem natural",
-    instruction=prompts.SEARCH_AGENT_INSTRUCTION,
-    tools=[
-        FunctionTool(func=paperless_api.search_documents),
-        FunctionTool(func=paperless_api.list_document_types),
-    ],
-)
-
-# Root Agent
-root_agent = Agent(
-    name="paperless_root_agent",
-    model=MODEL,
-    description="Assistente principal para gerenciar documentos no Paperless-NGX",
-    instruction=prompts.ROOT_AGENT_INSTRUCTION,
-    tools=[
-        FunctionTool(func=save_filename_to_state),
-    ],
-    sub_agents=[
-        ingestion_workflow_agent,
-        search_agent,
-    ],
-    output_key="root_agent"
-)
+# Muda sempre que o prompt ou o modelo mudam, invalidando análises em cache
+ANALYSIS_CACHE_VERSION = hashlib.sha256(
+    f"{MODEL}\n{prompts.DOCUMENT_ANALYZER_INSTRUCTION}".encode("utf-8")
+).hexdigest()[:16]
+
+
+async def use_cached_analysis(callback_context: "CallbackContext") -> Optional["types.Content"]:
+    """
+    Before-agent callback for the analyzer: if this exact file (by SHA-256)
+    was analyzed before with the same prompt/model, restores its
+    `document_info` and skips the model call.
+    """
+    filename = callback_context.state.get("filename")
+    cache = get_extraction_cache()
+    if not filename or cache is None:
+        return None
+    file_path = TEMP_DATA_DIR / filename
+    if not file_path.exists():
+        return None
+
+    digest = await asyncio.to_thread(file_sha256, file_path)
+    callback_context.state["file_sha256"] = digest
+    cached = await asyncio.to_thread(cache.get, "document_info", ANALYSIS_CACHE_VERSION, digest)
+    telemetry.record_cache("analysis", "hit" if cached else "miss")
+    if not cached:
+        # Evita que um document_info antigo da sessão seja salvo para este arquivo
+        callback_context.state["document_info"] = None
+        return None
+
+    from google.genai import types
+
+    logger.info("✓ Reusing cached analysis for '%s' (%s)", filename, digest[:12])
+    callback_context.state["document_info"] = cached
+    return types.Content(
+        role="model", parts=[types.Part(text="✓ Análise do documento reaproveitada do cache.")]
+    )
+
+
+async def store_analysis(callback_context: "CallbackContext") -> None:
+    """After-agent callback for the analyzer: caches the saved `document_info`."""
+    digest = callback_context.state.get("file_sha256")
+    document_info = callback_context.state.get("document_info")
+    cache = get_extraction_cache()
+    if cache is None or not digest or not document_info:
+        return None
+    if document_info.get("status") == "success":
+        await asyncio.to_thread(
+            cache.put, "document_info", ANALYSIS_CACHE_VERSION, digest, document_info
+        )
+    return None
+
+
+async def skip_duplicate_ingestion(
+    callback_context: "CallbackContext",
+) -> Optional["types.Content"]:
+    """
+    Before-agent callback for the ingestion workflow: if the file already
+    exists in Paperless (same MD5), ends the workflow before any analysis.
+    """
+    filename = callback_context.state.get("filename")
+    if not filename or not (TEMP_DATA_DIR / filename).exists():
+        return None
+    duplicate = await paperless_api.find_duplicate_file(TEMP_DATA_DIR / filename)
+    if not duplicate:
+        return None
+    from google.genai import types
+
+    paperless_api.discard_temp_file(filename)
+    callback_context.state["upload_result"] = paperless_api.duplicate_result(duplicate)
+    if duplicate.get("document_id") is None:
+        text = "ℹ️ Este documento já foi enviado e ainda está sendo processado pelo Paperless."
+    else:
+        text = f"ℹ️ Este documento já existe no Paperless (ID {duplicate['document_id']})."
+    return types.Content(role="model", parts=[types.Part(text=text)])
+
+
+def build_document_analyzer_agent() -> "Agent":
+    """
+    Builds a new Document Analyzer agent. ADK agents can only have one parent,
+    so headless pipelines (e.g. bulk ingest) need their own instance.
+    """
+    from google.adk.agents import Agent
+    from google.adk.tools import FunctionTool
+
+    return Agent(
+        name="document_analyzer_agent",
+        model=MODEL,
+        description="Analisa documentos e extrai metadados usando capacidades de visão nativas",
+        instruction=prompts.DOCUMENT_ANALYZER_INSTRUCTION,
+        tools=[
+            FunctionTool(func=document_analyzer.save_document_info),
+            FunctionTool(func=file_manager.extract_text_from_pdf),
+        ],
+        output_key="document_metadata",
+        before_agent_callback=use_cached_analysis,
+        after_agent_callback=store_analysis,
+    )
+
+
+def build_metadata_creator_agent() -> "BaseAgent":
+    """
+    Metadata Creator stage: resolved as code with INGESTION_FAST_PATH (no
+    model calls), otherwise by an LLM agent calling the metadata tools.
+    """
+    from google.adk.agents import Agent
+    from google.adk.tools import FunctionTool
+
+    if INGESTION_FAST_PATH:
+        from paperless_app.agent.fast_path import MetadataResolverAgent
+
+        return MetadataResolverAgent(
+            name="metadata_creator_agent",
+            description="Resolve correspondente, tags e tipo de documento sem usar o modelo",
+        )
+    return Agent(
+        name="metadata_creator_agent",
+        model=MODEL,
+        description="Cria correspondentes e tags necessários no Paperless-NGX",
+        instruction=prompts.METADATA_CREATOR_INSTRUCTION,
+        tools=[
+            FunctionTool(func=paperless_api.resolve_metadata_batch),
+            FunctionTool(func=paperless_api.get_or_create_correspondent),
+            FunctionTool(func=paperless_api.get_or_create_tag),
+            FunctionTool(func=paperless_api.get_or_create_document_type),
+        ],
+        output_key="metadata_ids",
+    )
+
+
+def build_document_uploader_agent() -> "BaseAgent":
+    """Document Uploader stage: code with INGESTION_FAST_PATH, otherwise an LLM agent."""
+    from google.adk.agents import Agent
+    from google.adk.tools import FunctionTool
+
+    if INGESTION_FAST_PATH:
+        from paperless_app.agent.fast_path import DocumentUploaderAgent
+
+        return DocumentUploaderAgent(
+            name="document_uploader_agent",
+            description="Faz upload do documento com os metadados do state sem usar o modelo",
+        )
+    return Agent(
+        name="document_uploader_agent",
+        model=MODEL,
+        description="Faz upload do documento com todos os metadados coletados",
+        instruction=prompts.DOCUMENT_UPLOADER_INSTRUCTION,
+        tools=[
+            FunctionTool(func=paperless_api.post_document),
+        ],
+        output_key="upload_result",
+    )
+
+
+def build_ingestion_workflow_agent() -> "SequentialAgent":
+    """Ingestion workflow: analysis → metadata → upload, skipped for duplicates."""
+    from google.adk.agents import SequentialAgent
+
+    return SequentialAgent(
+        name="ingestion_workflow_agent",
+        description="Fluxo completo de cadastro de documentos: análise → metadados → upload",
+        sub_agents=[
+            build_document_analyzer_agent(),
+            build_metadata_creator_agent(),
+            build_document_uploader_agent(),
+        ],
+        before_agent_callback=skip_duplicate_ingestion,
+    )
+
+
+def build_search_agent() -> "Agent":
+    """Search agent; semantic search is only offered when the vector index is enabled."""
+    from google.adk.agents import Agent
+    from google.adk.tools import FunctionTool
+
+    return Agent(
+        name="search_agent",
+        model=MODEL,
+        description="Busca documentos no Paperless-NGX usando linguagem natural",
+        instruction=prompts.SEARCH_AGENT_INSTRUCTION,
+        tools=[
+            FunctionTool(func=paperless_api.search_documents),
+            FunctionTool(func=paperless_api.list_document_types),
+            *(
+                [FunctionTool(func=paperless_api.semantic_search_documents)]
+                if VECTOR_INDEX_ENABLED
+                else []
+            ),
+        ],
+    )
+
+
+def build_root_agent() -> "Agent":
+    """
+    Builds a new agent tree: the root agent routing to the ingestion workflow
+    and the search agent.
+    """
+    from google.adk.agents import Agent
+    from google.adk.tools import FunctionTool
+
+    return Agent(
+        name="paperless_root_agent",
+        model=MODEL,
+        description="Assistente principal para gerenciar documentos no Paperless-NGX",
+        instruction=prompts.ROOT_AGENT_INSTRUCTION,
+        tools=[
+            FunctionTool(func=save_filename_to_state),
+        ],
+        sub_agents=[
+            build_ingestion_workflow_agent(),
+            build_search_agent(),
+        ],
+        output_key="root_agent",
+    )
+
+
+@lru_cache(maxsize=None)
+def get_root_agent() -> "Agent":
+    """The process-wide agent tree, built on first use."""
+    return build_root_agent()
+
+
+def __getattr__(name: str):
+    # `root_agent` continua acessível como atributo do módulo (ex.: `adk web`)
+    if name == "root_agent":
+        return get_root_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
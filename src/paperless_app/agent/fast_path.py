@@ -0,0 +1,113 @@
+"""
+Deterministic (LLM-free) stages of the ingestion workflow.
+
+Once `document_analyzer_agent` has saved `document_info` to the state, the
+metadata and upload stages only call tools with values that are already
+known. These agents run that logic as plain code, so a document costs a
+single model invocation instead of three or more.
+"""
+import logging
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from paperless_app.agent.tools import paperless_api
+
+logger = logging.getLogger(__name__)
+
+
+async def resolve_document_metadata(document_info: dict) -> dict:
+    """
+    Resolves correspondent, document type and tags for an analyzed document.
+
+    Args:
+        document_info: The dict saved by `save_document_info`.
+
+    Returns:
+        dict: The result of `paperless_api.resolve_metadata`.
+    """
+    document_info = document_info or {}
+    return await paperless_api.resolve_metadata(
+        correspondent=document_info.get("correspondent_name"),
+        document_type=document_info.get("document_type"),
+        keywords=document_info.get("keywords"),
+    )
+
+
+async def upload_from_state(state: dict) -> dict:
+    """
+    Uploads the document referenced by `filename` using the IDs in `state`.
+
+    Returns:
+        dict: {"status": "success/duplicate/error", "message": "..."}
+    """
+    filename = state.get("filename")
+    if not filename:
+        return {"status": "error", "message": "✗ No filename found in state."}
+    document_info = state.get("document_info") or {}
+    return await paperless_api.upload_document(
+        filename,
+        correspondent_id=state.get("correspondent_id"),
+        document_type_id=state.get("document_type_id"),
+        tag_ids=state.get("tag_ids"),
+        created_date=document_info.get("document_date"),
+    )
+
+
+def _stage_event(agent: BaseAgent, ctx: InvocationContext, text: str, state_delta: dict) -> Event:
+    """Builds the event that reports a stage result and applies its state delta."""
+    return Event(
+        author=agent.name,
+        invocation_id=ctx.invocation_id,
+        branch=ctx.branch,
+        content=types.Content(role="model", parts=[types.Part(text=text)]),
+        actions=EventActions(state_delta=state_delta),
+    )
+
+
+class MetadataResolverAgent(BaseAgent):
+    """Code-only replacement for `metadata_creator_agent`."""
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        document_info = ctx.session.state.get("document_info")
+        if not document_info:
+            logger.error("✗ No document_info in state; skipping metadata resolution.")
+            yield _stage_event(self, ctx, "✗ Informações do documento não encontradas.", {})
+            return
+
+        resolved = await resolve_document_metadata(document_info)
+        state_delta = {"metadata_ids": resolved}
+        for key in ("correspondent_id", "document_type_id"):
+            if resolved[key] is not None:
+                state_delta[key] = resolved[key]
+        if resolved["tag_ids"]:
+            state_delta["tag_ids"] = resolved["tag_ids"]
+
+        if resolved["status"] == "success":
+            text = "✓ Metadados criados."
+        else:
+            text = "⚠️ Metadados criados parcialmente: " + "; ".join(resolved["errors"])
+        logger.info("Fast-path metadata resolution: %s", resolved)
+        yield _stage_event(self, ctx, text, state_delta)
+
+
+class DocumentUploaderAgent(BaseAgent):
+    """Code-only replacement for `document_uploader_agent`."""
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        result = await upload_from_state(ctx.session.state)
+        if result["status"] == "success":
+            text = "✅ Documento cadastrado com sucesso!"
+        elif result["status"] == "duplicate":
+            text = f"ℹ️ Documento já existente no Paperless: {result['message']}"
+        else:
+            text = f"❌ Falha no upload do documento: {result['message']}"
+        state_delta = {"upload_result": result}
+        if result.get("task_id"):
+            state_delta["upload_task"] = {"task_id": result["task_id"], "status": "pending"}
+            paperless_api.report_task_to_session(result["task_id"], ctx)
+        logger.info("Fast-path upload result: %s", result)
+        yield _stage_event(self, ctx, text, state_delta)
@@ -1,9 +1,7 @@
 """
 Tools for the Paperless Orchestrator agent.
-"""
-from . import paperless_api
-from . import document_analyzer
-from . import file_manager
-
-__all__ = ["paperless_api", "document_analyzer", "file_manager"]
 
+Submodules are not imported here: `from paperless_app.agent.tools import
+paperless_api` loads only what it names, so importing one tool module (e.g.
+`entity_resolver`) does not pull in the HTTP client or the PDF parser.
+"""
@@ -0,0 +1,123 @@
+"""
+Local index of document checksums known to Paperless-NGX.
+
+Paperless stores the MD5 of every original file. Checking it before upload
+lets us short-circuit duplicates before spending an LLM call, a multi-megabyte
+upload and server-side OCR on them.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from paperless_app.agent.tools.hashing import file_md5
+
+logger = logging.getLogger(__name__)
+
+
+class ChecksumIndex:
+    """
+    Bounded LRU cache mapping MD5 checksums to Paperless document IDs.
+
+    Local hits are answered from memory and misses are asked to the remote
+    `lookup`. Known documents older than `ttl` seconds are checked again, since
+    they may have been deleted in Paperless since. Pending uploads (no document
+    ID yet) are kept until `add` or `discard` resolves them.
+
+    Args:
+        lookup: Coroutine function returning the document ID for a checksum, or None.
+        ttl: Seconds a known document is trusted without asking Paperless again.
+        max_entries: Maximum number of known documents kept in memory.
+    """
+
+    def __init__(
+        self,
+        lookup: Callable[[str], Awaitable[Optional[int]]],
+        ttl: float,
+        max_entries: int,
+    ):
+        self._lookup = lookup
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        # checksum -> (document ID, stored_at); ID None = upload enviado, ainda em processamento
+        self._known: "OrderedDict[str, tuple]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "remote_lookups": 0, "evictions": 0}
+
+    def _store(self, checksum: str, document_id: Optional[int]) -> None:
+        self._known[checksum] = (document_id, time.monotonic())
+        self._known.move_to_end(checksum)
+        if len(self._known) <= self.max_entries:
+            return
+        # Descarta os documentos conhecidos menos usados; reservas pendentes ficam
+        for key in [k for k, (doc_id, _) in self._known.items() if doc_id is not None]:
+            if len(self._known) <= self.max_entries:
+                break
+            del self._known[key]
+            self.stats["evictions"] += 1
+
+    async def find(self, checksum: str) -> Optional[dict]:
+        """
+        Returns {"checksum", "document_id"} if the checksum is already known,
+        otherwise None. `document_id` may be None for uploads still pending.
+        """
+        checksum = checksum.lower()
+        entry = self._known.get(checksum)
+        if entry is not None:
+            document_id, stored_at = entry
+            if document_id is None or time.monotonic() - stored_at < self.ttl:
+                self._known.move_to_end(checksum)
+                self.stats["hits"] += 1
+                return {"checksum": checksum, "document_id": document_id}
+
+        self.stats["remote_lookups"] += 1
+        try:
+            document_id = await self._lookup(checksum)
+        except Exception as e:
+            # Não bloqueia a ingestão se a verificação falhar; na dúvida vale a entrada antiga
+            logger.warning("Checksum lookup failed for %s: %s", checksum, e)
+            if entry is None:
+                return None
+            return {"checksum": checksum, "document_id": entry[0]}
+
+        # Uma reserva feita durante a consulta continua valendo até o upload terminar
+        pending = checksum in self._known and self._known[checksum][0] is None
+        if document_id is None:
+            if checksum in self._known and not pending:
+                # O documento foi apagado no Paperless; esquece a entrada antiga
+                del self._known[checksum]
+            self.stats["misses"] += 1
+            return None
+        if not pending:
+            self._store(checksum, document_id)
+        self.stats["hits"] += 1
+        return {"checksum": checksum, "document_id": document_id}
+
+    def reserve(self, checksum: str) -> bool:
+        """
+        Marks a checksum as being uploaded, before the upload starts. Returns
+        False if it is already known or reserved (another copy of the file).
+        """
+        checksum = checksum.lower()
+        if checksum in self._known:
+            return False
+        self._store(checksum, None)
+        return True
+
+    def add(self, checksum: str, document_id: Optional[int] = None) -> None:
+        """Records a checksum that was just uploaded (or resolved)."""
+        checksum = checksum.lower()
+        if document_id is not None or checksum not in self._known:
+            self._store(checksum, document_id)
+
+    def discard(self, checksum: str) -> None:
+        """Forgets a pending checksum (e.g. the upload failed during consumption)."""
+        checksum = checksum.lower()
+        if checksum in self._known and self._known[checksum][0] is None:
+            del self._known[checksum]
+
+    async def find_file(self, path: Path) -> Optional[dict]:
+        """Hashes `path` off the event loop and looks it up."""
+        checksum = await asyncio.to_thread(file_md5, path)
+        return await self.find(checksum)
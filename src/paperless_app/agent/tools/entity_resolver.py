@@ -0,0 +1,198 @@
+"""
+Indexed fuzzy matching of entity names (correspondents, tags, document types).
+
+Names are normalized once when they enter the index. Lookups use an exact hash
+map and a token inverted index for candidate generation, so only a handful of
+candidates are scored instead of scanning every entity.
+"""
+import math
+import re
+import unicodedata
+from typing import Optional
+
+SIMILARITY_THRESHOLD = 0.85
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_COMPANY_SUFFIX_RE = re.compile(r"\b(ltda|ltda\.|ltd|inc|inc\.|corp|corp\.|company|co\.)\b")
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normaliza um nome para comparação, removendo acentos, espaços extras e convertendo para minúsculas.
+
+    Args:
+        name: Nome a ser normalizado.
+
+    Returns:
+        Nome normalizado para comparação.
+    """
+    if not name:
+        return ""
+
+    # Remove acentos
+    nfd = unicodedata.normalize("NFD", name)
+    without_accents = "".join(char for char in nfd if unicodedata.category(char) != "Mn")
+
+    # Converte para minúsculas e remove espaços extras
+    normalized = _WHITESPACE_RE.sub(" ", without_accents.lower()).strip()
+
+    # Remove palavras comuns que podem variar
+    # (opcional - pode ser expandido conforme necessário)
+    normalized = _COMPANY_SUFFIX_RE.sub("", normalized)
+    return _WHITESPACE_RE.sub(" ", normalized).strip()
+
+
+def significant_words(normalized: str) -> frozenset:
+    """Returns the words longer than 2 characters (drops articles, prepositions)."""
+    return frozenset(w for w in normalized.split() if len(w) > 2)
+
+
+def _similar_normalized(
+    norm1: str, words1: frozenset, norm2: str, words2: frozenset, threshold: float
+) -> bool:
+    """Similarity check on already normalized names."""
+    if norm1 == norm2:
+        return True
+    # Verifica se um nome contém o outro (para casos como "Amazon" vs "Amazon Serviços")
+    if norm1 not in norm2 and norm2 not in norm1:
+        return False
+    if not words1 or not words2:
+        return False
+    # Similaridade de Jaccard
+    union = len(words1 | words2)
+    return union > 0 and len(words1 & words2) / union >= threshold
+
+
+def names_are_similar(name1: str, name2: str, threshold: float = SIMILARITY_THRESHOLD) -> bool:
+    """
+    Verifica se dois nomes são similares usando normalização e comparação simples.
+
+    Args:
+        name1: Primeiro nome.
+        name2: Segundo nome.
+        threshold: Limiar de similaridade (0-1). Padrão: 0.85.
+
+    Returns:
+        True se os nomes são considerados similares.
+    """
+    norm1 = normalize_name(name1)
+    norm2 = normalize_name(name2)
+    return _similar_normalized(
+        norm1, significant_words(norm1), norm2, significant_words(norm2), threshold
+    )
+
+
+class EntityResolver:
+    """
+    Index over Paperless entities for exact and fuzzy name lookups.
+
+    Matches are identical to a linear scan with `names_are_similar`: when
+    several entities qualify, the one added first wins.
+    """
+
+    def __init__(self, entities: list[dict] = None, threshold: float = SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self._seq = 0
+        # id -> (order, entity, lower name, normalized name, words)
+        self._records: dict = {}
+        self._by_lower: dict[str, dict[int, int]] = {}
+        self._by_norm: dict[str, dict[int, int]] = {}
+        self._by_token: dict[str, set] = {}
+        for entity in entities or []:
+            self.add(entity)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @staticmethod
+    def _first(bucket: Optional[dict]) -> Optional[int]:
+        if not bucket:
+            return None
+        return min(bucket, key=bucket.get)
+
+    def add(self, entity: dict) -> None:
+        """Adds or updates an entity (keyed by its `id`)."""
+        entity_id = entity.get("id")
+        if entity_id is None:
+            return
+        order = None
+        if entity_id in self._records:
+            order = self._records[entity_id][0]
+            self.remove(entity_id)
+        if order is None:
+            order = self._seq
+            self._seq += 1
+
+        name = entity.get("name", "") or ""
+        lower = name.lower()
+        norm = normalize_name(name)
+        words = significant_words(norm)
+        self._records[entity_id] = (order, entity, lower, norm, words)
+        self._by_lower.setdefault(lower, {})[entity_id] = order
+        self._by_norm.setdefault(norm, {})[entity_id] = order
+        for word in words:
+            self._by_token.setdefault(word, set()).add(entity_id)
+
+    def remove(self, entity_id: int) -> None:
+        """Removes an entity from every index."""
+        record = self._records.pop(entity_id, None)
+        if record is None:
+            return
+        _, _, lower, norm, words = record
+        for index, key in ((self._by_lower, lower), (self._by_norm, norm)):
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.pop(entity_id, None)
+                if not bucket:
+                    del index[key]
+        for word in words:
+            ids = self._by_token.get(word)
+            if ids is not None:
+                ids.discard(entity_id)
+                if not ids:
+                    del self._by_token[word]
+
+    def find_exact(self, name: str) -> Optional[dict]:
+        """Case-insensitive exact match."""
+        entity_id = self._first(self._by_lower.get((name or "").lower()))
+        return None if entity_id is None else self._records[entity_id][1]
+
+    def find_similar(self, name: str) -> Optional[dict]:
+        """Fuzzy match with the same semantics as `names_are_similar`."""
+        norm = normalize_name(name)
+        words = significant_words(norm)
+        best_id = self._first(self._by_norm.get(norm))
+        best_order = self._records[best_id][0] if best_id is not None else math.inf
+
+        for entity_id in self._candidates(words):
+            order, _, _, cand_norm, cand_words = self._records[entity_id]
+            if order >= best_order:
+                continue
+            if _similar_normalized(norm, words, cand_norm, cand_words, self.threshold):
+                best_id, best_order = entity_id, order
+
+        return None if best_id is None else self._records[best_id][1]
+
+    def _candidates(self, words: frozenset) -> set:
+        """
+        Ids that can reach the Jaccard threshold against `words`.
+
+        If |A ∩ B| >= ceil(t * |A|), any subset of A with |A| - ceil(t * |A|) + 1
+        words must hit B, so only the rarest such words need to be looked up.
+        Candidates are then pruned by the size bound t * |A| <= |B| <= |A| / t.
+        """
+        if not words:
+            return set()
+        size = len(words)
+        min_overlap = max(1, math.ceil(self.threshold * size - 1e-6))
+        prefix_len = size - min_overlap + 1
+        rarest = sorted(words, key=lambda w: len(self._by_token.get(w, ())))[:prefix_len]
+
+        min_size = self.threshold * size - 1e-6
+        max_size = size / self.threshold + 1e-6
+        candidates = set()
+        for word in rarest:
+            for entity_id in self._by_token.get(word, ()):
+                if min_size <= len(self._records[entity_id][4]) <= max_size:
+                    candidates.add(entity_id)
+        return candidates
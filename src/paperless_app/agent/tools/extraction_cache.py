@@ -0,0 +1,133 @@
+"""
+On-disk cache of per-document work, keyed by the SHA-256 of the file bytes.
+
+Stores the extracted PDF text and the `document_info` produced by the
+analyzer, so re-uploaded documents skip both extraction and the model call.
+Entries are versioned (e.g. by prompt/model) and evicted in LRU order once the
+cache exceeds its size budget.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from paperless_app.config import (
+    EXTRACTION_CACHE_ENABLED,
+    EXTRACTION_CACHE_MAX_MB,
+    EXTRACTION_CACHE_PATH,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionCache:
+    """
+    Size-bounded LRU cache backed by SQLite. Thread-safe; blocking calls
+    should be run with `asyncio.to_thread` from async code.
+
+    Args:
+        path: SQLite database file.
+        max_bytes: Total payload size above which least recently used
+            entries are evicted.
+    """
+
+    def __init__(self, path: Path, max_bytes: int):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)"
+        )
+        self._conn.commit()
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    @staticmethod
+    def _key(kind: str, version: str, digest: str) -> str:
+        return f"{kind}:{version}:{digest}"
+
+    def get(self, kind: str, version: str, digest: str) -> Optional[Any]:
+        """Returns the cached value or None, refreshing its LRU position on a hit."""
+        key = self._key(kind, version, digest)
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self._conn.execute(
+                "UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+            self.stats["hits"] += 1
+        return json.loads(row[0])
+
+    def put(self, kind: str, version: str, digest: str, value: Any) -> None:
+        """Stores a JSON-serializable value and evicts old entries if over budget."""
+        payload = json.dumps(value, ensure_ascii=False)
+        size = len(payload.encode("utf-8"))
+        if size > self.max_bytes:
+            logger.info("Skipping cache entry of %s bytes (over the cache budget).", size)
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (self._key(kind, version, digest), payload, size, time.time()),
+            )
+            self.stats["writes"] += 1
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM entries ORDER BY last_access")
+        to_delete = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            to_delete.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", to_delete)
+        self.stats["evictions"] += len(to_delete)
+        logger.info("Extraction cache evicted %s entries.", len(to_delete))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+
+_cache: Optional[ExtractionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_extraction_cache() -> Optional[ExtractionCache]:
+    """Returns the process-wide cache, or None when disabled by config."""
+    global _cache
+    if not EXTRACTION_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = ExtractionCache(
+                    EXTRACTION_CACHE_PATH, int(EXTRACTION_CACHE_MAX_MB * 1024 * 1024)
+                )
+            except (OSError, sqlite3.Error) as e:
+                logger.error(
+                    "✗ Could not open extraction cache at %s: %s", EXTRACTION_CACHE_PATH, e
+                )
+                return None
+    return _cache
@@ -1,18 +1,38 @@
-
 """
 Helper tools for file management.
+
+pdfplumber and the process pool are imported on first extraction, not when
+the agent tools are loaded.
 """
+import asyncio
+import hashlib
+import io
 import logging
+import math
 import os
-import io
-import base64
-import pdfplumber
-from typing import Optional, Union
 from pathlib import Path
-from paperless_app.config import TEMP_DATA_DIR
+from typing import TYPE_CHECKING, Iterator, Optional, Union
+
+from paperless_app import telemetry
+from paperless_app.agent.tools.extraction_cache import get_extraction_cache
+from paperless_app.agent.tools.hashing import file_sha256
+from paperless_app.config import (
+    PDF_EXTRACT_WORKERS,
+    PDF_MAX_CHARS,
+    PDF_MAX_PAGES,
+    PDF_PARALLEL_MIN_PAGES,
+    TEMP_DATA_DIR,
+)
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
 
 logger = logging.getLogger(__name__)
 
+PdfSource = Union[str, Path, io.BytesIO]
+
+_process_pool: Optional["ProcessPoolExecutor"] = None
+
 
 def get_file_name() -> str:
     """
@@ -30,25 +50,174 @@ def get_file_name() -> str:
         return ""
 
 
-def extract_text_from_pdf(filename: str = None, file_content: bytes = None) -> str:
+def _page_text(page) -> str:
+    """Extracts the text of one page; pages without a text layer return ''."""
+    try:
+        return page.extract_text() or ""
+    finally:
+        # Libera os objetos parseados da página (importante em PDFs grandes)
+        close = getattr(page, "close", None)
+        if close:
+            close()
+
+
+def iter_pdf_pages(source: PdfSource, max_pages: int = None) -> Iterator[str]:
+    """
+    Yields the text of each page of a PDF, in order.
+
+    Args:
+        source: Path to the PDF or a file-like object with its bytes.
+        max_pages: Stop after this many pages (None = all pages).
+    """
+    import pdfplumber
+
+    with pdfplumber.open(source) as pdf:
+        pages = pdf.pages if max_pages is None else pdf.pages[:max_pages]
+        for page in pages:
+            yield _page_text(page)
+
+
+def _extract_page_range(path: str, start: int, end: int) -> list[str]:
+    """Process-pool worker: extracts pages [start, end) of a PDF file."""
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        return [_page_text(page) for page in pdf.pages[start:end]]
+
+
+def _get_process_pool(workers: int) -> "ProcessPoolExecutor":
+    global _process_pool
+    if _process_pool is None:
+        from concurrent.futures import ProcessPoolExecutor
+
+        _process_pool = ProcessPoolExecutor(max_workers=workers)
+    return _process_pool
+
+
+def _extract_parallel(path: Path, max_pages: Optional[int], workers: int) -> Optional[list[str]]:
+    """
+    Fans page ranges out to the process pool. Returns None when the document
+    is too small for parallelism to pay off.
+    """
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        page_count = len(pdf.pages)
+    if max_pages is not None:
+        page_count = min(page_count, max_pages)
+    if page_count < PDF_PARALLEL_MIN_PAGES:
+        return None
+
+    chunk = math.ceil(page_count / workers)
+    pool = _get_process_pool(workers)
+    futures = [
+        pool.submit(_extract_page_range, str(path), start, min(start + chunk, page_count))
+        for start in range(0, page_count, chunk)
+    ]
+    texts = []
+    for future in futures:
+        texts.extend(future.result())
+    return texts
+
+
+def extract_pdf_text(
+    source: PdfSource,
+    max_pages: int = None,
+    max_chars: int = None,
+    workers: int = 0,
+) -> str:
+    """
+    Extracts text from a PDF within a page/character budget (blocking).
+
+    Args:
+        source: Path to the PDF or a file-like object with its bytes.
+        max_pages: Maximum number of pages to read (None = all).
+        max_chars: Maximum number of characters to return (None = unlimited).
+        workers: If > 1 and `source` is a path, large documents are split
+            across this many processes.
+
+    Returns:
+        The page texts joined by newlines.
+    """
+    texts = None
+    if workers > 1 and isinstance(source, (str, Path)):
+        texts = _extract_parallel(Path(source), max_pages, workers)
+
+    if texts is None:
+        texts = []
+        total = 0
+        for text in iter_pdf_pages(source, max_pages):
+            texts.append(text)
+            total += len(text)
+            if max_chars and total >= max_chars:
+                break
+
+    result = "\n".join(texts)
+    return result[:max_chars] if max_chars else result
+
+
+def _extract_cached(
+    source: PdfSource, digest: str, max_pages: int, max_chars: int, workers: int = 0
+) -> str:
+    """Looks the text up in the extraction cache by content hash, extracting on a miss."""
+    cache = get_extraction_cache()
+    version = f"pages={max_pages};chars={max_chars}"
+    if cache is not None:
+        cached = cache.get("text", version, digest)
+        telemetry.record_cache("pdf_text", "hit" if cached is not None else "miss")
+        if cached is not None:
+            logger.info("✓ Using cached text for document %s", digest[:12])
+            return cached
+    with telemetry.span("pdf.extract", max_pages=max_pages, workers=workers) as span:
+        text = extract_pdf_text(source, max_pages, max_chars, workers)
+        span.set_attribute("pdf.chars", len(text))
+    if cache is not None and text:
+        cache.put("text", version, digest, text)
+    return text
+
+
+def _extract_file_cached(file_path: Path, max_pages: int, max_chars: int) -> str:
+    return _extract_cached(
+        file_path, file_sha256(file_path), max_pages, max_chars, PDF_EXTRACT_WORKERS
+    )
+
+
+def _extract_bytes_cached(file_content: bytes, max_pages: int, max_chars: int) -> str:
+    digest = hashlib.sha256(file_content).hexdigest()
+    return _extract_cached(io.BytesIO(file_content), digest, max_pages, max_chars)
+
+
+async def extract_text_from_pdf(
+    filename: str = None,
+    file_content: bytes = None,
+    max_pages: int = None,
+    max_chars: int = None,
+) -> str:
     """
     Extracts text from a PDF file.
 
+    Only the first pages are read by default, which is enough to identify the
+    document. Extraction runs off the event loop and results are cached by
+    the file's content hash.
+
     Args:
         filename: The name of the file in the temp-data folder.
         file_content: The content of the PDF file as bytes.
+        max_pages: Maximum number of pages to read (default: PDF_MAX_PAGES).
+        max_chars: Maximum number of characters to return (default: PDF_MAX_CHARS).
 
     Returns:
         The extracted text as a string.
     """
+    # 0 na configuração significa "sem limite"
+    max_pages = max_pages or PDF_MAX_PAGES or None
+    max_chars = max_chars or PDF_MAX_CHARS or None
     if file_content:
         try:
             logger.info("Extracting text from PDF content.")
-            with pdfplumber.open(io.BytesIO(file_content)) as pdf:
-                pdf_text = ""
-                for page in pdf.pages:
-                    pdf_text += page.extract_text()
-            return pdf_text
+            return await asyncio.to_thread(
+                _extract_bytes_cached, file_content, max_pages, max_chars
+            )
         except Exception as e:
             logger.error("Error extracting text from PDF content: %s", e)
             return ""
@@ -56,14 +225,10 @@ def extract_text_from_pdf(filename: str = None, file_content: bytes = None) -> s
         try:
             file_path = TEMP_DATA_DIR / filename
             logger.info("Extracting text from PDF file %s", file_path)
-            with pdfplumber.open(file_path) as pdf:
-                pdf_text = ""
-                for page in pdf.pages:
-                    pdf_text += page.extract_text()
-            return pdf_text
+            return await asyncio.to_thread(_extract_file_cached, file_path, max_pages, max_chars)
         except Exception as e:
             logger.error("Error extracting text from PDF: %s", e)
             return ""
     else:
         logger.error("Either filename or file_content must be provided.")
-        return ""
\ No newline at end of file
+        return ""
@@ -0,0 +1,30 @@
+"""
+Streaming file hashes.
+
+The extraction cache keys its entries by SHA-256 and Paperless-NGX stores the
+MD5 of every original, so both are computed here, in chunks, without loading
+the file into memory.
+"""
+import hashlib
+from pathlib import Path
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path: Path, algorithm: str) -> str:
+    """Hex digest of a file with any `hashlib` algorithm, computed in chunks."""
+    digest = hashlib.new(algorithm)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_sha256(path: Path) -> str:
+    """SHA-256 of a file (the extraction cache key)."""
+    return file_digest(path, "sha256")
+
+
+def file_md5(path: Path) -> str:
+    """MD5 of a file (the checksum Paperless stores)."""
+    return file_digest(path, "md5")
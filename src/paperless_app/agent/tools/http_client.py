@@ -0,0 +1,285 @@
+"""
+Shared, pooled async HTTP client for the Paperless-NGX API tools.
+
+A single `httpx.AsyncClient` is kept per process (and per event loop, since
+httpx connections cannot cross loops) so every tool call reuses warm
+keep-alive connections instead of paying a TCP/TLS handshake each time.
+httpx itself is only imported when the first client is built.
+"""
+import asyncio
+import atexit
+import importlib.util
+import logging
+import os
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from paperless_app import telemetry
+from paperless_app.config import (
+    PAPERLESS_HTTP2,
+    PAPERLESS_HTTP_KEEPALIVE_EXPIRY,
+    PAPERLESS_HTTP_MAX_CONNECTIONS,
+    PAPERLESS_HTTP_MAX_KEEPALIVE,
+    PAPERLESS_HTTP_TIMEOUT,
+    UPLOAD_CHUNK_SIZE,
+    validate_config,
+)
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_client_loop = None
+
+_upload_stats = {"uploads": 0, "bytes_total": 0, "seconds_total": 0.0}
+
+_metrics = {
+    "clients_created": 0,
+    "requests_total": 0,
+    "requests_failed": 0,
+    "in_flight": 0,
+    "peak_in_flight": 0,
+    "pool_waits": 0,
+    "pool_wait_seconds_total": 0.0,
+    "request_seconds_total": 0.0,
+}
+
+# Esperas abaixo disso são só o custo de pegar uma conexão livre, não fila no pool
+_POOL_WAIT_THRESHOLD = 0.001
+
+
+@lru_cache(maxsize=None)
+def _instrumented_transport_class() -> type:
+    """
+    AsyncHTTPTransport subclass that records pool-level usage metrics and a span per
+    request. Defined on first use, so that importing this module does not import httpx.
+
+    The pool wait is measured, not guessed from the in-flight count (with HTTP/2
+    many requests share one connection): httpcore emits its first trace event
+    (`connect_tcp` or `send_request_headers`) only once the pool has handed the
+    request a connection or stream.
+    """
+    import httpx
+
+    class _InstrumentedTransport(httpx.AsyncHTTPTransport):
+        async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+            acquired = []
+            previous_trace = request.extensions.get("trace")
+
+            async def trace(event: str, info: dict) -> None:
+                if not acquired:
+                    acquired.append(time.perf_counter())
+                if previous_trace is not None:
+                    await previous_trace(event, info)
+
+            request.extensions = {**request.extensions, "trace": trace}
+            _metrics["in_flight"] += 1
+            _metrics["requests_total"] += 1
+            _metrics["peak_in_flight"] = max(_metrics["peak_in_flight"], _metrics["in_flight"])
+            started = time.perf_counter()
+            route = telemetry.http_route(request.url.path)
+            try:
+                with telemetry.span(
+                    f"{request.method} {route}", "http", **{"http.method": request.method}
+                ) as span:
+                    response = await super().handle_async_request(request)
+                    span.set_attribute("http.status_code", response.status_code)
+                    if acquired:
+                        pool_wait = acquired[0] - started
+                        span.set_attribute("http.pool_wait_ms", round(pool_wait * 1000, 3))
+                        _record_pool_wait(pool_wait)
+                # Tamanhos pelos cabeçalhos: o corpo da resposta ainda não foi lido aqui
+                sent = request.headers.get("content-length")
+                received = response.headers.get("content-length")
+                telemetry.record_http_bytes(
+                    route, int(sent) if sent else None, int(received) if received else None
+                )
+                return response
+            except Exception:
+                _metrics["requests_failed"] += 1
+                raise
+            finally:
+                _metrics["in_flight"] -= 1
+                _metrics["request_seconds_total"] += time.perf_counter() - started
+
+    return _InstrumentedTransport
+
+
+def _record_pool_wait(seconds: float) -> None:
+    _metrics["pool_wait_seconds_total"] += seconds
+    if seconds >= _POOL_WAIT_THRESHOLD:
+        _metrics["pool_waits"] += 1
+    telemetry.record_http_pool_wait(seconds)
+
+
+def _http2_available() -> bool:
+    """Returns True if HTTP/2 was requested and the `h2` package is installed."""
+    if not PAPERLESS_HTTP2:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        logger.warning("PAPERLESS_HTTP2 is enabled but 'h2' is not installed; using HTTP/1.1.")
+        return False
+    return True
+
+
+def _build_client() -> "httpx.AsyncClient":
+    """Creates a new pooled client using the limits from config."""
+    import httpx
+
+    validate_config()
+    limits = httpx.Limits(
+        max_connections=PAPERLESS_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=PAPERLESS_HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=PAPERLESS_HTTP_KEEPALIVE_EXPIRY,
+    )
+    http2 = _http2_available()
+    transport = _instrumented_transport_class()(limits=limits, http2=http2)
+    _metrics["clients_created"] += 1
+    logger.info(
+        "Created shared Paperless HTTP client (max_connections=%s, keepalive=%s, http2=%s)",
+        PAPERLESS_HTTP_MAX_CONNECTIONS,
+        PAPERLESS_HTTP_MAX_KEEPALIVE,
+        http2,
+    )
+    return httpx.AsyncClient(
+        transport=transport,
+        timeout=httpx.Timeout(PAPERLESS_HTTP_TIMEOUT),
+    )
+
+
+def get_client() -> "httpx.AsyncClient":
+    """
+    Returns the process-wide Paperless HTTP client.
+
+    Must be called from inside a running event loop. If the loop changed
+    (e.g. a new `asyncio.run` call), a fresh client is created for it.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        if _client is not None and not _client.is_closed:
+            logger.info("Event loop changed; creating a new shared HTTP client.")
+        _client = _build_client()
+        _client_loop = loop
+    return _client
+
+
+async def aclose_client() -> None:
+    """Closes the shared client, releasing all pooled connections."""
+    global _client, _client_loop
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+        logger.info("Shared Paperless HTTP client closed.")
+    _client = None
+    _client_loop = None
+
+
+def _close_at_exit() -> None:
+    """Best-effort close of the shared client at interpreter shutdown."""
+    loop = _client_loop
+    if _client is None or loop is None or loop.is_closed() or loop.is_running():
+        return
+    try:
+        loop.run_until_complete(aclose_client())
+    except Exception as e:
+        logger.debug("Could not close shared HTTP client at exit: %s", e)
+
+
+atexit.register(_close_at_exit)
+
+
+def get_pool_metrics() -> dict:
+    """
+    Returns pool-level metrics for the shared client.
+
+    Returns:
+        dict: Request counters plus current open/idle connection counts.
+    """
+    metrics = dict(_metrics)
+    open_connections = 0
+    idle_connections = 0
+    if _client is not None and not _client.is_closed:
+        pool = getattr(_client._transport, "_pool", None)
+        for conn in getattr(pool, "connections", []):
+            open_connections += 1
+            if conn.is_idle():
+                idle_connections += 1
+    metrics["open_connections"] = open_connections
+    metrics["idle_connections"] = idle_connections
+    return metrics
+
+
+class StreamingFileReader:
+    """
+    Read-only file wrapper for multipart uploads.
+
+    httpx streams file objects instead of buffering them, and this wrapper caps
+    each read at UPLOAD_CHUNK_SIZE bytes, so an upload only ever holds one small
+    chunk in memory. It also measures throughput.
+    """
+
+    def __init__(self, path, chunk_size: int = UPLOAD_CHUNK_SIZE):
+        self._file = open(path, "rb")
+        self.chunk_size = chunk_size
+        self.size = os.fstat(self._file.fileno()).st_size
+        self.bytes_read = 0
+        self._started = None
+
+    def read(self, size: int = -1) -> bytes:
+        if self._started is None:
+            self._started = time.perf_counter()
+        if size is not None and size > self.chunk_size:
+            size = self.chunk_size
+        chunk = self._file.read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        position = self._file.seek(offset, whence)
+        if position == 0:
+            # httpx volta ao início antes de (re)enviar o corpo
+            self.bytes_read = 0
+            self._started = None
+        return position
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def fileno(self) -> int:
+        return self._file.fileno()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def elapsed(self) -> float:
+        return 0.0 if self._started is None else time.perf_counter() - self._started
+
+    def throughput(self) -> dict:
+        """Returns bytes sent, elapsed seconds and MB/s, and records them globally."""
+        elapsed = self.elapsed
+        _upload_stats["uploads"] += 1
+        _upload_stats["bytes_total"] += self.bytes_read
+        _upload_stats["seconds_total"] += elapsed
+        return {
+            "bytes": self.bytes_read,
+            "seconds": round(elapsed, 3),
+            "mb_per_second": round(self.bytes_read / elapsed / 1e6, 2) if elapsed > 0 else None,
+        }
+
+
+def get_upload_stats() -> dict:
+    """Aggregate upload throughput since process start."""
+    stats = dict(_upload_stats)
+    seconds = stats["seconds_total"]
+    stats["mb_per_second"] = round(stats["bytes_total"] / seconds / 1e6, 2) if seconds else None
+    return stats
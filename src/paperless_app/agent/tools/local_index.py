@@ -0,0 +1,288 @@
+"""
+Optional local full-text and metadata index of Paperless-NGX documents.
+
+A SQLite FTS5 table over titles, correspondents, document types, tags and
+OCR content, kept up to date by an incremental sync (`modified__gt` deltas,
+see `paperless_api.sync_local_index`). Plain keyword searches and structured
+filters (correspondent, type, tags, date range) are answered locally in
+milliseconds instead of hitting the Paperless Whoosh index.
+"""
+import logging
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+from paperless_app.agent.tools.entity_resolver import normalize_name
+from paperless_app.agent.tools.search_cache import singular
+from paperless_app.config import LOCAL_INDEX_ENABLED, LOCAL_INDEX_PATH
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS documents ("
+    " id INTEGER PRIMARY KEY,"
+    " title TEXT, created TEXT, modified TEXT,"
+    " correspondent_id INTEGER, correspondent TEXT,"
+    " document_type_id INTEGER, document_type TEXT,"
+    " tags TEXT, content TEXT)",
+    "CREATE INDEX IF NOT EXISTS documents_correspondent ON documents (correspondent_id)",
+    "CREATE INDEX IF NOT EXISTS documents_type ON documents (document_type_id)",
+    "CREATE INDEX IF NOT EXISTS documents_created ON documents (created)",
+    "CREATE TABLE IF NOT EXISTS document_tags ("
+    " document_id INTEGER NOT NULL, tag_id INTEGER NOT NULL,"
+    " PRIMARY KEY (tag_id, document_id))",
+    "CREATE INDEX IF NOT EXISTS document_tags_document ON document_tags (document_id)",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5("
+    " title, correspondent, document_type, tags, content,"
+    " content='documents', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    # Mantém o índice FTS sincronizado com a tabela de documentos
+    "CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN"
+    " INSERT INTO documents_fts (rowid, title, correspondent, document_type, tags, content)"
+    " VALUES (new.id, new.title, new.correspondent, new.document_type, new.tags, new.content);"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN"
+    " INSERT INTO documents_fts"
+    " (documents_fts, rowid, title, correspondent, document_type, tags, content)"
+    " VALUES ('delete', old.id, old.title, old.correspondent, old.document_type, old.tags,"
+    " old.content);"
+    " END",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_query(query: str) -> str:
+    """
+    Converts a plain keyword query into an FTS5 MATCH expression: every word
+    must match, in singular form and as a prefix, so "notas fiscais" also finds
+    "nota fiscal". Short words ("NF", "RG") must match exactly, since as a
+    prefix they would match almost anything.
+    """
+    terms = []
+    for word in _TOKEN_RE.findall(normalize_name(query)):
+        terms.append(f'"{word}"' if len(word) <= 2 else f'"{singular(word)}"*')
+    return " AND ".join(terms)
+
+
+class LocalSearchIndex:
+    """
+    SQLite-backed document index. Thread-safe; blocking calls should be run
+    with `asyncio.to_thread` from async code.
+
+    Args:
+        path: SQLite database file.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    # --- Sync state ---
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+            )
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        """`modified` timestamp of the newest indexed document (sync watermark)."""
+        return self.get_meta("last_modified")
+
+    @property
+    def synced_at(self) -> Optional[float]:
+        value = self.get_meta("synced_at")
+        return float(value) if value else None
+
+    def mark_synced(self, last_modified: Optional[str]) -> None:
+        if last_modified:
+            self.set_meta("last_modified", last_modified)
+        self.set_meta("synced_at", str(time.time()))
+
+    # --- Writes ---
+
+    def upsert(self, documents: Iterable[dict]) -> int:
+        """
+        Inserts or replaces documents. Each dict carries the Paperless fields plus
+        resolved names: correspondent_name, document_type_name, tag_names.
+        """
+        rows, tag_rows, ids = [], [], []
+        for doc in documents:
+            ids.append((doc["id"],))
+            rows.append(
+                (
+                    doc["id"],
+                    doc.get("title") or "",
+                    (doc.get("created") or "")[:10] or None,
+                    doc.get("modified"),
+                    doc.get("correspondent"),
+                    doc.get("correspondent_name"),
+                    doc.get("document_type"),
+                    doc.get("document_type_name"),
+                    "\n".join(doc.get("tag_names") or []),
+                    doc.get("content") or "",
+                )
+            )
+            tag_rows.extend((doc["id"], tag_id) for tag_id in doc.get("tags") or [])
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            # DELETE + INSERT dispara os triggers que atualizam o índice FTS
+            self._conn.executemany("DELETE FROM documents WHERE id = ?", ids)
+            self._conn.executemany("DELETE FROM document_tags WHERE document_id = ?", ids)
+            self._conn.executemany(
+                "INSERT INTO documents (id, title, created, modified, correspondent_id,"
+                " correspondent, document_type_id, document_type, tags, content)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO document_tags (document_id, tag_id) VALUES (?, ?)",
+                tag_rows,
+            )
+        return len(rows)
+
+    def delete_missing(self, existing_ids: set) -> int:
+        """Removes documents that no longer exist in Paperless."""
+        with self._lock:
+            local_ids = {row[0] for row in self._conn.execute("SELECT id FROM documents")}
+        missing = [(doc_id,) for doc_id in local_ids - set(existing_ids)]
+        if missing:
+            with self._lock, self._conn:
+                self._conn.executemany("DELETE FROM documents WHERE id = ?", missing)
+                self._conn.executemany("DELETE FROM document_tags WHERE document_id = ?", missing)
+        return len(missing)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    # --- Queries ---
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        tag_ids: list[int] = None,
+        correspondent_id: int = None,
+        document_type_id: int = None,
+        created_after: str = None,
+        created_before: str = None,
+        page: int = 1,
+        page_size: int = 10,
+        snippet_chars: int = 200,
+    ) -> dict:
+        """
+        Full-text and/or filtered search.
+
+        Returns:
+            dict: {"count", "results" (compact summaries), "has_next"}
+        """
+        joins, where, params = [], [], []
+        match = fts_query(query) if query else ""
+        if match:
+            joins.append("JOIN documents_fts ON documents_fts.rowid = d.id")
+            where.append("documents_fts MATCH ?")
+            params.append(match)
+        if correspondent_id:
+            where.append("d.correspondent_id = ?")
+            params.append(correspondent_id)
+        if document_type_id:
+            where.append("d.document_type_id = ?")
+            params.append(document_type_id)
+        if tag_ids:
+            # Mesma semântica do Paperless para tags__id__in: qualquer uma das tags
+            placeholders = ",".join("?" * len(tag_ids))
+            where.append(
+                f"d.id IN (SELECT document_id FROM document_tags WHERE tag_id IN ({placeholders}))"
+            )
+            params.extend(tag_ids)
+        if created_after:
+            where.append("d.created > ?")
+            params.append(created_after)
+        if created_before:
+            where.append("d.created < ?")
+            params.append(created_before)
+
+        base = "FROM documents d " + " ".join(joins)
+        if where:
+            base += " WHERE " + " AND ".join(where)
+        if match:
+            order = "ORDER BY bm25(documents_fts, 10.0, 5.0, 5.0, 3.0, 1.0)"
+            snippet = f"snippet(documents_fts, 4, '', '', '…', {max(1, snippet_chars // 8)})"
+        else:
+            order = "ORDER BY d.created DESC, d.id DESC"
+            snippet = f"substr(d.content, 1, {int(snippet_chars)})"
+
+        offset = (max(1, page) - 1) * page_size
+        with self._lock:
+            (total,) = self._conn.execute(f"SELECT COUNT(*) {base}", params).fetchone()
+            rows = self._conn.execute(
+                f"SELECT d.id, d.title, d.created, d.correspondent, d.document_type, d.tags,"
+                f" {snippet} {base} {order} LIMIT ? OFFSET ?",
+                [*params, page_size, offset],
+            ).fetchall()
+
+        results = []
+        for doc_id, title, created, correspondent, document_type, tags, text in rows:
+            summary = {
+                "id": doc_id,
+                "title": title,
+                "created": created,
+                "correspondent": correspondent,
+                "document_type": document_type,
+                "tags": tags.split("\n") if tags else [],
+            }
+            text = " ".join((text or "").split())
+            if text:
+                summary["snippet"] = text[:snippet_chars]
+            results.append(summary)
+        return {"count": total, "results": results, "has_next": offset + len(rows) < total}
+
+    def stats(self) -> dict:
+        return {
+            "documents": self.count(),
+            "last_modified": self.last_modified,
+            "synced_at": self.synced_at,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_index: Optional[LocalSearchIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_local_index() -> Optional[LocalSearchIndex]:
+    """Returns the process-wide index, or None when disabled by config."""
+    global _index
+    if not LOCAL_INDEX_ENABLED:
+        return None
+    with _index_lock:
+        if _index is None:
+            try:
+                _index = LocalSearchIndex(LOCAL_INDEX_PATH)
+            except (OSError, sqlite3.Error) as e:
+                logger.error(
+                    "✗ Could not open local search index at %s: %s", LOCAL_INDEX_PATH, e
+                )
+                return None
+    return _index
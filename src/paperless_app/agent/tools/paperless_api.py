@@ -1,32 +1,79 @@
 """
 API Tools for interacting with a Paperless-NGX instance.
 All tools are async for better performance and parallel execution.
+
+httpx and the vector index (numpy) are imported on first use, so importing
+this module stays cheap.
 """
-import os
+import asyncio
+import base64
+import json
 import logging
+import math
+import os
+import random
 import re
+import sqlite3
+import time
 import uuid
-import unicodedata
-import random
-import httpx
-from dotenv import load_dotenv
-from google.adk.tools import ToolContext
+import weakref
+from collections import deque
 from pathlib import Path
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Optional
+
+from google.adk.tools import ToolContext
 
-from paperless_app.config import TEMP_DATA_DIR, DELETE_AFTER_UPLOAD
+from paperless_app.agent.tools.checksum_index import ChecksumIndex
+from paperless_app.agent.tools.hashing import file_md5
+from paperless_app.agent.tools.http_client import StreamingFileReader, get_client
+from paperless_app.agent.tools.local_index import get_local_index
+from paperless_app.agent.tools.search_cache import (
+    SearchCache,
+    is_structured_query,
+    search_cache_key,
+)
+from paperless_app.agent.tools.task_tracker import TaskTracker, session_state_reporter
+from paperless_app.agent.tools.taxonomy_cache import TaxonomyCache
+from paperless_app.config import (
+    CHECKSUM_INDEX_MAX_ENTRIES,
+    CHECKSUM_INDEX_TTL,
+    DELETE_AFTER_UPLOAD,
+    DUPLICATE_CHECK_ENABLED,
+    LOCAL_INDEX_MAX_STALENESS,
+    LOCAL_INDEX_SYNC_INTERVAL,
+    PAPERLESS_API_TOKEN,
+    PAPERLESS_LIST_CONCURRENCY,
+    PAPERLESS_PAGE_SIZE,
+    PAPERLESS_URL,
+    SEARCH_CACHE_MAX_ENTRIES,
+    SEARCH_CACHE_STALE_TTL,
+    SEARCH_CACHE_TTL,
+    SEARCH_FIELDS,
+    SEARCH_MAX_PAGE_SIZE,
+    SEARCH_PAGE_SIZE,
+    SEARCH_SNIPPET_CHARS,
+    TAXONOMY_CACHE_TTL,
+    TEMP_DATA_DIR,
+    VECTOR_INDEX_ENABLED,
+    VECTOR_TOP_K,
+)
+
+if TYPE_CHECKING:
+    import httpx
 
-# Load environment variables from .env file
-load_dotenv()
+logger = logging.getLogger(__name__)
 
-PAPERLESS_URL = os.getenv("PAPERLESS_URL")
-PAPERLESS_API_TOKEN = os.getenv("PAPERLESS_API_TOKEN")
+def get_vector_index() -> Optional[tuple]:
+    """
+    `vector_index.get_vector_index()`, without importing the vector index
+    (and numpy) when semantic search is disabled.
+    """
+    if not VECTOR_INDEX_ENABLED:
+        return None
+    from paperless_app.agent.tools import vector_index
 
-if not PAPERLESS_URL or not PAPERLESS_API_TOKEN:
-    raise ValueError(
-        "PAPERLESS_URL and PAPERLESS_API_TOKEN must be set in the .env file."
-    )
+    return vector_index.get_vector_index()
 
-logger = logging.getLogger(__name__)
 
 def _get_auth_headers():
     """Returns the authorization headers for Paperless API requests."""
@@ -48,14 +95,8 @@ async def post_document(tool_context: ToolContext, filename: str, correspondent_
         created_date: Data de criação (se None, busca do state)
 
     Returns:
-        dict: {"status": "success/error", "message": "..."}
+        dict: {"status": "success/duplicate/error", "message": "..."}
     """
-    endpoint = f"{PAPERLESS_URL}/api/documents/post_document/"
-
-    # Usa o nome do arquivo (sem extensão) como título
-    title = Path(filename).stem
-    logger.info("Using filename as title: '%s'", title)
-
     # Fetch missing metadata from state if not provided as arguments
     if correspondent_id is None:
         correspondent_id = tool_context.state.get("correspondent_id")
@@ -78,6 +119,62 @@ async def post_document(tool_context: ToolContext, filename: str, correspondent_
         if created_date:
             logger.info("Fetched created_date from state: %s", created_date)
 
+    result = await upload_document(
+        filename,
+        correspondent_id=correspondent_id,
+        document_type_id=document_type_id,
+        tag_ids=tag_ids,
+        created_date=created_date,
+    )
+    if result["status"] in ("success", "duplicate"):
+        tool_context.state["upload_result"] = result
+    if result.get("task_id"):
+        tool_context.state["upload_task"] = {"task_id": result["task_id"], "status": "pending"}
+        invocation_context = getattr(tool_context, "_invocation_context", None)
+        report_task_to_session(result["task_id"], invocation_context)
+    return result
+
+
+def report_task_to_session(task_id: str, invocation_context) -> None:
+    """
+    Writes the consumption result of `task_id` into the session state key
+    `upload_task` once Paperless finishes processing the document.
+    """
+    if invocation_context is None or getattr(invocation_context, "session_service", None) is None:
+        return
+    task_tracker.track(task_id, on_done=session_state_reporter(invocation_context))
+
+
+async def upload_document(
+    filename: str,
+    correspondent_id: int = None,
+    document_type_id: int = None,
+    tag_ids: list[int] = None,
+    created_date: str = None,
+) -> dict:
+    """
+    Uploads a file from temp-data to Paperless-NGX with the given metadata.
+    Does not read or write session state (see `post_document` for the tool).
+
+    Args:
+        filename: Nome do arquivo na pasta temp-data.
+        correspondent_id: ID do correspondente.
+        document_type_id: ID do tipo de documento.
+        tag_ids: Lista de IDs de tags.
+        created_date: Data de criação (YYYY-MM-DD).
+
+    Returns:
+        dict: {"status": "success/duplicate/error", "message": "..."}. On success
+        it also carries the Paperless `task_id`, which is tracked by `task_tracker`.
+    """
+    import httpx
+
+    endpoint = f"{PAPERLESS_URL}/api/documents/post_document/"
+
+    # Usa o nome do arquivo (sem extensão) como título
+    title = Path(filename).stem
+    logger.info("Using filename as title: '%s'", title)
+
     data = {
         "title": title,
     }
@@ -96,6 +193,8 @@ async def post_document(tool_context: ToolContext, filename: str, correspondent_
         else:
             logger.warning("Ignoring invalid created_date for upload: %r", created_date)
 
+    checksum = None
+    reserved = uploaded = False
     try:
         file_path = TEMP_DATA_DIR / filename
         if not file_path.exists():
@@ -103,41 +202,69 @@ async def post_document(tool_context: ToolContext, filename: str, correspondent_
             logger.error(error_msg)
             return {"status": "error", "message": error_msg}
 
-        with open(file_path, "rb") as f:
-            file_content = f.read()
+        checksum = await asyncio.to_thread(file_md5, file_path)
+        if DUPLICATE_CHECK_ENABLED:
+            duplicate = await _checksum_index.find(checksum)
+            # Reserva o checksum antes do POST: outra cópia do mesmo arquivo no
+            # mesmo lote passa a ser tratada como duplicata em vez de ser enviada
+            if duplicate is None and not _checksum_index.reserve(checksum):
+                duplicate = await _checksum_index.find(checksum)
+            if duplicate:
+                discard_temp_file(filename)
+                return duplicate_result(duplicate)
+            reserved = True
 
         logger.info("✓ Starting upload - file: %s, title: %s", filename, title)
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            # Generate a unique filename for the upload to avoid conflicts
-            original_extension = Path(filename).suffix
-            unique_upload_filename = f"{uuid.uuid4()}{original_extension}"
-            logger.info(f"Uploading temp file '{filename}' as '{unique_upload_filename}'")
+        client = get_client()
+        # Generate a unique filename for the upload to avoid conflicts
+        original_extension = Path(filename).suffix
+        unique_upload_filename = f"{uuid.uuid4()}{original_extension}"
+        logger.info(f"Uploading temp file '{filename}' as '{unique_upload_filename}'")
 
+        # O arquivo é enviado em blocos direto do disco, sem carregá-lo inteiro na memória
+        with StreamingFileReader(file_path) as reader:
             files = {
-                "document": (unique_upload_filename, file_content)
+                "document": (unique_upload_filename, reader, "application/octet-stream")
             }
-
             response = await client.post(
                 endpoint,
                 headers=_get_auth_headers(),
                 data=data,
                 files=files,
+                timeout=60.0,
             )
-            response.raise_for_status()
-
-            if DELETE_AFTER_UPLOAD:
-                try:
-                    os.remove(file_path)
-                    logger.info("✓ File '%s' deleted from temp-data.", filename)
-                except OSError as e:
-                    logger.error("✗ Error deleting file '%s': %s", filename, e)
-
-            result = {"status": "success", "message": "✓ Document uploaded successfully."}
-            tool_context.state["upload_result"] = result
-            logger.info("✓ Document uploaded successfully from file: %s", filename)
-            logger.info("✓ Paperless-NGX response: %s", response.status_code)
-            return result
+            throughput = reader.throughput()
+        response.raise_for_status()
+        uploaded = True
+        _checksum_index.add(checksum)
+        _search_cache.invalidate()
+
+        discard_temp_file(filename)
+
+        result = {
+            "status": "success",
+            "message": "✓ Document uploaded successfully.",
+            "upload": throughput,
+        }
+        # O Paperless só enfileira o arquivo; o documento é criado depois pela task
+        task_id = _parse_task_id(response)
+        if task_id:
+            result["task_id"] = task_id
+            task_tracker.track(
+                task_id,
+                on_done=lambda task: _on_task_done(checksum, task),
+                meta={"filename": filename, "title": title},
+            )
+        logger.info(
+            "✓ Document uploaded successfully from file: %s (%s bytes in %ss, %s MB/s)",
+            filename,
+            throughput["bytes"],
+            throughput["seconds"],
+            throughput["mb_per_second"],
+        )
+        logger.info("✓ Paperless-NGX response: %s", response.status_code)
+        return result
     except httpx.HTTPStatusError as e:
         error_msg = f"✗ HTTP error uploading document: {e.response.status_code} - {e.response.text}"
         logger.error(error_msg)
@@ -150,42 +277,734 @@ async def post_document(tool_context: ToolContext, filename: str, correspondent_
         error_msg = f"✗ Unexpected error uploading document: {str(e)}"
         logger.error(error_msg, exc_info=True)
         return {"status": "error", "message": error_msg}
+    finally:
+        if reserved and not uploaded:
+            # Upload falhou: libera a reserva para que uma nova tentativa seja enviada
+            _checksum_index.discard(checksum)
+
+
+def _parse_task_id(response: "httpx.Response") -> Optional[str]:
+    """Extracts the consumption task UUID returned by `post_document/`."""
+    try:
+        body = response.json()
+    except ValueError:
+        body = response.text.strip().strip('"')
+    if isinstance(body, dict):
+        body = body.get("task_id")
+    return str(body) if body else None
+
+
+def _on_task_done(checksum: str, task: dict) -> None:
+    """Keeps the checksum index in sync with the outcome of a consumption task."""
+    if task["status"] == "success" and task.get("document_id"):
+        _checksum_index.add(checksum, task["document_id"])
+        # O documento só aparece na busca depois de consumido pelo Paperless
+        _search_cache.invalidate()
+        schedule_local_index_sync(force=True)
+        schedule_document_embedding(task["document_id"])
+    elif task["status"] == "failure":
+        _checksum_index.discard(checksum)
+
+
+# None até a primeira consulta em lote; False se o servidor ignora o filtro task_id__in
+_task_id_in_supported: Optional[bool] = None
+
+
+async def _get_tasks(params: dict) -> list[dict]:
+    client = get_client()
+    response = await client.get(
+        f"{PAPERLESS_URL}/api/tasks/", headers=_get_auth_headers(), params=params
+    )
+    response.raise_for_status()
+    body = response.json()
+    # Versões antigas retornam uma lista simples; as novas, uma página
+    return body.get("results", []) if isinstance(body, dict) else body
+
+
+async def _fetch_tasks(task_ids: list[str]) -> list[dict]:
+    """
+    Fetches the state of several consumption tasks, in one `task_id__in`
+    request when the server honours that filter. A server that ignores it
+    answers with its whole task list; from then on each task is queried with
+    `task_id=` instead (up to PAPERLESS_LIST_CONCURRENCY at a time).
+    """
+    global _task_id_in_supported
+    wanted = set(task_ids)
+    if len(task_ids) > 1 and _task_id_in_supported is not False:
+        tasks = await _get_tasks({"task_id__in": ",".join(task_ids)})
+        if all(task.get("task_id") in wanted for task in tasks):
+            _task_id_in_supported = True
+            return tasks
+        logger.warning("Paperless ignores the task_id__in filter; polling tasks one by one.")
+        _task_id_in_supported = False
+
+    semaphore = asyncio.Semaphore(PAPERLESS_LIST_CONCURRENCY)
+
+    async def fetch_one(task_id: str) -> list[dict]:
+        async with semaphore:
+            return await _get_tasks({"task_id": task_id})
+
+    results = await asyncio.gather(*(fetch_one(task_id) for task_id in task_ids))
+    return [task for tasks in results for task in tasks if task.get("task_id") in wanted]
+
+
+task_tracker = TaskTracker(_fetch_tasks)
+
+
+def discard_temp_file(filename: str) -> None:
+    """Deletes a processed file from temp-data when DELETE_AFTER_UPLOAD is enabled."""
+    if not DELETE_AFTER_UPLOAD:
+        return
+    try:
+        os.remove(TEMP_DATA_DIR / filename)
+        logger.info("✓ File '%s' deleted from temp-data.", filename)
+    except OSError as e:
+        logger.error("✗ Error deleting file '%s': %s", filename, e)
+
+
+def duplicate_result(duplicate: dict) -> dict:
+    document_id = duplicate.get("document_id")
+    if document_id is None:
+        message = "✓ Document was already uploaded and is still being processed by Paperless."
+    else:
+        message = f"✓ Document already exists in Paperless-NGX (ID {document_id})."
+    logger.info(message)
+    return {"status": "duplicate", "document_id": document_id, "message": message}
+
+
+async def _lookup_checksum(checksum: str) -> Optional[int]:
+    """Asks Paperless for a document with the given MD5 checksum."""
+    endpoint = f"{PAPERLESS_URL}/api/documents/"
+    params = {"checksum__iexact": checksum, "fields": "id", "page_size": 1}
+    client = get_client()
+    response = await client.get(endpoint, headers=_get_auth_headers(), params=params)
+    response.raise_for_status()
+    results = response.json().get("results", [])
+    return results[0]["id"] if results else None
+
+
+_checksum_index = ChecksumIndex(_lookup_checksum, CHECKSUM_INDEX_TTL, CHECKSUM_INDEX_MAX_ENTRIES)
+
+
+async def find_duplicate_file(file_path: Path) -> Optional[dict]:
+    """
+    Checks whether a file is already stored in Paperless-NGX by its MD5.
+
+    Returns:
+        dict: {"checksum", "document_id"} for a duplicate, otherwise None.
+    """
+    if not DUPLICATE_CHECK_ENABLED:
+        return None
+    return await _checksum_index.find_file(file_path)
 
 
-async def search_documents(tool_context: ToolContext, query: str, tag_ids: list[int] = None, correspondent_id: int = None, document_type_id: int = None) -> list[dict]:
+async def search_documents(tool_context: ToolContext, query: str = None, tag_ids: list[int] = None, correspondent_id: int = None, document_type_id: int = None, created_after: str = None, created_before: str = None, page_size: int = None, cursor: str = None) -> dict:
     """
     Searches for documents within the Paperless-NGX system.
     Uses a powerful query language. The user can just say 'receipts from last month'
     and the 'query' parameter should contain that string.
 
+    Results are compact summaries (title, correspondent, type, tags, date and a short
+    snippet). To get more results for the same search, call again passing only the
+    `cursor` returned as `next_cursor`.
+
     Args:
-        query (str): The main search string. Can be a simple keyword or a complex query like 'correspondent:amazon and added:last-month'.
+        query (str, optional): The main search string. Can be a simple keyword or a complex query like 'correspondent:amazon and added:last-month'. May be omitted when filtering only.
         tag_ids (list[int], optional): A list of numeric Tag IDs to filter the search by.
         correspondent_id (int, optional): The numeric ID of a correspondent to filter by.
         document_type_id (int, optional): The numeric ID of a document type to filter by.
+        created_after (str, optional): Only documents created after this date (YYYY-MM-DD).
+        created_before (str, optional): Only documents created before this date (YYYY-MM-DD).
+        page_size (int, optional): Number of results per page (default SEARCH_PAGE_SIZE).
+        cursor (str, optional): `next_cursor` from a previous call, to fetch the next page.
+
+    Returns:
+        dict: {"status": "success", "count": total, "page": n, "results": [...],
+        "next_cursor": "..." or None, "source": "local" or "paperless"}
+    """
+    if cursor:
+        try:
+            search = _decode_cursor(cursor)
+        except ValueError:
+            return {"status": "error", "message": "✗ Invalid search cursor."}
+    else:
+        filters = (tag_ids, correspondent_id, document_type_id, created_after, created_before)
+        if not query and not any(filters):
+            return {"status": "error", "message": "✗ A query, a filter or a cursor is required."}
+        search = {
+            "query": query or None,
+            "tag_ids": sorted(tag_ids) if tag_ids else None,
+            "correspondent_id": correspondent_id,
+            "document_type_id": document_type_id,
+            "created_after": _valid_date(created_after),
+            "created_before": _valid_date(created_before),
+            "page": 1,
+            "page_size": max(1, min(page_size or SEARCH_PAGE_SIZE, SEARCH_MAX_PAGE_SIZE)),
+        }
+
+    page = await _search_local_index(search)
+    source = "local"
+    if page is None:
+        import httpx
+
+        source = "paperless"
+        try:
+            page = await _search_remote(search)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                # Página além do fim dos resultados
+                page = {"count": 0, "results": [], "has_next": False}
+            else:
+                error_msg = (
+                    f"✗ HTTP error searching documents: {e.response.status_code} - {e.response.text}"
+                )
+                logger.error(error_msg)
+                return {"status": "error", "message": error_msg}
+        except httpx.RequestError as e:
+            error_msg = f"✗ Request error searching documents: {str(e)}"
+            logger.error(error_msg)
+            return {"status": "error", "message": error_msg}
+
+    next_cursor = None
+    if page["has_next"]:
+        next_cursor = _encode_cursor({**search, "page": search["page"] + 1})
+    logger.info("Found %s documents (page %s)", page["count"], search["page"])
+
+    # O state guarda só um resumo da última busca, não os resultados completos
+    tool_context.state["last_search"] = {
+        "query": search["query"],
+        "count": page["count"],
+        "page": search["page"],
+        "document_ids": [doc["id"] for doc in page["results"]],
+        "next_cursor": next_cursor,
+    }
+    return {
+        "status": "success",
+        "count": page["count"],
+        "page": search["page"],
+        "results": page["results"],
+        "next_cursor": next_cursor,
+        "source": source,
+    }
+
+
+def _valid_date(value: Optional[str]) -> Optional[str]:
+    """Returns the YYYY-MM-DD prefix of a date string, or None if it is not a date."""
+    if isinstance(value, str) and re.match(r"^\d{4}-\d{2}-\d{2}", value):
+        return value[:10]
+    if value:
+        logger.warning("Ignoring invalid date filter: %r", value)
+    return None
+
+
+async def _search_remote(search: dict) -> dict:
+    """Runs the search against Paperless-NGX, through the search cache."""
+    params = {
+        "page": search["page"],
+        "page_size": search["page_size"],
+        # Só os campos exibidos ao usuário; o conteúdo vem truncado pelo servidor
+        "fields": SEARCH_FIELDS,
+        "truncate_content": "true",
+    }
+    if search["query"]:
+        params["query"] = search["query"]
+    else:
+        params["ordering"] = "-created"
+    if search["tag_ids"]:
+        params["tags__id__in"] = ",".join(map(str, search["tag_ids"]))
+    if search["correspondent_id"]:
+        params["correspondent__id"] = search["correspondent_id"]
+    if search["document_type_id"]:
+        params["document_type__id"] = search["document_type_id"]
+    if search.get("created_after"):
+        params["created__date__gt"] = search["created_after"]
+    if search.get("created_before"):
+        params["created__date__lt"] = search["created_before"]
+
+    # Buscas quase idênticas compartilham a mesma entrada do cache
+    key = search_cache_key(
+        search["query"],
+        tag_ids=search["tag_ids"],
+        correspondent_id=search["correspondent_id"],
+        document_type_id=search["document_type_id"],
+        created_after=search.get("created_after"),
+        created_before=search.get("created_before"),
+        page=search["page"],
+        page_size=search["page_size"],
+    )
+    return await _search_cache.get_or_fetch(key, lambda: _fetch_search(params))
+
+
+async def _search_local_index(search: dict) -> Optional[dict]:
+    """
+    Answers the search from the local index when it is enabled and recently
+    synced. Returns None if the search must go to Paperless instead.
+    """
+    index = get_local_index()
+    if index is None:
+        return None
+    schedule_local_index_sync()
+    synced_at = index.synced_at
+    if synced_at is None or time.time() - synced_at > LOCAL_INDEX_MAX_STALENESS:
+        return None
+    # A sintaxe de consulta do Paperless (campos, operadores) só o servidor entende
+    if is_structured_query(search["query"]):
+        return None
+    try:
+        return await asyncio.to_thread(
+            index.search,
+            search["query"],
+            tag_ids=search["tag_ids"],
+            correspondent_id=search["correspondent_id"],
+            document_type_id=search["document_type_id"],
+            created_after=search.get("created_after"),
+            created_before=search.get("created_before"),
+            page=search["page"],
+            page_size=search["page_size"],
+            snippet_chars=SEARCH_SNIPPET_CHARS,
+        )
+    except sqlite3.Error as e:
+        logger.warning("Local index search failed, falling back to Paperless: %s", e)
+        return None
+
+
+_INDEX_FIELDS = "id,title,correspondent,document_type,tags,created,modified,content"
+_INDEX_BATCH_SIZE = 200
+# Sincronizações em segundo plano em andamento, por índice ("fulltext", "vectors")
+_index_sync_tasks: dict[str, asyncio.Task] = {}
+
+
+async def sync_local_index(full: bool = False) -> dict:
+    """
+    Brings the local search index up to date with Paperless-NGX.
+
+    Pulls only documents modified since the last sync (`modified__gt`), unless
+    `full` is set. Deleted documents are reconciled against the remote IDs on
+    every sync.
 
     Returns:
-        list[dict]: A list of document objects matching the search criteria.
+        dict: {"status", "updated", "deleted", "documents"}
+    """
+    index = get_local_index()
+    if index is None:
+        return {"status": "error", "message": "✗ Local search index is disabled."}
+
+    since = None if full else index.last_modified
+    params = {"fields": _INDEX_FIELDS, "ordering": "modified"}
+    if since:
+        params["modified__gt"] = since
+    logger.info("Syncing local search index (since=%s)", since or "beginning")
+
+    newest, batch, updated = since, [], 0
+    async for doc in _iter_paginated("documents", params):
+        doc["correspondent_name"] = await _entity_name(
+            _correspondent_cache, doc.get("correspondent")
+        )
+        doc["document_type_name"] = await _entity_name(
+            _document_type_cache, doc.get("document_type")
+        )
+        tag_names = [await _entity_name(_tag_cache, tag_id) for tag_id in doc.get("tags") or []]
+        doc["tag_names"] = [name for name in tag_names if name]
+        batch.append(doc)
+        if doc.get("modified") and (newest is None or doc["modified"] > newest):
+            newest = doc["modified"]
+        if len(batch) >= _INDEX_BATCH_SIZE:
+            updated += await asyncio.to_thread(index.upsert, batch)
+            batch = []
+    if batch:
+        updated += await asyncio.to_thread(index.upsert, batch)
+
+    # Documentos apagados não aparecem em modified__gt; reconcilia sempre pelos IDs
+    # (a contagem não basta: um upload e uma exclusão entre duas syncs se anulam)
+    deleted = await _delete_missing_documents(index)
+
+    await asyncio.to_thread(index.mark_synced, newest)
+    documents = await asyncio.to_thread(index.count)
+    logger.info(
+        "✓ Local search index synced: %s updated, %s deleted, %s documents.",
+        updated,
+        deleted,
+        documents,
+    )
+    return {"status": "success", "updated": updated, "deleted": deleted, "documents": documents}
+
+
+async def _delete_missing_documents(index) -> int:
+    """
+    Removes from `index` the documents that no longer exist in Paperless-NGX.
+    Only IDs are listed, so this is cheap even for large archives.
+    """
+    remote_ids = {doc["id"] async for doc in _iter_paginated("documents", {"fields": "id"})}
+    return await asyncio.to_thread(index.delete_missing, remote_ids)
+
+
+def _schedule_index_sync(name: str, index, sync: Callable, force: bool) -> None:
+    """Starts `sync()` in the background if `index` is older than LOCAL_INDEX_SYNC_INTERVAL."""
+    if index is None:
+        return
+    running = _index_sync_tasks.get(name)
+    if running is not None and not running.done():
+        return
+    synced_at = index.synced_at
+    if not force and synced_at is not None and time.time() - synced_at < LOCAL_INDEX_SYNC_INTERVAL:
+        return
+
+    async def run():
+        try:
+            await sync()
+        except Exception as e:
+            logger.warning("Background sync of the %s index failed: %s", name, e)
+
+    _index_sync_tasks[name] = asyncio.get_running_loop().create_task(run())
+
+
+def schedule_local_index_sync(force: bool = False) -> None:
+    """Starts a background sync of the full-text index if it is due."""
+    _schedule_index_sync("fulltext", get_local_index(), sync_local_index, force)
+
+
+async def semantic_search_documents(tool_context: ToolContext, question: str, top_k: int = None) -> dict:
     """
+    Finds documents whose content is semantically close to a natural-language
+    question (e.g. 'quanto paguei de condomínio no ano passado?'), even when they
+    do not contain the same words. Use `search_documents` for keywords and filters.
+
+    Args:
+        question (str): The user's question or description of the document.
+        top_k (int, optional): Maximum number of documents (default VECTOR_TOP_K).
+
+    Returns:
+        dict: {"status": "success", "count": n, "results": [...], "source": "semantic"}
+        Each result has the document summary, a relevance `score` and the best
+        matching `snippet`.
+    """
+    pair = get_vector_index()
+    if pair is None:
+        return {"status": "error", "message": "✗ Semantic search is disabled."}
+    import httpx
+
+    from paperless_app.agent.tools.vector_index import search_vectors
+
+    schedule_vector_index_sync()
+    top_k = max(1, min(top_k or VECTOR_TOP_K, SEARCH_MAX_PAGE_SIZE))
+
+    try:
+        hits = await asyncio.to_thread(search_vectors, question, top_k)
+        documents = await _fetch_documents([hit["document_id"] for hit in hits], SEARCH_FIELDS)
+    except httpx.HTTPStatusError as e:
+        error_msg = (
+            f"✗ HTTP error fetching documents: {e.response.status_code} - {e.response.text}"
+        )
+        logger.error(error_msg)
+        return {"status": "error", "message": error_msg}
+    except Exception as e:
+        error_msg = f"✗ Semantic search failed: {str(e)}"
+        logger.error(error_msg)
+        return {"status": "error", "message": error_msg}
+
+    by_id = {doc["id"]: doc for doc in documents}
+    results = []
+    for hit in hits:
+        doc = by_id.get(hit["document_id"])
+        if doc is None:
+            # Apagado no Paperless desde a última sincronização
+            continue
+        summary = await _summarize_document(doc)
+        summary["score"] = hit["score"]
+        if hit["chunk"]:
+            summary["snippet"] = hit["chunk"][:SEARCH_SNIPPET_CHARS]
+        results.append(summary)
+    logger.info("Semantic search found %s documents", len(results))
+
+    tool_context.state["last_search"] = {
+        "query": question,
+        "count": len(results),
+        "page": 1,
+        "document_ids": [doc["id"] for doc in results],
+        "next_cursor": None,
+    }
+    return {"status": "success", "count": len(results), "results": results, "source": "semantic"}
+
+
+async def _fetch_documents(
+    document_ids: list[int], fields: str, truncate_content: bool = True
+) -> list[dict]:
+    """Fetches several documents by ID in one request."""
+    if not document_ids:
+        return []
     endpoint = f"{PAPERLESS_URL}/api/documents/"
     params = {
-        "query": query
+        "id__in": ",".join(map(str, document_ids)),
+        "fields": fields,
+        "page_size": len(document_ids),
     }
-    if tag_ids:
-        params["tags__id__in"] = ",".join(map(str, tag_ids))
-    if correspondent_id:
-        params["correspondent__id"] = correspondent_id
-    if document_type_id:
-        params["document_type__id"] = document_type_id
+    if truncate_content:
+        params["truncate_content"] = "true"
+    client = get_client()
+    response = await client.get(endpoint, headers=_get_auth_headers(), params=params)
+    response.raise_for_status()
+    return response.json().get("results", [])
+
+
+_VECTOR_FIELDS = "id,content,modified"
+# Espera antes de embutir documentos recém-consumidos, para juntá-los num só lote
+_EMBED_DEBOUNCE_SECONDS = 2.0
+_pending_embeddings: set = set()
+_embedding_task: Optional[asyncio.Task] = None
+
+
+async def sync_vector_index(full: bool = False) -> dict:
+    """
+    Embeds documents modified since the last sync into the semantic index
+    (everything, from scratch, with `full`). Unchanged content is not embedded
+    again, and deleted documents are reconciled like in `sync_local_index`.
+
+    Returns:
+        dict: {"status", "chunks", "deleted", "documents"}
+    """
+    pair = get_vector_index()
+    if pair is None:
+        return {"status": "error", "message": "✗ Semantic search index is disabled."}
+    from paperless_app.agent.tools.vector_index import index_documents
+
+    index, _ = pair
+    if full:
+        await asyncio.to_thread(index.reset)
+
+    since = index.last_modified
+    params = {"fields": _VECTOR_FIELDS, "ordering": "modified"}
+    if since:
+        params["modified__gt"] = since
+    logger.info("Syncing semantic search index (since=%s)", since or "beginning")
+
+    newest, batch, chunks = since, [], 0
+    async for doc in _iter_paginated("documents", params):
+        batch.append(doc)
+        if doc.get("modified") and (newest is None or doc["modified"] > newest):
+            newest = doc["modified"]
+        if len(batch) >= _INDEX_BATCH_SIZE:
+            chunks += await asyncio.to_thread(index_documents, batch)
+            batch = []
+    if batch:
+        chunks += await asyncio.to_thread(index_documents, batch)
+
+    deleted = await _delete_missing_documents(index)
+
+    await asyncio.to_thread(index.mark_synced, newest)
+    documents = await asyncio.to_thread(index.count)
+    logger.info(
+        "✓ Semantic search index synced: %s chunks embedded, %s deleted, %s documents.",
+        chunks,
+        deleted,
+        documents,
+    )
+    return {"status": "success", "chunks": chunks, "deleted": deleted, "documents": documents}
+
+
+def schedule_vector_index_sync(force: bool = False) -> None:
+    """Starts a background sync of the semantic index if it is due."""
+    pair = get_vector_index()
+    _schedule_index_sync("vectors", pair and pair[0], sync_vector_index, force)
+
+
+def schedule_document_embedding(document_id: int) -> None:
+    """
+    Queues a newly consumed document for embedding. Documents queued close
+    together are fetched and embedded as one batch.
+    """
+    global _embedding_task
+    if get_vector_index() is None:
+        return
+    _pending_embeddings.add(document_id)
+    if _embedding_task is None or _embedding_task.done():
+        _embedding_task = asyncio.get_running_loop().create_task(_embed_pending())
+
+
+async def _embed_pending() -> None:
+    from paperless_app.agent.tools.vector_index import index_documents
+
+    await asyncio.sleep(_EMBED_DEBOUNCE_SECONDS)
+    while _pending_embeddings:
+        document_ids = sorted(_pending_embeddings)[:_INDEX_BATCH_SIZE]
+        _pending_embeddings.difference_update(document_ids)
+        try:
+            # Sem truncate_content: o índice precisa do texto completo
+            documents = await _fetch_documents(
+                document_ids, _VECTOR_FIELDS, truncate_content=False
+            )
+            chunks = await asyncio.to_thread(index_documents, documents)
+            logger.info("✓ Embedded %s documents (%s chunks).", len(documents), chunks)
+        except Exception as e:
+            logger.warning("Could not embed documents %s: %s", document_ids, e)
+
+
+async def flush_pending_embeddings() -> None:
+    """Waits until every queued document has been embedded."""
+    if _embedding_task is not None and not _embedding_task.done():
+        await _embedding_task
+
+
+def _encode_cursor(search: dict) -> str:
+    payload = json.dumps(search, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        search = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError("invalid cursor") from e
+    required = {"query", "tag_ids", "correspondent_id", "document_type_id", "page", "page_size"}
+    if not isinstance(search, dict) or not required <= search.keys():
+        raise ValueError("invalid cursor")
+    return search
+
+
+async def _fetch_search(params: dict) -> dict:
+    """Runs a live full-text search against Paperless-NGX and summarizes the page."""
+    endpoint = f"{PAPERLESS_URL}/api/documents/"
+    logger.info("Searching documents with query: %s", params.get("query"))
+    client = get_client()
+    response = await client.get(endpoint, headers=_get_auth_headers(), params=params)
+    response.raise_for_status()
+    body = response.json()
+    results = [await _summarize_document(doc) for doc in body.get("results", [])]
+    return {
+        "count": body.get("count", len(results)),
+        "results": results,
+        "has_next": bool(body.get("next")),
+    }
+
+
+async def _entity_name(cache: TaxonomyCache, entity_id: Optional[int]) -> Optional[str]:
+    if entity_id is None:
+        return None
+    try:
+        entity = await cache.get_by_id(entity_id)
+    except Exception as e:
+        logger.debug("Could not resolve %s %s: %s", cache.kind, entity_id, e)
+        return None
+    return entity["name"] if entity else None
+
+
+async def _summarize_document(doc: dict) -> dict:
+    """Compact view of a document: names instead of IDs and a short content snippet."""
+    tags = [await _entity_name(_tag_cache, tag_id) for tag_id in doc.get("tags") or []]
+    summary = {
+        "id": doc.get("id"),
+        "title": doc.get("title"),
+        "created": (doc.get("created") or "")[:10] or None,
+        "correspondent": await _entity_name(_correspondent_cache, doc.get("correspondent")),
+        "document_type": await _entity_name(_document_type_cache, doc.get("document_type")),
+        "tags": [name for name in tags if name],
+    }
+    hit = doc.get("__search_hit__") or {}
+    snippet = hit.get("highlights") or doc.get("content") or ""
+    snippet = _WHITESPACE_RE.sub(" ", _HTML_TAG_RE.sub("", snippet)).strip()
+    if snippet:
+        summary["snippet"] = snippet[:SEARCH_SNIPPET_CHARS]
+    return summary
+
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_HTML_TAG_RE = re.compile(r"<[^>]+>")
+_search_cache = SearchCache(SEARCH_CACHE_TTL, SEARCH_CACHE_STALE_TTL, SEARCH_CACHE_MAX_ENTRIES)
 
-    logger.info("Searching documents with query: %s", query)
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.get(endpoint, headers=_get_auth_headers(), params=params)
+
+async def _iter_paginated(resource: str, params: dict = None) -> AsyncIterator[dict]:
+    """
+    Streams every object of a Paperless list endpoint, following all pages.
+
+    The first page tells us the total count; the remaining pages are then
+    prefetched concurrently (up to PAPERLESS_LIST_CONCURRENCY at a time) and
+    yielded in order. Callers may stop early; pending requests are cancelled.
+
+    Args:
+        resource: API resource name, e.g. "tags".
+        params: Extra query parameters (filters) for the endpoint.
+    """
+    endpoint = f"{PAPERLESS_URL}/api/{resource}/"
+    base_params = {"page_size": PAPERLESS_PAGE_SIZE, **(params or {})}
+    client = get_client()
+
+    async def fetch_page(page: int) -> dict:
+        response = await client.get(
+            endpoint, headers=_get_auth_headers(), params={**base_params, "page": page}
+        )
+        if page > 1 and response.status_code == 404:
+            # A lista encolheu durante a leitura; a página não existe mais
+            return {"results": []}
         response.raise_for_status()
-        results = response.json().get("results", [])
-        logger.info("Found %s documents", len(results))
-        tool_context.state["search_results"] = results
-        return results
+        return response.json()
+
+    first = await fetch_page(1)
+    first_results = first.get("results", [])
+    for item in first_results:
+        yield item
+
+    next_url = first.get("next")
+    if not next_url:
+        return
+
+    count = first.get("count")
+    if count is None or not first_results:
+        # Sem contagem total: segue os links `next` sequencialmente
+        while next_url:
+            response = await client.get(next_url, headers=_get_auth_headers())
+            response.raise_for_status()
+            data = response.json()
+            for item in data.get("results", []):
+                yield item
+            next_url = data.get("next")
+        return
+
+    # O servidor pode limitar page_size; usa o tamanho real da primeira página
+    total_pages = math.ceil(count / len(first_results))
+    pending = deque()
+    next_page = 2
+    try:
+        while next_page <= total_pages or pending:
+            while next_page <= total_pages and len(pending) < PAPERLESS_LIST_CONCURRENCY:
+                pending.append(asyncio.ensure_future(fetch_page(next_page)))
+                next_page += 1
+            data = await pending.popleft()
+            for item in data.get("results", []):
+                yield item
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def _find_first(
+    items: AsyncIterator[dict], predicate: Callable[[dict], bool]
+) -> Optional[dict]:
+    """
+    Returns the first streamed item matching `predicate`, closing the stream
+    right away so no further pages are fetched.
+    """
+    try:
+        async for item in items:
+            if predicate(item):
+                return item
+        return None
+    finally:
+        await items.aclose()
+
+
+def iter_correspondents(**filters) -> AsyncIterator[dict]:
+    """Streams all correspondents, page by page."""
+    return _iter_paginated("correspondents", filters)
+
+
+def iter_tags(**filters) -> AsyncIterator[dict]:
+    """Streams all tags, page by page."""
+    return _iter_paginated("tags", filters)
+
+
+def iter_document_types(**filters) -> AsyncIterator[dict]:
+    """Streams all document types, page by page."""
+    return _iter_paginated("document_types", filters)
 
 
 async def list_correspondents() -> list[dict]:
@@ -193,11 +1012,7 @@ async def list_correspondents() -> list[dict]:
     Retrieves a list of all existing correspondents to get their names and IDs.
     Call this before creating a new correspondent to avoid duplicates.
     """
-    endpoint = f"{PAPERLESS_URL}/api/correspondents/"
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.get(endpoint, headers=_get_auth_headers())
-        response.raise_for_status()
-        return response.json().get("results", [])
+    return [corr async for corr in iter_correspondents()]
 
 
 async def list_tags() -> list[dict]:
@@ -205,22 +1020,89 @@ async def list_tags() -> list[dict]:
     Retrieves a list of all existing tags to get their names and IDs.
     Call this before creating a new tag to avoid duplicates.
     """
-    endpoint = f"{PAPERLESS_URL}/api/tags/"
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.get(endpoint, headers=_get_auth_headers())
-        response.raise_for_status()
-        return response.json().get("results", [])
+    return [tag async for tag in iter_tags()]
 
 
 async def list_document_types() -> list[dict]:
     """
     Retrieves a list of all existing document types to get their names and IDs.
     """
-    endpoint = f"{PAPERLESS_URL}/api/document_types/"
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.get(endpoint, headers=_get_auth_headers())
+    return [dt async for dt in iter_document_types()]
+
+
+async def _probe_endpoint(resource: str) -> tuple:
+    """
+    Cheap freshness check for a taxonomy endpoint.
+
+    Returns:
+        tuple: (total count, ETag header or None).
+    """
+    endpoint = f"{PAPERLESS_URL}/api/{resource}/"
+    client = get_client()
+    response = await client.get(endpoint, headers=_get_auth_headers(), params={"page_size": 1})
+    response.raise_for_status()
+    return response.json().get("count"), response.headers.get("ETag")
+
+
+_correspondent_cache = TaxonomyCache(
+    "correspondents",
+    list_correspondents,
+    lambda: _probe_endpoint("correspondents"),
+    TAXONOMY_CACHE_TTL,
+)
+_tag_cache = TaxonomyCache("tags", list_tags, lambda: _probe_endpoint("tags"), TAXONOMY_CACHE_TTL)
+_document_type_cache = TaxonomyCache(
+    "document_types",
+    list_document_types,
+    lambda: _probe_endpoint("document_types"),
+    TAXONOMY_CACHE_TTL,
+)
+
+
+async def _create_entity(
+    cache: TaxonomyCache, iter_existing: Callable[..., AsyncIterator[dict]], data: dict
+) -> dict:
+    """
+    Creates a taxonomy entity and writes it through to `cache`.
+
+    Paperless answers 400 when the name is already taken, i.e. it was created
+    elsewhere after the cache was loaded. The cache is then invalidated and the
+    existing entity is looked up by name on the server instead.
+
+    Returns:
+        dict: The created entity, the existing one if the name was taken, or
+        {"status": "already_exists", "name": ...} if it could not be found.
+    """
+    import httpx
+
+    name = data["name"]
+    endpoint = f"{PAPERLESS_URL}/api/{cache.kind}/"
+    try:
+        client = get_client()
+        response = await client.post(endpoint, headers=_get_auth_headers(), json=data)
         response.raise_for_status()
-        return response.json().get("results", [])
+        entity = response.json()
+        cache.add(entity)
+        return entity
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code != 400:
+            raise
+        logger.warning(
+            "Could not create %s '%s', it likely already exists. API response: %s",
+            cache.kind,
+            name,
+            e.response.text,
+        )
+        # O cache local está desatualizado: recarrega depois e busca só esse nome no servidor
+        cache.invalidate()
+        existing = await _find_first(
+            iter_existing(name__iexact=name),
+            lambda item: item.get("name", "").lower() == name.lower(),
+        )
+        if existing:
+            return existing
+        # Return a structure that doesn't break the flow
+        return {"status": "already_exists", "name": name}
 
 
 async def create_correspondent(name: str) -> dict:
@@ -232,26 +1114,18 @@ async def create_correspondent(name: str) -> dict:
         name (str): The name for the new correspondent. Must be unique.
 
     Returns:
-        dict: The newly created correspondent object, including its new ID.
+        dict: The newly created correspondent object, including its new ID, or
+        the existing one if the name was taken.
     """
-    endpoint = f"{PAPERLESS_URL}/api/correspondents/"
-    data = {"name": name}
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.post(endpoint, headers=_get_auth_headers(), json=data)
-        response.raise_for_status()
-        return response.json()
+    return await _create_entity(_correspondent_cache, iter_correspondents, {"name": name})
 
 
 async def create_document_type(name: str) -> dict:
     """
-    Creates a new document type in Paperless-NGX.
+    Creates a new document type in Paperless-NGX, or returns the existing one
+    if the name was taken.
     """
-    endpoint = f"{PAPERLESS_URL}/api/document_types/"
-    data = {"name": name}
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.post(endpoint, headers=_get_auth_headers(), json=data)
-        response.raise_for_status()
-        return response.json()
+    return await _create_entity(_document_type_cache, iter_document_types, {"name": name})
 
 
 async def create_tag(name: str) -> dict:
@@ -263,26 +1137,12 @@ async def create_tag(name: str) -> dict:
         name (str): The name for the new tag. Must be unique.
 
     Returns:
-        dict: The newly created tag object, or a message indicating it already exists.
+        dict: The newly created tag object, the existing tag if the name was taken,
+        or a message indicating it already exists.
     """
-    endpoint = f"{PAPERLESS_URL}/api/tags/"
-    random_color = _generate_random_hex_color()
-    data = {"name": name, "color": random_color}
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(endpoint, headers=_get_auth_headers(), json=data)
-            response.raise_for_status()
-            return response.json()
-    except httpx.HTTPStatusError as e:
-        if e.response.status_code == 400:
-            logger.warning(
-                f"Could not create tag '{name}', it likely already exists. "
-                f"API response: {e.response.text}"
-            )
-            # Return a structure that doesn't break the flow
-            return {"status": "already_exists", "name": name}
-        else:
-            raise e
+    data = {"name": name, "color": _generate_random_hex_color()}
+    return await _create_entity(_tag_cache, iter_tags, data)
+
 
 def _generate_random_hex_color():
     """
@@ -291,84 +1151,65 @@ def _generate_random_hex_color():
     return '#%06x' % random.randint(0, 0xFFFFFF)
 
 
-def _normalize_name(name: str) -> str:
+# Locks por nome; somem sozinhos quando nenhuma corrotina os usa mais
+_create_locks: "weakref.WeakValueDictionary" = weakref.WeakValueDictionary()
+_create_locks_loop = None
+
+
+def _name_lock(kind: str, name: str) -> asyncio.Lock:
     """
-    Normaliza um nome para comparação, removendo acentos, espaços extras e convertendo para minúsculas.
-    
-    Args:
-        name: Nome a ser normalizado.
-    
-    Returns:
-        Nome normalizado para comparação.
-    """
-    if not name:
-        return ""
-    
-    # Remove acentos
-    nfd = unicodedata.normalize('NFD', name)
-    without_accents = ''.join(char for char in nfd if unicodedata.category(char) != 'Mn')
-    
-    # Converte para minúsculas
-    normalized = without_accents.lower()
-    
-    # Remove espaços extras e caracteres especiais comuns
-    normalized = re.sub(r'\s+', ' ', normalized)  # Múltiplos espaços -> um espaço
-    normalized = normalized.strip()
-    
-    # Remove palavras comuns que podem variar
-    # (opcional - pode ser expandido conforme necessário)
-    normalized = re.sub(r'\b(ltda|ltda\.|ltd|inc|inc\.|corp|corp\.|company|co\.)\b', '', normalized)
-    normalized = re.sub(r'\s+', ' ', normalized).strip()
-    
-    return normalized
-
-
-def _names_are_similar(name1: str, name2: str, threshold: float = 0.85) -> bool:
-    """
-    Verifica se dois nomes são similares usando normalização e comparação simples.
-    
-    Args:
-        name1: Primeiro nome.
-        name2: Segundo nome.
-        threshold: Limiar de similaridade (0-1). Padrão: 0.85.
-    
+    Returns the lock that serializes creation of a given entity name, so
+    concurrent resolutions of the same name create it only once.
+    """
+    global _create_locks, _create_locks_loop
+    loop = asyncio.get_running_loop()
+    if _create_locks_loop is not loop:
+        _create_locks = weakref.WeakValueDictionary()
+        _create_locks_loop = loop
+    key = (kind, name.lower())
+    lock = _create_locks.get(key)
+    if lock is None:
+        lock = asyncio.Lock()
+        _create_locks[key] = lock
+    return lock
+
+
+async def _resolve_entity(
+    cache: TaxonomyCache, name: str, create: Callable, fuzzy: bool = True
+) -> tuple:
+    """
+    Finds an entity in the cache (exact, then similar) or creates it.
+
     Returns:
-        True se os nomes são considerados similares.
-    """
-    norm1 = _normalize_name(name1)
-    norm2 = _normalize_name(name2)
-    
-    # Comparação exata após normalização
-    if norm1 == norm2:
-        return True
-    
-    # Verifica se um nome contém o outro (para casos como "Amazon" vs "Amazon Serviços")
-    if norm1 in norm2 or norm2 in norm1:
-        # Calcula similaridade simples baseada em palavras comuns
-        words1 = set(norm1.split())
-        words2 = set(norm2.split())
-        
-        if len(words1) == 0 or len(words2) == 0:
-            return False
-        
-        # Remove palavras muito curtas (artigos, preposições)
-        words1 = {w for w in words1 if len(w) > 2}
-        words2 = {w for w in words2 if len(w) > 2}
-        
-        if len(words1) == 0 or len(words2) == 0:
-            return norm1 == norm2
-        
-        # Calcula similaridade de Jaccard
-        intersection = words1.intersection(words2)
-        union = words1.union(words2)
-        
-        if len(union) == 0:
-            return False
-        
-        similarity = len(intersection) / len(union)
-        return similarity >= threshold
-    
-    return False
+        tuple: (entity dict, how) where how is "exact", "similar" or "created".
+    """
+
+    async def lookup():
+        entity = await cache.get_by_name(name)
+        if entity:
+            return entity, "exact"
+        if fuzzy:
+            entity = await cache.find_similar(name)
+            if entity:
+                return entity, "similar"
+        return None, None
+
+    entity, how = await lookup()
+    if entity:
+        return entity, how
+    async with _name_lock(cache.kind, name):
+        # Outra corrotina pode ter criado o nome enquanto esperávamos o lock
+        entity, how = await lookup()
+        if entity:
+            return entity, how
+        entity = await create(name)
+        if entity.get("id") is None:
+            # Criado em paralelo por outro processo ({"status": "already_exists"}):
+            # o cache já foi invalidado, então a busca pelo nome recarrega a lista
+            existing = await cache.get_by_name(name)
+            if existing:
+                return existing, "exact"
+        return entity, "created"
 
 
 async def get_or_create_correspondent(tool_context: ToolContext, name: str) -> dict:
@@ -385,33 +1226,14 @@ async def get_or_create_correspondent(tool_context: ToolContext, name: str) -> d
         dict: The correspondent object, including its ID.
     """
     logger.info("Getting or creating correspondent: '%s'", name)
-    all_correspondents = await list_correspondents()
-    
-    # Primeiro tenta match exato (case-insensitive)
-    for corr in all_correspondents:
-        corr_name = corr.get("name", "")
-        if corr_name.lower() == name.lower():
-            logger.info("Found exact match correspondent with ID: %s", corr["id"])
-            tool_context.state["correspondent_id"] = corr["id"]
-            return corr
-    
-    # Se não encontrou match exato, tenta match similar
-    for corr in all_correspondents:
-        corr_name = corr.get("name", "")
-        if _names_are_similar(name, corr_name):
-            logger.info(
-                "Found similar correspondent '%s' (requested: '%s') with ID: %s",
-                corr_name,
-                name,
-                corr["id"],
-            )
-            tool_context.state["correspondent_id"] = corr["id"]
-            return corr
-
-    logger.info("Correspondent '%s' not found. Creating a new one.", name)
-    new_correspondent = await create_correspondent(name)
-    tool_context.state["correspondent_id"] = new_correspondent["id"]
-    return new_correspondent
+    corr, how = await _resolve_entity(_correspondent_cache, name, create_correspondent)
+    if corr.get("id") is None:
+        return {"status": "error", "message": f"✗ Could not resolve correspondent '{name}'."}
+    logger.info(
+        "Correspondent '%s' resolved (%s) to '%s' with ID: %s", name, how, corr.get("name"), corr["id"]
+    )
+    tool_context.state["correspondent_id"] = corr["id"]
+    return corr
 
 
 async def get_or_create_tag(tool_context: ToolContext, name: str) -> dict:
@@ -428,25 +1250,21 @@ async def get_or_create_tag(tool_context: ToolContext, name: str) -> dict:
         dict: The tag object, including its ID.
     """
     logger.info("Getting or creating tag: '%s'", name)
-    all_tags = await list_tags()
-    for tag in all_tags:
-        if tag.get("name", "").lower() == name.lower():
-            logger.info("Found existing tag with ID: %s", tag["id"])
-            if "tag_ids" not in tool_context.state:
-                tool_context.state["tag_ids"] = []
-            if tag["id"] not in tool_context.state["tag_ids"]:
-                tool_context.state["tag_ids"].append(tag["id"])
-            return tag
-
-    logger.info("Tag '%s' not found. Creating a new one.", name)
-    new_tag = await create_tag(name)
-
-    if "tag_ids" not in tool_context.state:
-        tool_context.state["tag_ids"] = []
-    if new_tag and new_tag.get("id") and new_tag.get("id") not in tool_context.state.get("tag_ids", []):
-        tool_context.state["tag_ids"].append(new_tag["id"])
-        
-    return new_tag
+    tag, how = await _resolve_entity(_tag_cache, name, create_tag, fuzzy=False)
+    logger.info("Tag '%s' resolved (%s) with ID: %s", name, how, tag.get("id"))
+
+    if tag and tag.get("id"):
+        _add_tag_id_to_state(tool_context, tag["id"])
+
+    return tag
+
+
+def _add_tag_id_to_state(tool_context: ToolContext, tag_id: int) -> None:
+    """Appends a tag ID to `tag_ids` in state, avoiding duplicates."""
+    tag_ids = list(tool_context.state.get("tag_ids") or [])
+    if tag_id not in tag_ids:
+        # Reatribui a lista para que o ADK registre o delta do state
+        tool_context.state["tag_ids"] = tag_ids + [tag_id]
 
 
 async def select_document_type(tool_context: ToolContext, document_type_id: int) -> str:
@@ -473,31 +1291,105 @@ async def get_or_create_document_type(tool_context: ToolContext, name: str) -> d
         dict: The document type object, including its ID.
     """
     logger.info("Getting or creating document type: '%s'", name)
-    all_types = await list_document_types()
-    
-    # Primeiro tenta match exato (case-insensitive)
-    for dt in all_types:
-        dt_name = dt.get("name", "")
-        if dt_name.lower() == name.lower():
-            logger.info("Found exact match document type with ID: %s", dt["id"])
-            tool_context.state["document_type_id"] = dt["id"]
-            return dt
-    
-    # Se não encontrou match exato, tenta match similar
-    for dt in all_types:
-        dt_name = dt.get("name", "")
-        if _names_are_similar(name, dt_name):
-            logger.info(
-                "Found similar document type '%s' (requested: '%s') with ID: %s",
-                dt_name,
-                name,
-                dt["id"],
-            )
-            tool_context.state["document_type_id"] = dt["id"]
-            return dt
+    dt, how = await _resolve_entity(_document_type_cache, name, create_document_type)
+    if dt.get("id") is None:
+        return {"status": "error", "message": f"✗ Could not resolve document type '{name}'."}
+    logger.info(
+        "Document type '%s' resolved (%s) to '%s' with ID: %s", name, how, dt.get("name"), dt["id"]
+    )
+    tool_context.state["document_type_id"] = dt["id"]
+    return dt
 
-    logger.info("Document type '%s' not found. Creating a new one.", name)
-    new_dt = await create_document_type(name)
-    tool_context.state["document_type_id"] = new_dt["id"]
-    return new_dt
 
+async def resolve_metadata(
+    correspondent: str = None, document_type: str = None, keywords: list[str] = None
+) -> dict:
+    """
+    Resolves (finding or creating) a correspondent, a document type and all
+    keyword tags concurrently. Does not touch session state.
+
+    Returns:
+        dict: {"status", "correspondent_id", "document_type_id", "tag_ids", "errors"}.
+    """
+    # Remove palavras-chave duplicadas (case-insensitive), mantendo a ordem
+    unique_keywords = []
+    seen = set()
+    for keyword in keywords or []:
+        if keyword and keyword.strip() and keyword.strip().lower() not in seen:
+            seen.add(keyword.strip().lower())
+            unique_keywords.append(keyword.strip())
+
+    jobs = []
+    if correspondent:
+        coro = _resolve_entity(_correspondent_cache, correspondent, create_correspondent)
+        jobs.append(("correspondent", correspondent, coro))
+    if document_type:
+        coro = _resolve_entity(_document_type_cache, document_type, create_document_type)
+        jobs.append(("document_type", document_type, coro))
+    for keyword in unique_keywords:
+        coro = _resolve_entity(_tag_cache, keyword, create_tag, fuzzy=False)
+        jobs.append(("tag", keyword, coro))
+
+    results = await asyncio.gather(*(job[2] for job in jobs), return_exceptions=True)
+
+    resolved = {"correspondent_id": None, "document_type_id": None, "tag_ids": [], "errors": []}
+    for (kind, name, _), result in zip(jobs, results):
+        if isinstance(result, Exception):
+            logger.error("✗ Error resolving %s '%s': %s", kind, name, result)
+            resolved["errors"].append(f"{kind} '{name}': {result}")
+            continue
+        entity, how = result
+        entity_id = entity.get("id") if entity else None
+        if entity_id is None:
+            resolved["errors"].append(f"{kind} '{name}': no ID returned")
+            continue
+        logger.info("Resolved %s '%s' (%s) -> ID %s", kind, name, how, entity_id)
+        if kind == "tag":
+            if entity_id not in resolved["tag_ids"]:
+                resolved["tag_ids"].append(entity_id)
+        else:
+            resolved[f"{kind}_id"] = entity_id
+
+    resolved["status"] = "success" if not resolved["errors"] else "partial"
+    return resolved
+
+
+async def resolve_metadata_batch(
+    tool_context: ToolContext,
+    correspondent: str = None,
+    document_type: str = None,
+    keywords: list[str] = None,
+) -> dict:
+    """
+    Resolves the correspondent, the document type and ALL keyword tags in a
+    single call, finding or creating each one, and saves `correspondent_id`,
+    `document_type_id` and `tag_ids` to the state.
+
+    Args:
+        tool_context: The ADK tool context.
+        correspondent (str): The correspondent name (from `document_info.correspondent_name`).
+        document_type (str): The document type name (from `document_info.document_type`).
+        keywords (list[str]): All keywords to resolve as tags (from `document_info.keywords`).
+
+    Returns:
+        dict: The resolved IDs plus a status ("success" or "partial") and any errors.
+    """
+    logger.info(
+        "Resolving metadata batch: correspondent=%r, document_type=%r, keywords=%r",
+        correspondent,
+        document_type,
+        keywords,
+    )
+    resolved = await resolve_metadata(correspondent, document_type, keywords)
+
+    # Escreve tudo no state de uma vez
+    if resolved["correspondent_id"] is not None:
+        tool_context.state["correspondent_id"] = resolved["correspondent_id"]
+    if resolved["document_type_id"] is not None:
+        tool_context.state["document_type_id"] = resolved["document_type_id"]
+    if resolved["tag_ids"]:
+        tag_ids = list(tool_context.state.get("tag_ids") or [])
+        new_ids = [t for t in resolved["tag_ids"] if t not in tag_ids]
+        tool_context.state["tag_ids"] = tag_ids + new_ids
+
+    return resolved
@@ -0,0 +1,183 @@
+"""
+Short-lived cache of Paperless-NGX search results.
+
+Near-identical searches ("Notas Fiscais Amazon", "nota fiscal amazon") are
+keyed by a normalized form of the query plus the filter IDs, so they share
+one entry. Entries are fresh for `ttl` seconds; for `stale_ttl` seconds after
+that they are still served while a background refresh runs
+(stale-while-revalidate). Uploads invalidate the whole cache.
+"""
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from paperless_app import telemetry
+from paperless_app.agent.tools.entity_resolver import normalize_name
+
+logger = logging.getLogger(__name__)
+
+# Consultas com sintaxe do Whoosh (campos, aspas, operadores) não são reordenadas
+STRUCTURED_QUERY_RE = re.compile(r'[:"()*?\[\]{}~^]|\b(AND|OR|NOT|TO)\b')
+_WHITESPACE_RE = re.compile(r"\s+")
+# Plurais comuns em português e inglês: "fiscais" -> "fiscal", "notas" -> "nota"
+_PLURAL_RULES = (("ais", "al"), ("eis", "el"), ("oes", "ao"), ("aes", "ao"), ("ies", "y"))
+
+
+def singular(word: str) -> str:
+    """Folds common Portuguese/English plurals (accent-free, lowercase input)."""
+    for suffix, replacement in _PLURAL_RULES:
+        if word.endswith(suffix) and len(word) > len(suffix) + 1:
+            return word[: -len(suffix)] + replacement
+    if word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+        return word[:-1]
+    return word
+
+
+def is_structured_query(query: str) -> bool:
+    """True if the query uses Paperless/Whoosh syntax (fields, quotes, operators)."""
+    return bool(STRUCTURED_QUERY_RE.search(query or ""))
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonical form of a search query, used as cache key.
+
+    Plain keyword queries are accent/case-folded and stripped of plurals. Every
+    word is kept, including short ones ("NF", "RG", "IR"), since they change
+    the results. Queries using the Paperless query language are only
+    whitespace-normalized, since case is meaningful there.
+    """
+    query = (query or "").strip()
+    if is_structured_query(query):
+        return _WHITESPACE_RE.sub(" ", query)
+    return " ".join(singular(word) for word in normalize_name(query).split())
+
+
+def search_cache_key(query: str, **filters) -> tuple:
+    """Cache key from the normalized query and the (order-independent) filters."""
+    items = []
+    for name, value in sorted(filters.items()):
+        if value is None or value == [] or value == "":
+            continue
+        if isinstance(value, (list, tuple, set)):
+            value = tuple(sorted(value))
+        items.append((name, value))
+    return (normalize_query(query), tuple(items))
+
+
+class SearchCache:
+    """
+    LRU cache with TTL and stale-while-revalidate for search results.
+
+    Args:
+        ttl: Seconds an entry is served without revalidation.
+        stale_ttl: Extra seconds a stale entry may be served while refreshing.
+        max_entries: Maximum number of cached queries.
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max(1, max_entries)
+        # key -> (value, stored_at)
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self._refreshing: set = set()
+        self._generation = 0
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "invalidations": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    async def get_or_fetch(self, key: tuple, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Returns the cached value for `key`, calling `fetch` on a miss. Concurrent
+        misses for the same key share a single fetch.
+        """
+        if not self.enabled:
+            return await fetch()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.monotonic() - stored_at
+            if age < self.ttl:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                telemetry.record_cache("search", "hit")
+                return value
+            if age < self.ttl + self.stale_ttl:
+                self._entries.move_to_end(key)
+                self.stats["stale_hits"] += 1
+                telemetry.record_cache("search", "stale")
+                self._refresh_in_background(key, fetch)
+                return value
+
+        self.stats["misses"] += 1
+        telemetry.record_cache("search", "miss")
+        return await self._fetch_shared(key, fetch)
+
+    async def _fetch_shared(self, key: tuple, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        inflight = self._inflight.get(key)
+        if inflight is not None and inflight.get_loop() is asyncio.get_running_loop():
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generation = self._generation
+        try:
+            value = await fetch()
+        except BaseException as e:
+            future.set_exception(e)
+            # Evita o aviso "exception was never retrieved" quando ninguém mais espera
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            self._store(key, value, generation)
+            return value
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def _refresh_in_background(self, key: tuple, fetch: Callable[[], Awaitable[Any]]) -> None:
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        self.stats["refreshes"] += 1
+
+        async def refresh():
+            try:
+                await self._fetch_shared(key, fetch)
+            except Exception as e:
+                logger.warning("Background refresh of search %r failed: %s", key[0], e)
+            finally:
+                self._refreshing.discard(key)
+
+        asyncio.get_running_loop().create_task(refresh())
+
+    def _store(self, key: tuple, value: Any, generation: int) -> None:
+        # Resultado buscado antes de uma invalidação pode já estar desatualizado
+        if generation != self._generation:
+            return
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: tuple) -> Optional[Any]:
+        """Returns a cached value without fetching (fresh or stale), or None."""
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[1] >= self.ttl + self.stale_ttl:
+            return None
+        return entry[0]
+
+    def invalidate(self) -> None:
+        """Drops every entry (e.g. after a document was added)."""
+        self._entries.clear()
+        self._generation += 1
+        self.stats["invalidations"] += 1
@@ -0,0 +1,245 @@
+"""
+Background tracking of Paperless-NGX consumption tasks.
+
+`post_document/` only enqueues the file and returns a task UUID; the document
+is created later by the consumer. The tracker records those task IDs and a
+single background coroutine polls `/api/tasks/` for all of them at once, with
+an interval that backs off while nothing changes. Results (success/failure,
+document ID, end-to-end latency) are delivered to callbacks and waiters.
+"""
+import asyncio
+import inspect
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+from paperless_app.config import (
+    TASK_POLL_MAX_INTERVAL,
+    TASK_POLL_MIN_INTERVAL,
+    TASK_TRACK_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+_DONE_STATUSES = {"SUCCESS": "success", "FAILURE": "failure", "REVOKED": "failure"}
+# Resultados guardados para `get`/`wait` tardios; os mais antigos são descartados
+_MAX_RESULTS = 1000
+
+
+class TaskTracker:
+    """
+    Tracks many Paperless tasks with one batched poller per event loop.
+
+    Args:
+        fetch_tasks: Coroutine function receiving a list of task IDs and
+            returning the task objects from `/api/tasks/`.
+        max_results: Finished results kept for late `get`/`wait` calls (LRU).
+    """
+
+    def __init__(
+        self,
+        fetch_tasks: Callable[[list[str]], Awaitable[list[dict]]],
+        max_results: int = _MAX_RESULTS,
+    ):
+        self._fetch_tasks = fetch_tasks
+        self.max_results = max(1, max_results)
+        self._pending: dict[str, dict] = {}
+        self._results: "OrderedDict[str, dict]" = OrderedDict()
+        # IDs já descartados de _results: não voltam a ser consultados no Paperless
+        self._evicted: "OrderedDict[str, None]" = OrderedDict()
+        self._callbacks: dict[str, list] = {}
+        # Callbacks assíncronos em andamento (referência forte até terminarem)
+        self._callback_tasks: set = set()
+        self._waiters: dict[str, list] = {}
+        self._poller: Optional[asyncio.Task] = None
+        self._poller_loop = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.stats = {"tracked": 0, "succeeded": 0, "failed": 0, "timed_out": 0, "polls": 0}
+
+    def track(
+        self,
+        task_id: str,
+        on_done: Callable[[dict], Optional[Awaitable]] = None,
+        meta: dict = None,
+    ) -> None:
+        """
+        Starts tracking a task. `on_done` (sync or async) receives the final result.
+        """
+        if task_id in self._results or task_id in self._evicted:
+            if on_done:
+                self._schedule_callback(on_done, self.get(task_id))
+            return
+        if task_id not in self._pending:
+            self._pending[task_id] = {"submitted_at": time.time(), "meta": meta or {}}
+            self.stats["tracked"] += 1
+        if on_done:
+            self._callbacks.setdefault(task_id, []).append(on_done)
+        self._ensure_poller()
+
+    def get(self, task_id: str) -> Optional[dict]:
+        """
+        Returns the final result of a task, None while it is pending, or an
+        "unknown" result if it finished so long ago that it was evicted.
+        """
+        if task_id in self._evicted:
+            return _unknown_result(task_id, "Task result was evicted.")
+        return self._results.get(task_id)
+
+    async def wait(self, task_id: str, timeout: float = None) -> dict:
+        """
+        Waits for a tracked task to finish and returns its result. Tasks that
+        are not being tracked get an "unknown" result right away instead of
+        being polled.
+        """
+        if task_id in self._results or task_id in self._evicted:
+            return self.get(task_id)
+        if task_id not in self._pending:
+            return _unknown_result(task_id, "Task is not being tracked.")
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(task_id, []).append(future)
+        self._ensure_poller()
+        return await asyncio.wait_for(future, timeout)
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    # --- Poller ---
+
+    def _ensure_poller(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._poller is None or self._poller.done() or self._poller_loop is not loop:
+            self._wakeup = asyncio.Event()
+            self._poller = loop.create_task(self._poll_loop())
+            self._poller_loop = loop
+        else:
+            # Nova tarefa: volta a consultar no intervalo mínimo
+            self._wakeup.set()
+
+    async def _poll_loop(self) -> None:
+        interval = TASK_POLL_MIN_INTERVAL
+        while self._pending:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), interval)
+                interval = TASK_POLL_MIN_INTERVAL
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            changed = await self._poll_once()
+            if changed:
+                interval = TASK_POLL_MIN_INTERVAL
+            else:
+                interval = min(interval * 1.5, TASK_POLL_MAX_INTERVAL)
+
+    async def _poll_once(self) -> bool:
+        task_ids = list(self._pending)
+        if not task_ids:
+            return False
+        self.stats["polls"] += 1
+        try:
+            tasks = await self._fetch_tasks(task_ids)
+        except Exception as e:
+            logger.warning("Polling Paperless tasks failed: %s", e)
+            return False
+
+        changed = False
+        by_id = {task.get("task_id"): task for task in tasks}
+        now = time.time()
+        for task_id in task_ids:
+            task = by_id.get(task_id)
+            status = _DONE_STATUSES.get((task or {}).get("status", "").upper())
+            if status is None:
+                if now - self._pending[task_id]["submitted_at"] > TASK_TRACK_TIMEOUT:
+                    self._finish(
+                        task_id, {"status": "timeout", "error": "Task tracking timed out."}
+                    )
+                    changed = True
+                continue
+            document_id = task.get("related_document")
+            self._finish(
+                task_id,
+                {
+                    "status": status,
+                    "document_id": int(document_id) if document_id else None,
+                    "error": task.get("result") if status == "failure" else None,
+                    "message": task.get("result"),
+                },
+            )
+            changed = True
+        return changed
+
+    def _finish(self, task_id: str, result: dict) -> None:
+        pending = self._pending.pop(task_id)
+        result = {
+            "task_id": task_id,
+            "latency_seconds": round(time.time() - pending["submitted_at"], 3),
+            "meta": pending["meta"],
+            **result,
+        }
+        self._results[task_id] = result
+        while len(self._results) > self.max_results:
+            evicted, _ = self._results.popitem(last=False)
+            self._evicted[evicted] = None
+            if len(self._evicted) > self.max_results:
+                self._evicted.popitem(last=False)
+        key = {"success": "succeeded", "timeout": "timed_out"}.get(result["status"], "failed")
+        self.stats[key] += 1
+        logger.info(
+            "Paperless task %s finished: %s (document_id=%s, %.1fs)",
+            task_id,
+            result["status"],
+            result.get("document_id"),
+            result["latency_seconds"],
+        )
+        for callback in self._callbacks.pop(task_id, []):
+            self._schedule_callback(callback, result)
+        for future in self._waiters.pop(task_id, []):
+            if not future.done():
+                future.set_result(result)
+
+    def _schedule_callback(self, callback: Callable, result: dict) -> None:
+        try:
+            outcome = callback(result)
+            if inspect.isawaitable(outcome):
+                # O loop só guarda referência fraca às tasks; sem esta, ela pode ser coletada
+                task = asyncio.ensure_future(outcome)
+                self._callback_tasks.add(task)
+                task.add_done_callback(self._callback_tasks.discard)
+        except Exception as e:
+            logger.error("✗ Task callback failed: %s", e, exc_info=True)
+
+
+def _unknown_result(task_id: str, error: str) -> dict:
+    return {"task_id": task_id, "status": "unknown", "document_id": None, "error": error}
+
+
+def session_state_reporter(invocation_context, state_key: str = "upload_task") -> Callable:
+    """
+    Builds an `on_done` callback that writes the task result into the ADK
+    session of `invocation_context` (as a state delta event), after the
+    invocation that uploaded the document has already finished.
+    """
+    from google.adk.events import Event, EventActions
+
+    session_service = invocation_context.session_service
+    session = invocation_context.session
+
+    async def report(result: dict) -> None:
+        try:
+            current = await session_service.get_session(
+                app_name=session.app_name, user_id=session.user_id, session_id=session.id
+            )
+            if current is None:
+                return
+            event = Event(
+                invocation_id=f"task-{result['task_id']}",
+                author="paperless_task_tracker",
+                actions=EventActions(state_delta={state_key: result}),
+            )
+            await session_service.append_event(current, event)
+        except Exception as e:
+            logger.warning("Could not report task %s to session: %s", result.get("task_id"), e)
+
+    return report
@@ -0,0 +1,155 @@
+"""
+In-process cache for Paperless-NGX taxonomies (correspondents, tags, document types).
+
+Each list is downloaded once and then served from memory. After the TTL expires
+a cheap probe (count + ETag) decides whether a full reload is actually needed,
+and `create_*` calls write new entries straight into the cache.
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+from paperless_app import telemetry
+from paperless_app.agent.tools.entity_resolver import EntityResolver
+
+logger = logging.getLogger(__name__)
+
+
+class TaxonomyCache:
+    """
+    Cache for a single Paperless taxonomy endpoint.
+
+    Args:
+        kind: Human readable name, used in logs (e.g. "tags").
+        fetch_all: Coroutine function returning the full list of entities.
+        probe: Coroutine function returning `(count, etag)` for the endpoint.
+        ttl: Seconds before the cache is revalidated with `probe`.
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        fetch_all: Callable[[], Awaitable[list[dict]]],
+        probe: Callable[[], Awaitable[tuple]],
+        ttl: float,
+    ):
+        self.kind = kind
+        self._fetch_all = fetch_all
+        self._probe = probe
+        self.ttl = ttl
+        self._entities: dict[int, dict] = {}
+        self._resolver = EntityResolver()
+        self._loaded = False
+        self._validated_at = 0.0
+        self._count: Optional[int] = None
+        self._etag: Optional[str] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop = None
+        self.stats = {"hits": 0, "loads": 0, "probes": 0, "writes": 0}
+
+    def _get_lock(self) -> asyncio.Lock:
+        # asyncio.Lock fica preso ao loop onde foi usado; recria se o loop mudou.
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    def _is_fresh(self) -> bool:
+        return self._loaded and (time.monotonic() - self._validated_at) < self.ttl
+
+    async def _load(self, snapshot: Optional[tuple] = None) -> None:
+        """
+        Downloads the full list. `snapshot` is the `(count, etag)` probed just
+        before; without it the endpoint is probed first, so the ETag of the
+        loaded list is known and the next revalidation can compare against it.
+        """
+        if snapshot is None:
+            self.stats["probes"] += 1
+            try:
+                snapshot = await self._probe()
+            except Exception as e:
+                logger.warning("Probe failed for taxonomy cache '%s': %s", self.kind, e)
+                snapshot = (None, None)
+        entities = await self._fetch_all()
+        self._entities = {e["id"]: e for e in entities if "id" in e}
+        self._resolver = EntityResolver(list(self._entities.values()))
+        self._loaded = True
+        self._validated_at = time.monotonic()
+        self._count = len(self._entities)
+        self._etag = snapshot[1]
+        self.stats["loads"] += 1
+        logger.info("Taxonomy cache '%s' loaded with %s entries.", self.kind, len(self._entities))
+
+    async def _revalidate(self) -> None:
+        """Reloads only if the remote count or ETag changed since the last check."""
+        self.stats["probes"] += 1
+        try:
+            count, etag = await self._probe()
+        except Exception as e:
+            logger.warning("Probe failed for taxonomy cache '%s': %s. Reloading.", self.kind, e)
+            await self._load((None, None))
+            return
+        changed = count != self._count or (etag is not None and etag != self._etag)
+        if changed:
+            logger.info("Taxonomy cache '%s' is stale (count=%s). Reloading.", self.kind, count)
+            await self._load((count, etag))
+        else:
+            self._validated_at = time.monotonic()
+
+    async def ensure_loaded(self) -> None:
+        """Loads or revalidates the cache if needed. Concurrent callers share one load."""
+        if self._is_fresh():
+            self.stats["hits"] += 1
+            telemetry.record_cache(f"taxonomy.{self.kind}", "hit")
+            return
+        async with self._get_lock():
+            if self._is_fresh():
+                self.stats["hits"] += 1
+                telemetry.record_cache(f"taxonomy.{self.kind}", "hit")
+                return
+            if not self._loaded:
+                telemetry.record_cache(f"taxonomy.{self.kind}", "miss")
+                await self._load()
+            else:
+                telemetry.record_cache(f"taxonomy.{self.kind}", "revalidate")
+                await self._revalidate()
+
+    async def get_all(self) -> list[dict]:
+        """Returns all cached entities, loading them on first use."""
+        await self.ensure_loaded()
+        return list(self._entities.values())
+
+    async def get_by_id(self, entity_id: int) -> Optional[dict]:
+        """Returns the entity with the given ID, if any."""
+        await self.ensure_loaded()
+        return self._entities.get(entity_id)
+
+    async def get_by_name(self, name: str) -> Optional[dict]:
+        """Returns the entity whose name matches case-insensitively, if any."""
+        await self.ensure_loaded()
+        return self._resolver.find_exact(name)
+
+    async def find_similar(self, name: str) -> Optional[dict]:
+        """Returns the first entity whose normalized name is similar to `name`."""
+        await self.ensure_loaded()
+        return self._resolver.find_similar(name)
+
+    def add(self, entity: dict) -> None:
+        """Write-through: makes a newly created entity visible immediately."""
+        if not entity or "id" not in entity:
+            return
+        is_new = entity["id"] not in self._entities
+        self._entities[entity["id"]] = entity
+        self._resolver.add(entity)
+        if is_new and self._count is not None:
+            self._count += 1
+        self.stats["writes"] += 1
+
+    def invalidate(self) -> None:
+        """Forces a full reload on next access."""
+        self._loaded = False
+        self._validated_at = 0.0
+        self._count = None
+        self._etag = None
@@ -0,0 +1,713 @@
+"""
+Semantic (vector) index of Paperless-NGX document content.
+
+Document text is split into overlapping chunks and embedded in batches by a
+pluggable `Embedder`. Embeddings live in a single memory-mapped matrix on
+disk, stored as float16 or int8 (one scale per row), so the index stays
+compact and only the rows that are actually scored get paged in. Chunk
+metadata lives in SQLite next to it.
+
+Once the index is large enough (VECTOR_ANN_MIN_ROWS), an IVF
+(inverted-file) approximate-nearest-neighbour index is trained with
+spherical k-means: every row is assigned to its nearest centroid and a query
+only scores the rows of the `nprobe` closest centroids. Smaller indexes are
+scanned exactly.
+"""
+import abc
+import hashlib
+import logging
+import math
+import re
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from paperless_app.agent.tools.entity_resolver import normalize_name
+from paperless_app.agent.tools.search_cache import singular
+from paperless_app.config import (
+    VECTOR_ANN_MIN_ROWS,
+    VECTOR_ANN_NPROBE,
+    VECTOR_CHUNK_CHARS,
+    VECTOR_CHUNK_OVERLAP,
+    VECTOR_DIM,
+    VECTOR_DTYPE,
+    VECTOR_EMBED_BATCH_SIZE,
+    VECTOR_EMBEDDER,
+    VECTOR_EMBEDDING_MODEL,
+    VECTOR_INDEX_DIR,
+    VECTOR_INDEX_ENABLED,
+)
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def chunk_text(text: str, chunk_chars: int, overlap: int) -> list[str]:
+    """
+    Splits text into windows of about `chunk_chars` characters that overlap by
+    `overlap` characters, breaking at whitespace when possible.
+    """
+    text = _WHITESPACE_RE.sub(" ", text or "").strip()
+    if not text:
+        return []
+    chunks, start = [], 0
+    step = max(1, chunk_chars - overlap)
+    while start < len(text):
+        end = min(len(text), start + chunk_chars)
+        if end < len(text):
+            # Não corta palavras no meio quando há um espaço por perto
+            space = text.rfind(" ", start + step, end)
+            if space > start:
+                end = space
+        chunks.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        start = max(start + 1, end - overlap)
+    return [chunk for chunk in chunks if chunk]
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+# --- Embedders ---
+
+
+class Embedder(abc.ABC):
+    """
+    Turns texts into L2-normalized float32 vectors of `dim` dimensions.
+    `name` identifies the model; changing it invalidates a stored index.
+    """
+
+    name = "base"
+    dim = 0
+
+    @abc.abstractmethod
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """Embeds a batch of texts as a (len(texts), dim) float32 array."""
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self.embed([text])[0]
+
+
+class HashingEmbedder(Embedder):
+    """
+    Deterministic, dependency-free embedder based on the hashing trick:
+    accent/case-folded, singularized words and word bigrams are hashed into
+    `dim` signed buckets. It captures lexical overlap only, but needs no model,
+    is stable across processes and is what tests and offline setups use.
+
+    Args:
+        dim: Number of dimensions.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    @staticmethod
+    @lru_cache(maxsize=65536)
+    def _bucket(feature: str, dim: int) -> tuple:
+        # blake2b em vez de hash(): hash() de str muda a cada processo
+        value = int.from_bytes(
+            hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little"
+        )
+        return value % dim, 1.0 if value >> 63 else -1.0
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = [singular(w) for w in _TOKEN_RE.findall(normalize_name(text or ""))]
+            features = [(w, 1.0) for w in words if len(w) > 1]
+            features += [(f"{a} {b}", 0.5) for a, b in zip(words, words[1:])]
+            for feature, weight in features:
+                bucket, sign = self._bucket(feature, self.dim)
+                vectors[row, bucket] += sign * weight
+        # Frequência sublinear: palavras repetidas não dominam o vetor
+        vectors = np.sign(vectors) * np.log1p(np.abs(vectors))
+        return _normalize_rows(vectors)
+
+
+class GeminiEmbedder(Embedder):
+    """
+    Embeddings from the Gemini API (`google-genai`, already required by the
+    ADK). Documents and queries use the retrieval task types.
+
+    Args:
+        model: Embedding model name.
+        dim: Output dimensionality requested from the model.
+        batch_size: Texts per API request.
+    """
+
+    def __init__(self, model: str, dim: int, batch_size: int = 100):
+        from google import genai
+
+        self.model = model
+        self.dim = dim
+        self.batch_size = batch_size
+        self.name = f"gemini-{model}-{dim}"
+        self._client = genai.Client()
+
+    def _embed(self, texts: list[str], task_type: str) -> np.ndarray:
+        from google.genai import types
+
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            result = self._client.models.embed_content(
+                model=self.model,
+                contents=texts[start : start + self.batch_size],
+                config=types.EmbedContentConfig(
+                    task_type=task_type, output_dimensionality=self.dim
+                ),
+            )
+            vectors.extend(embedding.values for embedding in result.embeddings)
+        return _normalize_rows(np.array(vectors, dtype=np.float32).reshape(-1, self.dim))
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        return self._embed(texts, "RETRIEVAL_DOCUMENT")
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self._embed([text], "RETRIEVAL_QUERY")[0]
+
+
+def build_embedder() -> Embedder:
+    """Embedder selected by VECTOR_EMBEDDER ("hashing" or "gemini")."""
+    if VECTOR_EMBEDDER == "gemini":
+        return GeminiEmbedder(VECTOR_EMBEDDING_MODEL, VECTOR_DIM)
+    if VECTOR_EMBEDDER != "hashing":
+        logger.warning("Unknown VECTOR_EMBEDDER %r, using the hashing embedder.", VECTOR_EMBEDDER)
+    return HashingEmbedder(VECTOR_DIM)
+
+
+# --- Index ---
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS chunks ("
+    " row INTEGER PRIMARY KEY, document_id INTEGER NOT NULL, chunk_no INTEGER NOT NULL,"
+    " text TEXT, scale REAL NOT NULL DEFAULT 1.0, list_id INTEGER NOT NULL DEFAULT -1,"
+    " deleted INTEGER NOT NULL DEFAULT 0)",
+    "CREATE INDEX IF NOT EXISTS chunks_document ON chunks (document_id)",
+    "CREATE TABLE IF NOT EXISTS documents ("
+    " document_id INTEGER PRIMARY KEY, content_hash TEXT, modified TEXT)",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+)
+
+_SCAN_BLOCK_ROWS = 65536
+_KMEANS_ITERATIONS = 10
+# Amostra de treino do k-means: pontos por lista, como no IVF do FAISS
+_KMEANS_POINTS_PER_LIST = 64
+# Linhas apagadas são removidas do arquivo quando passam de 25% (e de um mínimo absoluto)
+_COMPACT_MIN_DEAD_ROWS = 1024
+_COMPACT_DEAD_FRACTION = 0.25
+
+
+class VectorIndex:
+    """
+    Chunk embeddings on disk with exact or IVF search. Thread-safe; blocking
+    calls should be run with `asyncio.to_thread` from async code.
+
+    Args:
+        directory: Folder for `vectors.bin`, `centroids.npy` and `chunks.sqlite3`.
+        dim: Embedding dimensions.
+        dtype: "float16" or "int8".
+        embedder_name: Identifies the embedding model; a mismatch resets the index.
+        ann_min_rows: Live rows from which the IVF index is trained.
+        nprobe: Centroids visited per query.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        dim: int,
+        dtype: str = "float16",
+        embedder_name: str = "",
+        ann_min_rows: int = 4096,
+        nprobe: int = 8,
+    ):
+        if dtype not in ("float16", "int8"):
+            raise ValueError(f"Unsupported vector dtype: {dtype}")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.ann_min_rows = ann_min_rows
+        self.nprobe = nprobe
+        self._vectors_path = self.directory / "vectors.bin"
+        self._centroids_path = self.directory / "centroids.npy"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.directory / "chunks.sqlite3"), check_same_thread=False, timeout=30
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+        layout = f"{embedder_name}/{dim}/{dtype}"
+        if self._get_meta("layout") not in (None, layout):
+            logger.warning("Vector index layout changed (%s); rebuilding it.", layout)
+            self._reset_storage()
+        elif self._get_meta("compacting"):
+            logger.warning("Vector index compaction was interrupted; rebuilding it.")
+            self._reset_storage()
+        self._set_meta("layout", layout)
+        self._open()
+
+    # --- Storage ---
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+            )
+
+    def _reset_storage(self) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.execute("DELETE FROM documents")
+            self._conn.execute("DELETE FROM meta WHERE key != 'layout'")
+        self._vectors_path.unlink(missing_ok=True)
+        self._centroids_path.unlink(missing_ok=True)
+
+    def _open(self) -> None:
+        rows = self._conn.execute(
+            "SELECT row, document_id, scale, list_id, deleted FROM chunks ORDER BY row"
+        ).fetchall()
+        self._rows = (rows[-1][0] + 1) if rows else 0
+        self._doc_ids = np.full(self._rows, -1, dtype=np.int64)
+        self._scales = np.ones(self._rows, dtype=np.float32)
+        self._lists = np.full(self._rows, -1, dtype=np.int32)
+        self._alive = np.zeros(self._rows, dtype=bool)
+        for row, document_id, scale, list_id, deleted in rows:
+            self._doc_ids[row] = document_id
+            self._scales[row] = scale
+            self._lists[row] = list_id
+            self._alive[row] = not deleted
+
+        self._vectors = None
+        self._capacity = 0
+        if self._vectors_path.exists():
+            self._capacity = self._vectors_path.stat().st_size // (self.dim * self.dtype.itemsize)
+        if self._capacity < self._rows:
+            logger.warning("Vector file is shorter than its metadata; rebuilding the index.")
+            self._reset_storage()
+            return self._open()
+        if self._capacity:
+            self._vectors = np.memmap(
+                self._vectors_path, dtype=self.dtype, mode="r+", shape=(self._capacity, self.dim)
+            )
+        self._centroids = None
+        if self._centroids_path.exists():
+            self._centroids = np.load(self._centroids_path)
+        self._trained_rows = int(self._get_meta("trained_rows") or 0)
+
+    def _ensure_capacity(self, rows: int) -> None:
+        if rows <= self._capacity:
+            return
+        capacity = max(rows, self._capacity * 2, 1024)
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(capacity * self.dim * self.dtype.itemsize)
+        self._vectors = np.memmap(
+            self._vectors_path, dtype=self.dtype, mode="r+", shape=(capacity, self.dim)
+        )
+        self._capacity = capacity
+
+    def _encode(self, vectors: np.ndarray) -> tuple:
+        """float32 rows -> (stored rows, per-row scales)."""
+        if self.dtype == np.int8:
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+        return vectors.astype(np.float16), np.ones(len(vectors), dtype=np.float32)
+
+    def _scores(self, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+        scores = np.empty(len(rows), dtype=np.float32)
+        for start in range(0, len(rows), _SCAN_BLOCK_ROWS):
+            block = rows[start : start + _SCAN_BLOCK_ROWS]
+            scores[start : start + len(block)] = (
+                self._vectors[block].astype(np.float32) @ query
+            ) * self._scales[block]
+        return scores
+
+    # --- Writes ---
+
+    def content_hashes(self) -> dict:
+        """document_id -> hash of the indexed content (to skip unchanged documents)."""
+        with self._lock:
+            return dict(self._conn.execute("SELECT document_id, content_hash FROM documents"))
+
+    def add_document(
+        self,
+        document_id: int,
+        chunks: list[str],
+        vectors: np.ndarray,
+        content_hash: str = None,
+        modified: str = None,
+    ) -> int:
+        """Replaces the chunks of a document. `vectors` are the chunk embeddings."""
+        return self.add_documents([(document_id, chunks, vectors, content_hash, modified)])
+
+    def add_documents(self, documents: list[tuple]) -> int:
+        """
+        Replaces the chunks of several documents at once. Each item is
+        `(document_id, chunks, vectors, content_hash, modified)`; the in-memory
+        arrays are grown once per call, not once per document.
+
+        Returns:
+            int: Number of chunks written.
+        """
+        # Um documento repetido no lote vale pela última versão
+        documents = list({item[0]: item for item in documents}.values())
+        ids, texts, blocks, rows = [], [], [], []
+        for document_id, chunks, vectors, content_hash, modified in documents:
+            vectors = _normalize_rows(vectors) if len(chunks) else np.zeros((0, self.dim))
+            if len(vectors) != len(chunks) or (len(chunks) and vectors.shape[1] != self.dim):
+                raise ValueError("chunks and vectors do not match")
+            ids.append(document_id)
+            texts.extend((document_id, i, chunk) for i, chunk in enumerate(chunks))
+            blocks.append(vectors.astype(np.float32))
+            rows.append((document_id, content_hash, modified))
+        vectors = np.concatenate(blocks) if blocks else np.zeros((0, self.dim), np.float32)
+
+        with self._lock:
+            self._delete_rows(ids)
+            start = self._rows
+            end = start + len(texts)
+            stored, scales = self._encode(vectors)
+            lists = np.full(len(texts), -1, dtype=np.int32)
+            if self._centroids is not None and len(texts):
+                lists = np.argmax(vectors @ self._centroids.T, axis=1).astype(np.int32)
+            if len(texts):
+                self._ensure_capacity(end)
+                self._vectors[start:end] = stored
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO chunks (row, document_id, chunk_no, text, scale, list_id)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (start + i, document_id, chunk_no, chunk, float(scales[i]), int(lists[i]))
+                        for i, (document_id, chunk_no, chunk) in enumerate(texts)
+                    ],
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO documents (document_id, content_hash, modified)"
+                    " VALUES (?, ?, ?)",
+                    rows,
+                )
+            self._rows = end
+            doc_ids = np.array([document_id for document_id, _, _ in texts], dtype=np.int64)
+            self._doc_ids = np.concatenate([self._doc_ids, doc_ids])
+            self._scales = np.concatenate([self._scales, scales])
+            self._lists = np.concatenate([self._lists, lists])
+            self._alive = np.concatenate([self._alive, np.ones(len(texts), dtype=bool)])
+            self._maybe_compact()
+            self._maybe_train()
+        return len(texts)
+
+    def _delete_rows(self, document_ids: list) -> None:
+        """Tombstones the chunks of the given documents (see `_maybe_compact`)."""
+        if not document_ids:
+            return
+        rows = np.flatnonzero(np.isin(self._doc_ids, document_ids) & self._alive)
+        if len(rows):
+            self._alive[rows] = False
+            with self._conn:
+                self._conn.executemany(
+                    "UPDATE chunks SET deleted = 1 WHERE document_id = ?",
+                    [(int(document_id),) for document_id in set(document_ids)],
+                )
+
+    def delete_missing(self, existing_ids: set) -> int:
+        """Removes documents that no longer exist in Paperless."""
+        with self._lock:
+            indexed = {row[0] for row in self._conn.execute("SELECT document_id FROM documents")}
+            missing = list(indexed - set(existing_ids))
+            if missing:
+                self._delete_rows(missing)
+                with self._conn:
+                    self._conn.executemany(
+                        "DELETE FROM documents WHERE document_id = ?", [(d,) for d in missing]
+                    )
+                self._maybe_compact()
+        return len(missing)
+
+    def reset(self) -> None:
+        """Drops every vector (e.g. before a full rebuild)."""
+        with self._lock:
+            self._vectors = None
+            self._reset_storage()
+            self._open()
+
+    # --- Compaction ---
+
+    def _maybe_compact(self) -> None:
+        dead = self._rows - int(self._alive.sum())
+        if dead >= _COMPACT_MIN_DEAD_ROWS and dead >= _COMPACT_DEAD_FRACTION * self._rows:
+            self._compact()
+
+    def _compact(self) -> None:
+        """
+        Drops tombstoned rows, moving the live ones down in place. Live rows
+        keep their order, so each one only ever moves to a lower position and
+        the copy can run front to back without a second file.
+        """
+        keep = np.flatnonzero(self._alive)
+        dead = self._rows - len(keep)
+        # Se o processo cair no meio, _open reconstrói o índice do zero
+        self._set_meta("compacting", "1")
+        for start in range(0, len(keep), _SCAN_BLOCK_ROWS):
+            block = keep[start : start + _SCAN_BLOCK_ROWS]
+            self._vectors[start : start + len(block)] = self._vectors[block]
+        if self._vectors is not None:
+            self._vectors.flush()
+        with self._conn:
+            self._conn.execute("DELETE FROM chunks WHERE deleted = 1")
+            self._conn.executemany(
+                "UPDATE chunks SET row = ? WHERE row = ?",
+                [(new, int(old)) for new, old in enumerate(keep) if new != old],
+            )
+            self._conn.execute("DELETE FROM meta WHERE key = 'compacting'")
+        self._doc_ids = self._doc_ids[keep]
+        self._scales = self._scales[keep]
+        self._lists = self._lists[keep]
+        self._alive = np.ones(len(keep), dtype=bool)
+        self._rows = len(keep)
+        logger.info("Compacted vector index: %s dead rows dropped, %s kept.", dead, len(keep))
+
+    # --- ANN (IVF) ---
+
+    def _maybe_train(self) -> None:
+        alive = int(self._alive.sum())
+        if alive < self.ann_min_rows:
+            return
+        # Retreina quando o índice dobra de tamanho desde o último treino
+        if self._centroids is not None and alive < 2 * self._trained_rows:
+            return
+        self._train(alive)
+
+    def _train(self, alive: int) -> None:
+        rows = np.flatnonzero(self._alive)
+        # Nunca mais listas do que pontos de treino (rng.choice sem reposição)
+        n_lists = int(min(1024, max(16, math.sqrt(alive)), len(rows)))
+        rng = np.random.default_rng(0)
+        sample = rows
+        if len(rows) > n_lists * _KMEANS_POINTS_PER_LIST:
+            sample = np.sort(rng.choice(rows, n_lists * _KMEANS_POINTS_PER_LIST, replace=False))
+        data = self._vectors[sample].astype(np.float32) * self._scales[sample, None]
+        data = _normalize_rows(data)
+        centroids = data[rng.choice(len(data), n_lists, replace=False)]
+        for _ in range(_KMEANS_ITERATIONS):
+            assignment = np.argmax(data @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, data)
+            empty = np.bincount(assignment, minlength=n_lists) == 0
+            # Centroides vazios são reposicionados em pontos aleatórios
+            sums[empty] = data[rng.choice(len(data), int(empty.sum()))]
+            centroids = _normalize_rows(sums)
+
+        lists = np.full(self._rows, -1, dtype=np.int32)
+        for start in range(0, len(rows), _SCAN_BLOCK_ROWS):
+            block = rows[start : start + _SCAN_BLOCK_ROWS]
+            vectors = self._vectors[block].astype(np.float32)
+            lists[block] = np.argmax(vectors @ centroids.T, axis=1)
+        with self._conn:
+            self._conn.executemany(
+                "UPDATE chunks SET list_id = ? WHERE row = ?",
+                [(int(lists[row]), int(row)) for row in rows],
+            )
+        np.save(self._centroids_path, centroids)
+        self._centroids = centroids
+        self._lists = lists
+        self._trained_rows = alive
+        self._set_meta("trained_rows", str(alive))
+        logger.info("Trained IVF vector index: %s lists over %s chunks.", n_lists, alive)
+
+    # --- Queries ---
+
+    def search(self, query: np.ndarray, top_k: int = 5, nprobe: int = None) -> list[dict]:
+        """
+        Nearest documents to a query embedding, ranked by their best chunk.
+
+        Returns:
+            list: [{"document_id", "score", "chunk"}] (best matching chunk text).
+        """
+        query = _normalize_rows(query)[0]
+        with self._lock:
+            if self._vectors is None or not self._alive.any():
+                return []
+            candidates = self._alive
+            if self._centroids is not None:
+                probes = np.argsort(self._centroids @ query)[::-1][: nprobe or self.nprobe]
+                candidates = candidates & np.isin(self._lists, probes)
+            rows = np.flatnonzero(candidates)
+            scores = self._scores(rows, query)
+
+            # Melhor trecho de cada documento
+            order = np.argsort(scores)[::-1]
+            best = {}
+            for i in order:
+                document_id = int(self._doc_ids[rows[i]])
+                if document_id not in best:
+                    best[document_id] = (float(scores[i]), int(rows[i]))
+                    if len(best) >= top_k:
+                        break
+            if not best:
+                return []
+            texts = dict(
+                self._conn.execute(
+                    f"SELECT row, text FROM chunks WHERE row IN ({','.join('?' * len(best))})",
+                    [row for _, row in best.values()],
+                )
+            )
+        return [
+            {"document_id": document_id, "score": round(score, 4), "chunk": texts.get(row)}
+            for document_id, (score, row) in best.items()
+        ]
+
+    def stats(self) -> dict:
+        documents = self.count()
+        with self._lock:
+            return {
+                "documents": documents,
+                "chunks": int(self._alive.sum()),
+                "rows": self._rows,
+                "dtype": self.dtype.name,
+                "dim": self.dim,
+                "ivf_lists": 0 if self._centroids is None else len(self._centroids),
+                "bytes": self._capacity * self.dim * self.dtype.itemsize,
+            }
+
+    # --- Sync state (same interface as LocalSearchIndex) ---
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        with self._lock:
+            return self._get_meta("last_modified")
+
+    @property
+    def synced_at(self) -> Optional[float]:
+        with self._lock:
+            value = self._get_meta("synced_at")
+        return float(value) if value else None
+
+    def mark_synced(self, last_modified: Optional[str]) -> None:
+        with self._lock:
+            if last_modified:
+                self._set_meta("last_modified", last_modified)
+            self._set_meta("synced_at", str(time.time()))
+
+    def count(self) -> int:
+        """Number of indexed documents."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+                self._vectors = None
+            self._conn.close()
+
+
+_index: Optional[VectorIndex] = None
+_embedder: Optional[Embedder] = None
+_index_lock = threading.Lock()
+
+
+def get_vector_index() -> Optional[tuple]:
+    """
+    Returns the process-wide (VectorIndex, Embedder) pair, or None when
+    disabled by config.
+    """
+    global _index, _embedder
+    if not VECTOR_INDEX_ENABLED:
+        return None
+    with _index_lock:
+        if _index is None:
+            try:
+                embedder = build_embedder()
+                _index = VectorIndex(
+                    VECTOR_INDEX_DIR,
+                    embedder.dim,
+                    VECTOR_DTYPE,
+                    embedder.name,
+                    VECTOR_ANN_MIN_ROWS,
+                    VECTOR_ANN_NPROBE,
+                )
+                _embedder = embedder
+            except (OSError, sqlite3.Error, ValueError, ImportError) as e:
+                logger.error("✗ Could not open vector index at %s: %s", VECTOR_INDEX_DIR, e)
+                return None
+    return _index, _embedder
+
+
+def index_documents(documents: list[dict]) -> int:
+    """
+    Chunks and embeds Paperless documents ({"id", "content", "modified"}) into
+    the process-wide index. Chunks of all documents are embedded together in
+    batches of VECTOR_EMBED_BATCH_SIZE; documents whose content did not change
+    are skipped. Blocking: run with `asyncio.to_thread`.
+
+    Returns:
+        int: Number of chunks embedded.
+    """
+    pair = get_vector_index()
+    if pair is None:
+        return 0
+    index, embedder = pair
+    known = index.content_hashes()
+    pending = []
+    for doc in documents:
+        content = doc.get("content") or ""
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        if known.get(doc["id"]) == digest:
+            continue
+        chunks = chunk_text(content, VECTOR_CHUNK_CHARS, VECTOR_CHUNK_OVERLAP)
+        pending.append((doc, digest, chunks))
+
+    texts = [chunk for _, _, chunks in pending for chunk in chunks]
+    vectors = np.zeros((0, embedder.dim), dtype=np.float32)
+    if texts:
+        vectors = np.concatenate(
+            [
+                embedder.embed(texts[start : start + VECTOR_EMBED_BATCH_SIZE])
+                for start in range(0, len(texts), VECTOR_EMBED_BATCH_SIZE)
+            ]
+        )
+    batch, offset = [], 0
+    for doc, digest, chunks in pending:
+        doc_vectors = vectors[offset : offset + len(chunks)]
+        batch.append((doc["id"], chunks, doc_vectors, digest, doc.get("modified")))
+        offset += len(chunks)
+    if batch:
+        index.add_documents(batch)
+    return offset
+
+
+def search_vectors(question: str, top_k: int) -> list[dict]:
+    """Embeds a question and returns the nearest documents (blocking)."""
+    pair = get_vector_index()
+    if pair is None:
+        return []
+    index, embedder = pair
+    return index.search(embedder.embed_query(question), top_k)
@@ -0,0 +1,328 @@
+"""
+Long-lived asyncio runtime for the ADK agents.
+
+`AgentService` wraps the `Runner` and its session service with loop-agnostic
+coroutines; async front-ends (the API server) use it directly on their own
+loop. For synchronous front-ends, `AgentRuntime` adds a background thread:
+one thread runs a single event loop that owns the `Runner`, the
+session service and every loop-bound resource (pooled HTTP client, task
+tracker, caches). Synchronous front-ends such as Streamlit submit coroutines
+to it with `run_coroutine_threadsafe`, so concurrent users share one loop and
+one set of warm resources instead of creating a new loop per turn.
+
+The ADK runner and the session store are imported when a service is created,
+not when this module is imported.
+"""
+import asyncio
+import atexit
+import concurrent.futures
+import logging
+import queue
+import threading
+import traceback
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Iterator, Optional
+
+from paperless_app import telemetry
+from paperless_app.log_buffer import log_session
+
+if TYPE_CHECKING:
+    from google.adk.events import Event
+    from google.adk.sessions import BaseSessionService
+
+logger = logging.getLogger(__name__)
+
+APP_NAME_FOR_ADK = "paperless_orchestrator_app"
+
+
+def final_response_of(event: "Event") -> Optional[str]:
+    """Returns the text of a final-response event, or None for any other event."""
+    if not event.is_final_response():
+        return None
+    parts = event.content.parts if event.content else None
+    if parts and getattr(parts[0], "text", None):
+        return parts[0].text
+    return None
+
+
+def agent_error_text(error: Exception) -> str:
+    """Markdown shown to the user when the runner fails."""
+    return f"**Agent Error:**\n\n```\n{error}\n```\n\n*Check the debug logs for more details.*"
+
+
+def stream_items_of(event: "Event") -> list[dict]:
+    """
+    Converts an ADK event into UI-friendly stream items:
+    {"type": "text", "text", "author", "partial"}, {"type": "tool_call", "name"},
+    {"type": "tool_response", "name"}.
+    """
+    items = []
+    for call in event.get_function_calls():
+        items.append({"type": "tool_call", "name": call.name, "author": event.author})
+    for response in event.get_function_responses():
+        items.append({"type": "tool_response", "name": response.name, "author": event.author})
+    parts = event.content.parts if event.content and event.content.parts else []
+    text = "".join(part.text for part in parts if getattr(part, "text", None))
+    if text:
+        items.append(
+            {
+                "type": "text",
+                "text": text,
+                "author": event.author,
+                "partial": bool(event.partial),
+                "final": event.is_final_response(),
+            }
+        )
+    return items
+
+
+class AgentService:
+    """
+    The ADK `Runner` plus session helpers. Must be used from a single event loop.
+
+    Args:
+        agent: Root agent to run.
+        app_name: ADK application name.
+        session_service: Session service; defaults to the bounded store configured
+            by the SESSION_* settings (see `session_store`).
+    """
+
+    def __init__(
+        self,
+        agent,
+        app_name: str = APP_NAME_FOR_ADK,
+        session_service: Optional["BaseSessionService"] = None,
+    ):
+        from google.adk.runners import Runner
+
+        from paperless_app.session_store import build_session_service
+
+        self.app_name = app_name
+        telemetry.instrument_agent_tree(agent)
+        self.session_service = session_service or build_session_service()
+        self.runner = Runner(agent=agent, app_name=app_name, session_service=self.session_service)
+
+    async def ensure_session(self, user_id: str, session_id: str, state: dict = None):
+        """Returns the session, creating it if it does not exist."""
+        session = await self.session_service.get_session(
+            app_name=self.app_name, user_id=user_id, session_id=session_id
+        )
+        if session is None:
+            logger.info("Creating ADK session: %s", session_id)
+            session = await self.session_service.create_session(
+                app_name=self.app_name, user_id=user_id, session_id=session_id, state=state
+            )
+        return session
+
+    async def get_session(self, user_id: str, session_id: str):
+        return await self.session_service.get_session(
+            app_name=self.app_name, user_id=user_id, session_id=session_id
+        )
+
+    async def delete_session(self, user_id: str, session_id: str) -> None:
+        await self.session_service.delete_session(
+            app_name=self.app_name, user_id=user_id, session_id=session_id
+        )
+
+    async def iter_events(
+        self, user_id: str, session_id: str, user_message_text: str, streaming: bool = False
+    ) -> AsyncIterator["Event"]:
+        """
+        Runs a single conversation turn, yielding ADK events as they are produced.
+        With `streaming`, model output also arrives as partial (token-level) events.
+
+        Raises:
+            LookupError: If the session does not exist.
+        """
+        logger.info("Running agent turn for session %s", session_id)
+
+        session = await self.get_session(user_id, session_id)
+        if not session:
+            raise LookupError(f"ADK session not found: {session_id}")
+
+        from google.adk.agents.run_config import RunConfig, StreamingMode
+        from google.genai import types as genai_types
+
+        content = genai_types.Content(
+            role="user", parts=[genai_types.Part(text=user_message_text)]
+        )
+        streaming_mode = StreamingMode.SSE if streaming else StreamingMode.NONE
+        run_config = RunConfig(streaming_mode=streaming_mode)
+        # Logs emitidos durante o turno aparecem no painel de debug desta sessão
+        previous_session = log_session.get()
+        log_session.set(session_id)
+        try:
+            with telemetry.span("turn", "turn", session_id=session_id, streaming=streaming):
+                async for event in self.runner.run_async(
+                    user_id=user_id,
+                    session_id=session_id,
+                    new_message=content,
+                    run_config=run_config,
+                ):
+                    if not event.partial:
+                        logger.info(
+                            "ADK Event: %s (author=%s)", type(event).__name__, event.author
+                        )
+                    yield event
+        finally:
+            log_session.set(previous_session)
+
+    async def stream_turn(
+        self, user_id: str, session_id: str, user_message_text: str
+    ) -> AsyncIterator[dict]:
+        """
+        Runs a turn in streaming mode, yielding stream items (see `stream_items_of`)
+        as soon as they arrive. Errors are yielded as {"type": "error", "text"}.
+        """
+        try:
+            async for event in self.iter_events(
+                user_id, session_id, user_message_text, streaming=True
+            ):
+                for item in stream_items_of(event):
+                    yield item
+        except LookupError as e:
+            logger.error("Error: %s", e)
+            yield {"type": "error", "text": "Error: ADK session not found."}
+        except Exception as e:
+            logger.error("ADK Runner failed: %s\n%s", e, traceback.format_exc())
+            yield {"type": "error", "text": agent_error_text(e)}
+
+    async def run_turn(self, user_id: str, session_id: str, user_message_text: str) -> str:
+        """
+        Runs a single conversation turn and returns the final response text.
+        """
+        final_response_text = "[Agent did not provide a response]"
+        try:
+            async for event in self.iter_events(user_id, session_id, user_message_text):
+                text = final_response_of(event)
+                if text is not None:
+                    final_response_text = text
+                    logger.info("Agent response received: %s...", text[:50])
+                # Não interrompe aqui: ainda pode haver eventos ou transições internas
+        except LookupError as e:
+            logger.error("Error: %s", e)
+            return "Error: ADK session not found."
+        except Exception as e:
+            logger.error("ADK Runner failed: %s\n%s", e, traceback.format_exc())
+            final_response_text = agent_error_text(e)
+
+        return final_response_text
+
+    async def aclose(self) -> None:
+        """Flushes the session store and closes pooled HTTP connections."""
+        from paperless_app.agent.tools.http_client import aclose_client
+
+        close = getattr(self.session_service, "close", None)
+        if close is not None:
+            await close()
+        await aclose_client()
+
+
+class AgentRuntime(AgentService):
+    """
+    `AgentService` running on its own event loop thread, for synchronous callers.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.loop = asyncio.new_event_loop()
+        self._started = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run_loop, name="adk-runtime-loop", daemon=True
+        )
+        self._thread.start()
+        self._started.wait()
+        logger.info("ADK runtime loop started in thread '%s'.", self._thread.name)
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(self._started.set)
+        self.loop.run_forever()
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread.is_alive() and not self.loop.is_closed()
+
+    # --- Submitting work from other threads ---
+
+    def submit(self, coro: Awaitable) -> concurrent.futures.Future:
+        """Schedules a coroutine on the runtime loop and returns a thread-safe future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call(self, coro: Awaitable, timeout: float = None) -> Any:
+        """Runs a coroutine on the runtime loop and blocks until it finishes."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("AgentRuntime.call() cannot be used from the runtime loop itself.")
+        return self.submit(coro).result(timeout)
+
+    def iterate(self, agen: AsyncIterator) -> Iterator:
+        """
+        Consumes an async generator on the runtime loop and yields its items
+        synchronously, as they are produced. Closing the returned iterator early
+        cancels the producer.
+        """
+        items: queue.SimpleQueue = queue.SimpleQueue()
+        done = object()
+
+        async def pump():
+            try:
+                async for item in agen:
+                    items.put((item, None))
+            except BaseException as e:
+                items.put((done, e))
+                raise
+            finally:
+                await agen.aclose()
+            items.put((done, None))
+
+        future = self.submit(pump())
+        try:
+            while True:
+                item, error = items.get()
+                if item is done:
+                    if error is not None and not isinstance(error, asyncio.CancelledError):
+                        raise error
+                    return
+                yield item
+        finally:
+            future.cancel()
+
+    # --- Shutdown ---
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Closes pooled resources, stops the loop and joins the thread."""
+        if not self.is_running:
+            return
+        try:
+            self.call(self.aclose(), timeout)
+        except Exception as e:
+            logger.debug("Could not close runtime resources during shutdown: %s", e)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        if not self._thread.is_alive():
+            self.loop.close()
+        logger.info("ADK runtime loop stopped.")
+
+
+_runtime: Optional[AgentRuntime] = None
+_runtime_lock = threading.Lock()
+
+
+def get_runtime() -> AgentRuntime:
+    """Returns the process-wide runtime, starting it on first use."""
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None or not _runtime.is_running:
+            from paperless_app.agent.definition import get_root_agent
+
+            _runtime = AgentRuntime(get_root_agent())
+            # Front-ends síncronos (Streamlit) não têm servidor HTTP próprio para /metrics
+            telemetry.start_metrics_server()
+    return _runtime
+
+
+def _shutdown_at_exit() -> None:
+    if _runtime is not None:
+        _runtime.shutdown()
+
+
+atexit.register(_shutdown_at_exit)
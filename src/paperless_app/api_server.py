@@ -0,0 +1,268 @@
+"""
+Async HTTP API for the Paperless orchestrator.
+
+Exposes `root_agent` over FastAPI. Turns run concurrently on the server's
+event loop (bounded by API_MAX_CONCURRENT_TURNS) and can stream ADK events
+(including partial, token-level text) as Server-Sent Events.
+
+Workers are not stateless: each one keeps its sessions in memory. Running
+several workers (API_WORKERS > 1) requires SESSION_DB_PATH, so that every
+worker reads and writes sessions through the same SQLite database.
+
+Usage:
+    python -m paperless_app.api_server
+    SESSION_DB_PATH=sessions.db uvicorn paperless_app.api_server:app --workers 4
+
+Endpoints:
+    GET    /health
+    GET    /metrics                       -> Prometheus metrics of this worker
+    POST   /sessions                      -> {"session_id": ...}
+    GET    /sessions/{session_id}         -> session state
+    DELETE /sessions/{session_id}
+    POST   /sessions/{session_id}/turns   -> final response (or SSE with "stream": true)
+    POST   /run                           -> one-off turn in a temporary session
+"""
+import asyncio
+import json
+import logging
+import uuid
+import weakref
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator, Optional
+
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+
+from paperless_app import telemetry
+from paperless_app.agent_runtime import AgentService, final_response_of
+from paperless_app.config import (
+    API_HOST,
+    API_MAX_CONCURRENT_TURNS,
+    API_PORT,
+    API_WORKERS,
+    SESSION_DB_PATH,
+    ConfigError,
+    validate_config,
+)
+
+if TYPE_CHECKING:
+    from google.adk.events import Event
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_ID = "api_user"
+
+
+class SessionCreate(BaseModel):
+    user_id: str = DEFAULT_USER_ID
+    session_id: Optional[str] = None
+    state: Optional[dict] = None
+
+
+class TurnRequest(BaseModel):
+    message: str
+    user_id: str = DEFAULT_USER_ID
+    stream: bool = False
+
+
+class RunRequest(TurnRequest):
+    state: Optional[dict] = None
+
+
+def event_to_dict(event: "Event") -> dict:
+    """Compact, JSON-serializable view of an ADK event for API clients."""
+    payload = {
+        "id": event.id,
+        "author": event.author,
+        "partial": bool(event.partial),
+        "final": event.is_final_response(),
+    }
+    parts = event.content.parts if event.content and event.content.parts else []
+    text = "".join(part.text for part in parts if getattr(part, "text", None))
+    if text:
+        payload["text"] = text
+    calls = [{"name": call.name, "args": call.args} for call in event.get_function_calls()]
+    if calls:
+        payload["function_calls"] = calls
+    responses = [response.name for response in event.get_function_responses()]
+    if responses:
+        payload["function_responses"] = responses
+    if event.actions and event.actions.state_delta:
+        payload["state_delta"] = list(event.actions.state_delta)
+    return payload
+
+
+def validate_worker_config(workers: int = API_WORKERS) -> None:
+    """
+    Refuses multi-worker setups without a shared session database.
+
+    Args:
+        workers: Number of worker processes that will serve the API.
+
+    Raises:
+        ConfigError: If several workers would each keep their own sessions.
+    """
+    if workers > 1 and not SESSION_DB_PATH:
+        raise ConfigError(
+            f"API_WORKERS={workers} requires SESSION_DB_PATH: without a shared session "
+            "database each worker only sees the sessions it created itself"
+        )
+
+
+def _sse(event_name: str, data: dict) -> str:
+    return f"event: {event_name}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+class OrchestratorServer:
+    """Holds the agent service and the per-loop concurrency primitives."""
+
+    def __init__(self, service: AgentService, max_concurrent_turns: int):
+        self.service = service
+        self._turn_slots = asyncio.Semaphore(max(1, max_concurrent_turns))
+        # Um turno por sessão de cada vez; turnos de sessões diferentes rodam em paralelo
+        self._session_locks: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+
+    def _session_lock(self, session_id: str) -> asyncio.Lock:
+        lock = self._session_locks.get(session_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._session_locks[session_id] = lock
+        return lock
+
+    async def run_turn(self, request: TurnRequest, session_id: str) -> dict:
+        async with self._session_lock(session_id), self._turn_slots:
+            response = await self.service.run_turn(request.user_id, session_id, request.message)
+        return {"session_id": session_id, "response": response}
+
+    async def stream_turn(
+        self, request: TurnRequest, session_id: str, cleanup: bool = False
+    ) -> AsyncIterator[str]:
+        """Yields SSE frames for each ADK event, then a final "done" frame."""
+        final_text = None
+        try:
+            async with self._session_lock(session_id), self._turn_slots:
+                async for event in self.service.iter_events(
+                    request.user_id, session_id, request.message, streaming=True
+                ):
+                    final_text = final_response_of(event) or final_text
+                    yield _sse("event", event_to_dict(event))
+            yield _sse("done", {"session_id": session_id, "response": final_text})
+        except Exception as e:
+            logger.error(
+                "✗ Streaming turn failed for session %s: %s", session_id, e, exc_info=True
+            )
+            yield _sse("error", {"session_id": session_id, "message": str(e)})
+        finally:
+            if cleanup:
+                await self.service.delete_session(request.user_id, session_id)
+
+
+def create_app(service: AgentService = None) -> FastAPI:
+    """
+    Builds the FastAPI application. A custom `service` can be injected (e.g.
+    with another session backend); by default one is created for `root_agent`.
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        agent_service = service
+        if agent_service is None:
+            from paperless_app.agent.definition import get_root_agent
+
+            # Falha na inicialização do worker, não na primeira requisição
+            validate_config()
+            validate_worker_config()
+            agent_service = AgentService(get_root_agent())
+        app.state.server = OrchestratorServer(agent_service, API_MAX_CONCURRENT_TURNS)
+        logger.info("Orchestrator API ready (max concurrent turns: %s)", API_MAX_CONCURRENT_TURNS)
+        try:
+            yield
+        finally:
+            await agent_service.aclose()
+
+    app = FastAPI(title="Paperless Orchestrator API", lifespan=lifespan)
+
+    def server() -> OrchestratorServer:
+        return app.state.server
+
+    @app.get("/health")
+    async def health() -> dict:
+        return {"status": "ok"}
+
+    @app.get("/metrics")
+    async def metrics() -> PlainTextResponse:
+        return PlainTextResponse(
+            telemetry.render_prometheus(), media_type="text/plain; version=0.0.4"
+        )
+
+    @app.post("/sessions")
+    async def create_session(body: SessionCreate) -> dict:
+        session_id = body.session_id or f"api_session_{uuid.uuid4().hex}"
+        session = await server().service.ensure_session(body.user_id, session_id, body.state)
+        return {"session_id": session.id, "user_id": body.user_id}
+
+    @app.get("/sessions/{session_id}")
+    async def get_session(session_id: str, user_id: str = DEFAULT_USER_ID) -> dict:
+        session = await server().service.get_session(user_id, session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Session not found.")
+        return {"session_id": session.id, "user_id": user_id, "state": dict(session.state)}
+
+    @app.delete("/sessions/{session_id}")
+    async def delete_session(session_id: str, user_id: str = DEFAULT_USER_ID) -> dict:
+        await server().service.delete_session(user_id, session_id)
+        return {"status": "deleted", "session_id": session_id}
+
+    @app.post("/sessions/{session_id}/turns")
+    async def run_turn(session_id: str, body: TurnRequest):
+        if await server().service.get_session(body.user_id, session_id) is None:
+            raise HTTPException(status_code=404, detail="Session not found.")
+        if body.stream:
+            return StreamingResponse(
+                server().stream_turn(body, session_id), media_type="text/event-stream"
+            )
+        return await server().run_turn(body, session_id)
+
+    @app.post("/run")
+    async def run_once(body: RunRequest):
+        """Runs one turn in a fresh session that is deleted afterwards."""
+        session_id = f"api_run_{uuid.uuid4().hex}"
+        await server().service.ensure_session(body.user_id, session_id, body.state)
+        if body.stream:
+            return StreamingResponse(
+                server().stream_turn(body, session_id, cleanup=True),
+                media_type="text/event-stream",
+            )
+        try:
+            return await server().run_turn(body, session_id)
+        finally:
+            await server().service.delete_session(body.user_id, session_id)
+
+    return app
+
+
+app = create_app()
+
+
+def main() -> None:
+    """CLI entry point."""
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    try:
+        validate_worker_config()
+    except ConfigError as e:
+        logger.error("✗ %s", e)
+        raise SystemExit(1)
+    uvicorn.run(
+        "paperless_app.api_server:app" if API_WORKERS > 1 else app,
+        host=API_HOST,
+        port=API_PORT,
+        workers=API_WORKERS,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,76 +1,203 @@
-from paperless_app.adk_service import initialize_adk, run_adk_sync, reset_adk_session
-from paperless_app.config import TEMP_DATA_DIR
+import logging
+import time
+from collections import deque
+
 import streamlit as st
-import os
-import uuid
+
+from paperless_app.adk_service import (
+    ADK_SESSION_KEY,
+    enqueue_uploads,
+    initialize_adk,
+    list_ingest_jobs,
+    read_debug_logs,
+    reset_adk_session,
+    stream_adk_sync,
+)
+from paperless_app.config import ConfigError, validate_config
 
 MESSAGE_HISTORY_KEY = "paperless_messages"
+STREAM_CURSOR = "▌"
+LOG_VIEW_KEY = "debug_log_view"
+LOG_CLEARED_KEY = "debug_log_cleared_seq"
+LOG_LEVELS = {
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+}
+LOG_VIEW_LINES = 200
+LOG_REFRESH_SECONDS = 2
+UPLOADER_KEY = "pdf_uploader_generation"
+JOBS_REFRESH_SECONDS = 2
+JOB_STATUS_LABELS = {
+    "queued": "⏳ Na fila",
+    "analyzing": "🔍 Analisando",
+    "resolving": "🏷️ Resolvendo metadados",
+    "uploading": "⬆️ Enviando",
+    "duplicate": "♻️ Já existe no Paperless",
+    "failed": "❌ Erro",
+}
+
+def render_agent_stream(adk_runner, session_id, prompt) -> str:
+    """
+    Renders the agent's answer incrementally inside the current chat message.
+
+    Partial text is shown as it arrives and tool calls appear in a status box.
+    Returns the final response text (the last complete answer of the turn).
+    """
+    status = st.status("Agente trabalhando...", expanded=False)
+    message_placeholder = st.empty()
+    buffer = ""
+    final_text = None
+    new_message = True
+
+    for item in stream_adk_sync(adk_runner, session_id, prompt):
+        if item["type"] == "tool_call":
+            status.write(f"🔧 `{item['name']}`")
+        elif item["type"] == "error":
+            final_text = item["text"]
+            message_placeholder.markdown(final_text)
+        elif item["type"] == "text":
+            if item["partial"]:
+                # Começa uma nova resposta após uma resposta completa anterior
+                if new_message:
+                    buffer, new_message = "", False
+                buffer += item["text"]
+                message_placeholder.markdown(buffer + STREAM_CURSOR)
+            else:
+                # Evento completo: substitui os fragmentos pelo texto final agregado
+                buffer, new_message = item["text"], True
+                if item["final"]:
+                    final_text = item["text"]
+                message_placeholder.markdown(buffer)
+
+    status.update(label="Concluído", state="complete")
+    if final_text is None:
+        final_text = buffer or "[Agent did not provide a response]"
+    message_placeholder.markdown(final_text)
+    return final_text
+
+@st.fragment(run_every=LOG_REFRESH_SECONDS)
+def render_debug_logs():
+    """
+    Debug log panel. Runs as a fragment, so it refreshes on its own without
+    rerunning the app; each refresh only fetches records newer than the last
+    one shown and renders all lines as a single block.
+    """
+    level_col, scope_col = st.columns(2)
+    level = level_col.selectbox("Nível", list(LOG_LEVELS), index=1, key="debug_log_level")
+    all_sessions = scope_col.toggle("Todas as sessões", key="debug_log_all_sessions")
+
+    # Mudou o filtro ou a sessão: reconstrói a visualização a partir do buffer
+    filters = (level, all_sessions, st.session_state.get(ADK_SESSION_KEY))
+    view = st.session_state.get(LOG_VIEW_KEY)
+    if view is None or view["filters"] != filters:
+        view = st.session_state[LOG_VIEW_KEY] = {
+            "filters": filters,
+            "seq": st.session_state.get(LOG_CLEARED_KEY, 0),
+            "lines": deque(maxlen=LOG_VIEW_LINES),
+        }
 
-def handle_pdf_upload(uploaded_file, adk_runner, session_id):
-    """Saves the uploaded PDF to the temp-data folder and triggers the ingestion agent."""
-    if uploaded_file is not None:
-        try:
-            # Reset ADK session to start with a clean state for the new document
-            reset_adk_session()
-            
-            # Re-initialize to get a new runner and session_id
-            adk_runner, session_id = initialize_adk()
-            
-            os.makedirs(TEMP_DATA_DIR, exist_ok=True)
-            
-            unique_filename = f"{uuid.uuid4()}.pdf"
-            file_path = os.path.join(TEMP_DATA_DIR, unique_filename)
-            
-            with open(file_path, "wb") as f:
-                f.write(uploaded_file.getvalue())
-            
-            st.sidebar.success(f"File '{uploaded_file.name}' saved as '{unique_filename}'.")
-            
-            initial_prompt = f"Processar o arquivo: {unique_filename}"
-            
-            st.session_state[MESSAGE_HISTORY_KEY].append({"role": "user", "content": f"Arquivo '{uploaded_file.name}' enviado para processamento."})
-            
-            with st.chat_message("assistant"):
-                message_placeholder = st.empty()
-                with st.spinner("Agente está processando o documento..."):
-                    agent_response = run_adk_sync(adk_runner, session_id, initial_prompt)
-                    message_placeholder.markdown(agent_response)
-            
-            st.session_state[MESSAGE_HISTORY_KEY].append({"role": "assistant", "content": agent_response})
-            st.rerun()
-
-        except Exception as e:
-            st.sidebar.error(f"Erro ao salvar o arquivo: {e}")
+    entries = read_debug_logs(
+        after=view["seq"], min_level=LOG_LEVELS[level], all_sessions=all_sessions
+    )
+    if entries:
+        view["seq"] = entries[-1].seq
+        view["lines"].extend(entry.message for entry in entries)
+
+    if view["lines"]:
+        st.code("\n".join(reversed(view["lines"])), language=None)
+    else:
+        st.info("Nenhum log disponível ainda.")
+
+    if st.button("Limpar Logs"):
+        st.session_state[LOG_CLEARED_KEY] = view["seq"]
+        view["lines"].clear()
+        st.rerun(scope="fragment")
+
+def job_status_label(job) -> str:
+    """Status of an ingestion job for the table, including Paperless consumption."""
+    if job.status != "done":
+        return JOB_STATUS_LABELS.get(job.status, job.status)
+    if job.consumption is None:
+        return "⚙️ Processando no Paperless"
+    if job.consumption["status"] == "success":
+        return "✅ Concluído"
+    return "❌ Falhou no Paperless"
+
+@st.fragment(run_every=JOBS_REFRESH_SECONDS)
+def render_job_table():
+    """
+    Live table of this session's ingestion jobs. Polls the shared job queue
+    as a fragment, so only the table reruns while the documents process.
+    """
+    jobs = list_ingest_jobs()
+    if not jobs:
+        return
+    st.subheader("Fila de Processamento")
+    now = time.time()
+    rows = []
+    for job in reversed(jobs):
+        consumption = job.consumption or {}
+        duplicate = job.duplicate_of or {}
+        rows.append(
+            {
+                "Arquivo": job.name,
+                "Status": job_status_label(job),
+                "Documento": consumption.get("document_id") or duplicate.get("document_id"),
+                "Tempo (s)": round(
+                    job.timings.get("end_to_end")
+                    or (sum(job.timings.values()) if job.finished else now - job.submitted_at),
+                    1,
+                ),
+                "Detalhes": job.error or consumption.get("error") or "",
+            }
+        )
+    active = sum(1 for job in jobs if not job.finished)
+    st.caption(f"{len(jobs) - active} de {len(jobs)} arquivo(s) finalizados")
+    st.dataframe(rows, hide_index=True)
 
 def run_streamlit_app():
     """Sets up and runs the Streamlit web application."""
     st.set_page_config(page_title="Paperless Orchestrator", layout="wide")
     st.title("📄 Paperless Orchestrator Assistant")
 
+    # Configuração inválida: mostra o motivo em vez de um traceback
+    try:
+        validate_config()
+    except ConfigError as e:
+        st.error(f"⚙️ {e}")
+        st.stop()
+
     adk_runner, session_id = initialize_adk()
 
     with st.sidebar:
         st.header("Upload de Documentos")
-        uploaded_file = st.file_uploader("Selecione um arquivo PDF para enviar ao Paperless-NGX", type="pdf")
-        if st.button("Processar Arquivo"):
-            if uploaded_file:
-                handle_pdf_upload(uploaded_file, adk_runner, session_id)
+        # Trocar a key limpa o seletor depois de enfileirar os arquivos
+        uploader_generation = st.session_state.setdefault(UPLOADER_KEY, 0)
+        uploaded_files = st.file_uploader(
+            "Selecione arquivos PDF para enviar ao Paperless-NGX",
+            type="pdf",
+            accept_multiple_files=True,
+            key=f"pdf_uploader_{uploader_generation}",
+        )
+        if st.button("Processar Arquivos"):
+            if uploaded_files:
+                try:
+                    jobs = enqueue_uploads(uploaded_files)
+                    st.toast(f"{len(jobs)} arquivo(s) adicionados à fila de processamento.")
+                    st.session_state[UPLOADER_KEY] = uploader_generation + 1
+                    st.rerun()
+                except Exception as e:
+                    st.sidebar.error(f"Erro ao salvar os arquivos: {e}")
             else:
-                st.sidebar.warning("Por favor, selecione um arquivo PDF primeiro.")
+                st.sidebar.warning("Por favor, selecione ao menos um arquivo PDF.")
         
         st.divider()
         st.header("Ferramentas de Debug")
         with st.expander("Visualizar Logs"):
-            if "debug_logs" in st.session_state and st.session_state.debug_logs:
-                for log in reversed(st.session_state.debug_logs):
-                    st.text(log)
-            else:
-                st.info("Nenhum log disponível ainda.")
-            
-            if st.button("Limpar Logs"):
-                st.session_state.debug_logs = []
-                st.rerun()
-            
+            render_debug_logs()
+
             if st.button("Resetar Sessão de IA"):
                 reset_adk_session()
                 if MESSAGE_HISTORY_KEY in st.session_state:
@@ -78,6 +205,8 @@ def run_streamlit_app():
                 st.success("Sessão resetada com sucesso!")
                 st.rerun()
 
+    render_job_table()
+
     st.header("Chat Interativo")
     if MESSAGE_HISTORY_KEY not in st.session_state:
         st.session_state[MESSAGE_HISTORY_KEY] = []
@@ -92,10 +221,7 @@ def run_streamlit_app():
             st.markdown(prompt)
 
         with st.chat_message("assistant"):
-            message_placeholder = st.empty()
-            with st.spinner("Pensando..."):
-                agent_response = run_adk_sync(adk_runner, session_id, prompt)
-                message_placeholder.markdown(agent_response)
+            agent_response = render_agent_stream(adk_runner, session_id, prompt)
         
         st.session_state[MESSAGE_HISTORY_KEY].append({"role": "assistant", "content": agent_response})
         st.rerun()
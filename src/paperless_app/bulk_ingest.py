@@ -0,0 +1,607 @@
+"""
+Headless bulk ingestion of PDF folders into Paperless-NGX.
+
+Runs analysis (LLM), metadata resolution and upload as a staged async
+pipeline. Stages are connected by bounded queues (backpressure), each stage
+has its own concurrency limit and failed steps are retried with exponential
+backoff.
+
+The same pipeline can also run as a long-lived job queue (`start()`,
+`submit()`, `stop()`), which the Streamlit UI shares between all sessions.
+
+Usage:
+    python -m paperless_app.bulk_ingest /path/to/folder
+    python -m paperless_app.bulk_ingest "/scans/**/*.pdf" --llm-concurrency 8 --report report.json
+    python -m paperless_app.bulk_ingest /path/to/folder --wait-for-tasks
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import logging
+import random
+import shutil
+import sys
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+
+from paperless_app import telemetry
+from paperless_app.agent.definition import build_document_analyzer_agent
+from paperless_app.agent.tools import paperless_api
+from paperless_app.config import (
+    BULK_LLM_CONCURRENCY,
+    BULK_MAX_RETRIES,
+    BULK_WRITE_CONCURRENCY,
+    INGEST_QUEUE_HISTORY,
+    TASK_TRACK_TIMEOUT,
+    TEMP_DATA_DIR,
+    ConfigError,
+    validate_config,
+)
+
+logger = logging.getLogger(__name__)
+
+APP_NAME_FOR_BULK = "paperless_bulk_ingest"
+USER_ID = "bulk_ingest"
+
+_STOP = object()
+_FINISHED_STATUSES = ("done", "duplicate", "failed")
+
+
+@dataclass
+class IngestJob:
+    """State of one file moving through the pipeline."""
+
+    source: str
+    filename: Optional[str] = None
+    name: Optional[str] = None
+    owner: Optional[str] = None
+    move_source: bool = False
+    submitted_at: float = field(default_factory=time.time)
+    status: str = "queued"
+    attempts: dict = field(default_factory=dict)
+    document_info: Optional[dict] = None
+    metadata: Optional[dict] = None
+    upload_result: Optional[dict] = None
+    duplicate_of: Optional[dict] = None
+    consumption: Optional[dict] = None
+    error: Optional[str] = None
+    timings: dict = field(default_factory=dict)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in _FINISHED_STATUSES
+
+
+@dataclass
+class BulkIngestReport:
+    """Aggregated progress of a bulk run."""
+
+    total: int = 0
+    done: int = 0
+    failed: int = 0
+    duplicates: int = 0
+    consumed: int = 0
+    consume_failed: int = 0
+    in_progress: dict = field(default_factory=dict)
+    started_at: float = field(default_factory=time.time)
+    jobs: list = field(default_factory=list)
+
+    @property
+    def finished(self) -> int:
+        return self.done + self.failed
+
+    def summary(self) -> str:
+        elapsed = time.time() - self.started_at
+        rate = self.finished / elapsed if elapsed > 0 else 0.0
+        stages = ", ".join(f"{k}={v}" for k, v in self.in_progress.items() if v)
+        consumption = ""
+        if self.consumed or self.consume_failed:
+            consumption = f"consumed={self.consumed} consume_failed={self.consume_failed} "
+        return (
+            f"[{self.finished}/{self.total}] done={self.done} failed={self.failed} "
+            f"duplicates={self.duplicates} {consumption}"
+            f"{stages} ({rate:.2f} docs/s, {elapsed:.0f}s)"
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "total": self.total,
+            "done": self.done,
+            "failed": self.failed,
+            "duplicates": self.duplicates,
+            "consumed": self.consumed,
+            "consume_failed": self.consume_failed,
+            "elapsed_seconds": time.time() - self.started_at,
+            # Onde o tempo foi gasto: modelo, extração do PDF, Paperless...
+            "spans": telemetry.span_summary(),
+            "jobs": [asdict(job) for job in self.jobs],
+        }
+
+
+def collect_pdfs(target: str) -> list[Path]:
+    """
+    Expands a directory (recursively) or a glob pattern into a sorted list of PDFs.
+    """
+    path = Path(target)
+    if path.is_dir():
+        files = path.rglob("*")
+    elif path.is_file():
+        files = [path]
+    else:
+        files = (Path(p) for p in glob.glob(target, recursive=True))
+    return sorted(p for p in files if p.is_file() and p.suffix.lower() == ".pdf")
+
+
+class BulkIngestPipeline:
+    """
+    Staged ingestion pipeline: analysis → metadata → upload.
+
+    Args:
+        llm_concurrency: Concurrent LLM analyses.
+        write_concurrency: Concurrent Paperless metadata/upload workers (each stage).
+        max_retries: Retries per stage before a job is marked as failed.
+        queue_size: Capacity of the queues between stages (backpressure).
+        wait_for_tasks: Also wait for Paperless to consume the uploads. Uploads
+            are not blocked by this; task results are collected in the background.
+        on_progress: Optional callback invoked with the report after each change.
+        analyzer_agent: Agent used for the analysis stage (default: a new
+            `build_document_analyzer_agent()`), e.g. one with a different model.
+        max_history: In long-running mode, finished jobs kept in the report
+            (oldest are dropped first).
+    """
+
+    def __init__(
+        self,
+        llm_concurrency: int = BULK_LLM_CONCURRENCY,
+        write_concurrency: int = BULK_WRITE_CONCURRENCY,
+        max_retries: int = BULK_MAX_RETRIES,
+        queue_size: int = None,
+        wait_for_tasks: bool = False,
+        on_progress: Optional[Callable[[BulkIngestReport], None]] = None,
+        analyzer_agent=None,
+        max_history: int = INGEST_QUEUE_HISTORY,
+    ):
+        self.llm_concurrency = max(1, llm_concurrency)
+        self.write_concurrency = max(1, write_concurrency)
+        self.max_retries = max_retries
+        self.queue_size = queue_size or 2 * max(self.llm_concurrency, self.write_concurrency)
+        self.wait_for_tasks = wait_for_tasks
+        self.on_progress = on_progress
+        self.analyzer_agent = analyzer_agent
+        self.max_history = max_history
+        self.report = BulkIngestReport()
+        self._runner = None
+        self._inbox: Optional[asyncio.Queue] = None
+        self._service: Optional[asyncio.Future] = None
+
+    # --- Stages ---
+
+    def _get_runner(self):
+        if self._runner is None:
+            # O ADK só é carregado quando o primeiro arquivo chega à análise
+            from google.adk.runners import Runner
+            from google.adk.sessions import InMemorySessionService
+
+            agent = self.analyzer_agent or build_document_analyzer_agent()
+            telemetry.instrument_agent_tree(agent)
+            self._runner = Runner(
+                agent=agent,
+                app_name=APP_NAME_FOR_BULK,
+                session_service=InMemorySessionService(),
+            )
+        return self._runner
+
+    async def _analyze(self, job: IngestJob) -> None:
+        if job.filename is None:
+            # Duplicatas são descartadas antes de gastar LLM, upload e OCR
+            duplicate = await paperless_api.find_duplicate_file(Path(job.source))
+            if duplicate:
+                job.duplicate_of = duplicate
+                return
+            job.filename = f"{uuid.uuid4()}.pdf"
+            # Uploads da UI já são cópias temporárias: basta movê-las para temp-data
+            transfer = shutil.move if job.move_source else shutil.copyfile
+            await asyncio.to_thread(transfer, job.source, TEMP_DATA_DIR / job.filename)
+
+        runner = self._get_runner()
+        session_id = f"bulk_{uuid.uuid4().hex}"
+        await runner.session_service.create_session(
+            app_name=APP_NAME_FOR_BULK,
+            user_id=USER_ID,
+            session_id=session_id,
+            state={"filename": job.filename},
+        )
+        from google.genai import types as genai_types
+
+        try:
+            content = genai_types.Content(
+                role="user", parts=[genai_types.Part(text=f"Processar o arquivo: {job.filename}")]
+            )
+            async for _ in runner.run_async(
+                user_id=USER_ID, session_id=session_id, new_message=content
+            ):
+                pass
+            session = await runner.session_service.get_session(
+                app_name=APP_NAME_FOR_BULK, user_id=USER_ID, session_id=session_id
+            )
+            document_info = session.state.get("document_info") if session else None
+        finally:
+            await runner.session_service.delete_session(
+                app_name=APP_NAME_FOR_BULK, user_id=USER_ID, session_id=session_id
+            )
+        if not document_info:
+            raise RuntimeError("Analyzer did not save document_info.")
+        job.document_info = document_info
+
+    async def _resolve(self, job: IngestJob) -> None:
+        from paperless_app.agent.fast_path import resolve_document_metadata
+
+        resolved = await resolve_document_metadata(job.document_info)
+        if resolved["errors"]:
+            raise RuntimeError("; ".join(resolved["errors"]))
+        job.metadata = resolved
+
+    async def _upload(self, job: IngestJob) -> None:
+        from paperless_app.agent.fast_path import upload_from_state
+
+        state = {"filename": job.filename, "document_info": job.document_info, **job.metadata}
+        result = await upload_from_state(state)
+        if result["status"] == "duplicate":
+            # Outra cópia do mesmo arquivo (neste lote ou já no Paperless) foi enviada antes
+            job.duplicate_of = {"document_id": result.get("document_id")}
+            return
+        if result["status"] != "success":
+            raise RuntimeError(result["message"])
+        job.upload_result = result
+        if self.wait_for_tasks and result.get("task_id"):
+            paperless_api.task_tracker.track(
+                result["task_id"], on_done=lambda task: self._on_consumed(job, task)
+            )
+
+    def _on_consumed(self, job: IngestJob, task: dict) -> None:
+        job.consumption = task
+        # Latência ponta a ponta: análise + metadados + upload + consumo no Paperless
+        stages = sum(
+            job.timings.get(stage, 0.0) for stage in ("analyzing", "resolving", "uploading")
+        )
+        job.timings["consuming"] = task["latency_seconds"]
+        job.timings["end_to_end"] = stages + task["latency_seconds"]
+        if task["status"] == "success":
+            self.report.consumed += 1
+        else:
+            self.report.consume_failed += 1
+            logger.error("✗ Paperless failed to consume %s: %s", job.source, task.get("error"))
+        self._notify()
+
+    async def _wait_for_consumption(self) -> None:
+        # Jobs já consumidos não são consultados de novo
+        jobs = [
+            job
+            for job in self.report.jobs
+            if job.consumption is None and job.upload_result and job.upload_result.get("task_id")
+        ]
+        if not jobs:
+            return
+        logger.info("Waiting for Paperless to consume %s uploads...", len(jobs))
+
+        async def wait(job: IngestJob) -> None:
+            result = await paperless_api.task_tracker.wait(job.upload_result["task_id"])
+            if result["status"] == "unknown" and job.consumption is None:
+                # O tracker não acompanha mais a task (resultado descartado): estado final
+                logger.warning("Consumption of %s is unknown: %s", job.source, result["error"])
+                job.consumption = result
+
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(wait(job) for job in jobs)), TASK_TRACK_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Timed out waiting for Paperless consumption tasks.")
+
+    # --- Plumbing ---
+
+    def _notify(self) -> None:
+        if self.on_progress:
+            try:
+                self.on_progress(self.report)
+            except Exception as e:
+                logger.debug("Progress callback failed: %s", e)
+
+    async def _run_stage(self, name: str, step: Callable, job: IngestJob) -> bool:
+        """Runs one stage for a job with retries. Returns False if it gave up."""
+        job.status = name
+        self.report.in_progress[name] = self.report.in_progress.get(name, 0) + 1
+        self._notify()
+        started = time.perf_counter()
+        try:
+            for attempt in range(1, self.max_retries + 2):
+                job.attempts[name] = attempt
+                try:
+                    with telemetry.span(name, "stage", attempt=attempt):
+                        await step(job)
+                    return True
+                except Exception as e:
+                    job.error = f"{name}: {e}"
+                    if attempt > self.max_retries:
+                        logger.error("✗ %s failed for %s: %s", name, job.source, e)
+                        return False
+                    delay = min(30.0, 2 ** (attempt - 1)) * (0.5 + random.random())
+                    logger.warning(
+                        "%s failed for %s (attempt %s): %s. Retrying in %.1fs",
+                        name,
+                        job.source,
+                        attempt,
+                        e,
+                        delay,
+                    )
+                    await asyncio.sleep(delay)
+        finally:
+            job.timings[name] = time.perf_counter() - started
+            self.report.in_progress[name] -= 1
+
+    def _finish(self, job: IngestJob, ok: bool) -> None:
+        if ok:
+            job.status = "duplicate" if job.duplicate_of is not None else "done"
+            job.error = None
+            self.report.done += 1
+        else:
+            job.status = "failed"
+            self.report.failed += 1
+            self._discard_temp_copy(job)
+        if job.move_source:
+            # Cópia temporária que não chegou a ser movida (duplicata ou falha na análise)
+            try:
+                Path(job.source).unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning("Could not remove upload %s: %s", job.source, e)
+        self._notify()
+
+    @staticmethod
+    def _discard_temp_copy(job: IngestJob) -> None:
+        """Removes the temp-data copy of a failed job (the source file is untouched)."""
+        if job.filename:
+            try:
+                (TEMP_DATA_DIR / job.filename).unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning("Could not remove temp file %s: %s", job.filename, e)
+
+    async def _worker(
+        self, name: str, step: Callable, inbox: asyncio.Queue, outbox: Optional[asyncio.Queue]
+    ) -> None:
+        while True:
+            job = await inbox.get()
+            if job is _STOP:
+                return
+            ok = await self._run_stage(name, step, job)
+            if not ok:
+                self._finish(job, False)
+            elif job.duplicate_of is not None:
+                self.report.duplicates += 1
+                self._finish(job, True)
+            elif outbox is None:
+                self._finish(job, True)
+            else:
+                # Bloqueia quando o próximo estágio está cheio (backpressure)
+                await outbox.put(job)
+
+    async def _stage(
+        self,
+        name: str,
+        step: Callable,
+        workers: int,
+        inbox: asyncio.Queue,
+        outbox: Optional[asyncio.Queue],
+        downstream_workers: int,
+    ) -> None:
+        await asyncio.gather(*(self._worker(name, step, inbox, outbox) for _ in range(workers)))
+        if outbox is not None:
+            for _ in range(downstream_workers):
+                await outbox.put(_STOP)
+
+    def _stages(self, analysis_q: asyncio.Queue) -> asyncio.Future:
+        """Runs all stage workers until `_STOP` markers drain through `analysis_q`."""
+        metadata_q = asyncio.Queue(self.queue_size)
+        upload_q = asyncio.Queue(self.queue_size)
+        return asyncio.gather(
+            self._stage(
+                "analyzing",
+                self._analyze,
+                self.llm_concurrency,
+                analysis_q,
+                metadata_q,
+                self.write_concurrency,
+            ),
+            self._stage(
+                "resolving",
+                self._resolve,
+                self.write_concurrency,
+                metadata_q,
+                upload_q,
+                self.write_concurrency,
+            ),
+            self._stage("uploading", self._upload, self.write_concurrency, upload_q, None, 0),
+        )
+
+    async def run(self, paths: list) -> BulkIngestReport:
+        """
+        Ingests all given PDF paths and returns the final report.
+        """
+        jobs = [IngestJob(source=str(p)) for p in paths]
+        self.report = BulkIngestReport(total=len(jobs), jobs=jobs)
+        logger.info(
+            "Bulk ingest of %s files (llm=%s, write=%s, retries=%s)",
+            len(jobs),
+            self.llm_concurrency,
+            self.write_concurrency,
+            self.max_retries,
+        )
+
+        analysis_q = asyncio.Queue(self.queue_size)
+
+        async def produce():
+            for job in jobs:
+                await analysis_q.put(job)
+            for _ in range(self.llm_concurrency):
+                await analysis_q.put(_STOP)
+
+        await asyncio.gather(produce(), self._stages(analysis_q))
+        if self.wait_for_tasks:
+            await self._wait_for_consumption()
+            # Documentos consumidos entram no índice semântico em lote antes de encerrar
+            await paperless_api.flush_pending_embeddings()
+        logger.info("Bulk ingest finished: %s", self.report.summary())
+        return self.report
+
+    # --- Long-running job queue ---
+
+    @property
+    def is_running(self) -> bool:
+        return self._service is not None and not self._service.done()
+
+    async def start(self) -> None:
+        """
+        Starts the stage workers without a fixed file list; jobs are then fed
+        with `submit()`. Must run on the event loop that will process them.
+        """
+        if self.is_running:
+            return
+        self.report = BulkIngestReport()
+        self._inbox = asyncio.Queue()
+        self._service = self._stages(self._inbox)
+        logger.info(
+            "Ingestion job queue started (llm=%s, write=%s)",
+            self.llm_concurrency,
+            self.write_concurrency,
+        )
+
+    async def submit(
+        self,
+        source: str,
+        name: str = None,
+        owner: str = None,
+        move_source: bool = False,
+    ) -> IngestJob:
+        """
+        Enqueues a PDF in a started pipeline and returns its job right away.
+
+        Args:
+            source: Path of the PDF.
+            name: Display name (default: the file name of `source`).
+            owner: Who submitted it, for `jobs_for()` (e.g. a UI session).
+            move_source: `source` is a temporary copy the pipeline may move
+                into temp-data and delete when the job ends.
+        """
+        if not self.is_running:
+            raise RuntimeError("The ingestion queue is not running; call start() first.")
+        job = IngestJob(
+            source=str(source),
+            name=name or Path(source).name,
+            owner=owner,
+            move_source=move_source,
+        )
+        self._prune_history()
+        self.report.jobs.append(job)
+        self.report.total += 1
+        await self._inbox.put(job)
+        self._notify()
+        return job
+
+    def jobs_for(self, owner: str = None) -> list[IngestJob]:
+        """Jobs in the report, optionally only those submitted by `owner`."""
+        return [job for job in list(self.report.jobs) if owner is None or job.owner == owner]
+
+    def _prune_history(self) -> None:
+        """Drops the oldest finished jobs beyond `max_history`."""
+        excess = len(self.report.jobs) - self.max_history + 1
+        if not self.max_history or excess <= 0:
+            return
+        kept = []
+        for job in self.report.jobs:
+            if excess > 0 and job.finished:
+                excess -= 1
+                continue
+            kept.append(job)
+        self.report.jobs = kept
+
+    async def stop(self) -> None:
+        """Lets the queued jobs finish, then stops the workers."""
+        if self._service is None:
+            return
+        for _ in range(self.llm_concurrency):
+            await self._inbox.put(_STOP)
+        await self._service
+        self._service = None
+
+
+async def bulk_ingest(target: str, **kwargs) -> BulkIngestReport:
+    """
+    Python API: ingests every PDF in a directory or matching a glob.
+
+    Args:
+        target: Directory or glob pattern (e.g. "/scans/**/*.pdf").
+        **kwargs: Passed to `BulkIngestPipeline`.
+    """
+    paths = collect_pdfs(target)
+    return await BulkIngestPipeline(**kwargs).run(paths)
+
+
+def main(argv: list = None) -> int:
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Bulk ingest PDFs into Paperless-NGX.")
+    parser.add_argument("target", help="Directory or glob pattern of PDFs")
+    parser.add_argument("--llm-concurrency", type=int, default=BULK_LLM_CONCURRENCY)
+    parser.add_argument("--write-concurrency", type=int, default=BULK_WRITE_CONCURRENCY)
+    parser.add_argument("--retries", type=int, default=BULK_MAX_RETRIES)
+    parser.add_argument("--report", help="Write a JSON report to this path")
+    parser.add_argument(
+        "--wait-for-tasks",
+        action="store_true",
+        help="Wait until Paperless has consumed every upload and report the outcome",
+    )
+    parser.add_argument("--progress-interval", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+
+    try:
+        validate_config()
+    except ConfigError as e:
+        print(e, file=sys.stderr)
+        return 1
+    telemetry.start_metrics_server()
+    paths = collect_pdfs(args.target)
+    if not paths:
+        print(f"No PDF files found for '{args.target}'.", file=sys.stderr)
+        return 1
+
+    last_print = [0.0]
+
+    def print_progress(report: BulkIngestReport) -> None:
+        now = time.monotonic()
+        if now - last_print[0] >= args.progress_interval or report.finished == report.total:
+            last_print[0] = now
+            print(report.summary(), flush=True)
+
+    pipeline = BulkIngestPipeline(
+        llm_concurrency=args.llm_concurrency,
+        write_concurrency=args.write_concurrency,
+        max_retries=args.retries,
+        wait_for_tasks=args.wait_for_tasks,
+        on_progress=print_progress,
+    )
+    report = asyncio.run(pipeline.run(paths))
+
+    if args.report:
+        Path(args.report).write_text(json.dumps(report.to_dict(), indent=2, ensure_ascii=False))
+    return 0 if report.failed == 0 and report.consume_failed == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,13 @@
 """
 Configuration for the Paperless Orchestrator agent.
+
+Settings are read from the environment (and `.env`) once, here. Importing
+this module never fails: required settings are checked by `validate_config()`,
+which the entry points and the HTTP client call before talking to Paperless.
 """
 import os
 from pathlib import Path
+
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -16,6 +21,160 @@ TEMP_DATA_DIR = PROJECT_ROOT / "temp-data"
 # Garante que o diretório existe
 TEMP_DATA_DIR.mkdir(parents=True, exist_ok=True)
 
+# Instância do Paperless-NGX (obrigatórias; verificadas em validate_config)
+PAPERLESS_URL = os.getenv("PAPERLESS_URL")
+PAPERLESS_API_TOKEN = os.getenv("PAPERLESS_API_TOKEN")
+
 # Configuração para deletar arquivo após upload bem-sucedido
 DELETE_AFTER_UPLOAD = os.getenv("DELETE_AFTER_UPLOAD", "true").lower() == "true"
 
+
+# Pool de conexões HTTP compartilhado com o Paperless-NGX
+PAPERLESS_HTTP_MAX_CONNECTIONS = int(os.getenv("PAPERLESS_HTTP_MAX_CONNECTIONS", "20"))
+PAPERLESS_HTTP_MAX_KEEPALIVE = int(os.getenv("PAPERLESS_HTTP_MAX_KEEPALIVE", "10"))
+PAPERLESS_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("PAPERLESS_HTTP_KEEPALIVE_EXPIRY", "30"))
+PAPERLESS_HTTP_TIMEOUT = float(os.getenv("PAPERLESS_HTTP_TIMEOUT", "30"))
+PAPERLESS_HTTP2 = os.getenv("PAPERLESS_HTTP2", "true").lower() == "true"
+
+# Tempo (segundos) até revalidar o cache de correspondentes, tags e tipos de documento
+TAXONOMY_CACHE_TTL = float(os.getenv("TAXONOMY_CACHE_TTL", "300"))
+
+# Paginação das listagens do Paperless-NGX
+PAPERLESS_PAGE_SIZE = int(os.getenv("PAPERLESS_PAGE_SIZE", "1000"))
+PAPERLESS_LIST_CONCURRENCY = int(os.getenv("PAPERLESS_LIST_CONCURRENCY", "4"))
+
+# Executa os estágios de metadados e upload como código (sem chamadas ao modelo)
+INGESTION_FAST_PATH = os.getenv("INGESTION_FAST_PATH", "true").lower() == "true"
+
+# Ingestão em lote (bulk ingest)
+BULK_LLM_CONCURRENCY = int(os.getenv("BULK_LLM_CONCURRENCY", "4"))
+BULK_WRITE_CONCURRENCY = int(os.getenv("BULK_WRITE_CONCURRENCY", "8"))
+BULK_MAX_RETRIES = int(os.getenv("BULK_MAX_RETRIES", "3"))
+
+# Extração de texto de PDFs: orçamento de páginas/caracteres e paralelismo
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "5"))
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", "20000"))
+# Número de processos para extrair páginas em paralelo (0 = sem process pool)
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", "0"))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "16"))
+
+# Cache em disco (por SHA-256 do arquivo) de texto extraído e análises do documento
+EXTRACTION_CACHE_ENABLED = os.getenv("EXTRACTION_CACHE_ENABLED", "true").lower() == "true"
+EXTRACTION_CACHE_PATH = Path(
+    os.getenv("EXTRACTION_CACHE_PATH", PROJECT_ROOT / ".cache" / "extraction_cache.sqlite3")
+)
+EXTRACTION_CACHE_MAX_MB = float(os.getenv("EXTRACTION_CACHE_MAX_MB", "256"))
+
+# Verifica se o documento já existe no Paperless (checksum MD5) antes de processar
+DUPLICATE_CHECK_ENABLED = os.getenv("DUPLICATE_CHECK_ENABLED", "true").lower() == "true"
+# Checksums já vistos: segundos até reconferir no Paperless e máximo mantido em memória
+CHECKSUM_INDEX_TTL = float(os.getenv("CHECKSUM_INDEX_TTL", "300"))
+CHECKSUM_INDEX_MAX_ENTRIES = int(os.getenv("CHECKSUM_INDEX_MAX_ENTRIES", "10000"))
+
+# Tamanho máximo dos blocos lidos do disco durante o upload (streaming)
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(64 * 1024)))
+
+# Acompanhamento das tarefas de consumo do Paperless após o upload
+TASK_POLL_MIN_INTERVAL = float(os.getenv("TASK_POLL_MIN_INTERVAL", "1"))
+TASK_POLL_MAX_INTERVAL = float(os.getenv("TASK_POLL_MAX_INTERVAL", "15"))
+TASK_TRACK_TIMEOUT = float(os.getenv("TASK_TRACK_TIMEOUT", "1800"))
+
+# Servidor de API assíncrono (FastAPI/uvicorn)
+API_HOST = os.getenv("API_HOST", "0.0.0.0")
+API_PORT = int(os.getenv("API_PORT", "8000"))
+API_WORKERS = int(os.getenv("API_WORKERS", "1"))
+# Turnos de agente executando ao mesmo tempo em cada worker
+API_MAX_CONCURRENT_TURNS = int(os.getenv("API_MAX_CONCURRENT_TURNS", "32"))
+
+# Sessões do ADK: limite em memória (LRU), expiração por inatividade e persistência opcional
+SESSION_MAX_CACHED = int(os.getenv("SESSION_MAX_CACHED", "1000"))
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", str(24 * 3600)))
+# Caminho do SQLite para persistir sessões (vazio = somente memória)
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH") or None
+SESSION_FLUSH_INTERVAL = float(os.getenv("SESSION_FLUSH_INTERVAL", "1"))
+
+# Cache de resultados de busca (TTL curto + stale-while-revalidate; TTL 0 desativa)
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "60"))
+SEARCH_CACHE_STALE_TTL = float(os.getenv("SEARCH_CACHE_STALE_TTL", "300"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "256"))
+
+# Busca paginada: tamanho da página, campos pedidos ao Paperless e tamanho do trecho do conteúdo
+SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", "10"))
+SEARCH_MAX_PAGE_SIZE = int(os.getenv("SEARCH_MAX_PAGE_SIZE", "50"))
+SEARCH_FIELDS = os.getenv(
+    "SEARCH_FIELDS", "id,title,correspondent,document_type,tags,created,content,__search_hit__"
+)
+SEARCH_SNIPPET_CHARS = int(os.getenv("SEARCH_SNIPPET_CHARS", "200"))
+
+# Índice local (SQLite FTS5) para buscas por palavra-chave e filtros sem consultar o Paperless
+LOCAL_INDEX_ENABLED = os.getenv("LOCAL_INDEX_ENABLED", "false").lower() == "true"
+LOCAL_INDEX_PATH = Path(
+    os.getenv("LOCAL_INDEX_PATH", PROJECT_ROOT / ".cache" / "search_index.sqlite3")
+)
+LOCAL_INDEX_SYNC_INTERVAL = float(os.getenv("LOCAL_INDEX_SYNC_INTERVAL", "300"))
+LOCAL_INDEX_MAX_STALENESS = float(os.getenv("LOCAL_INDEX_MAX_STALENESS", "3600"))
+
+# Busca semântica: embeddings dos trechos dos documentos em matriz float16/int8 + índice IVF
+VECTOR_INDEX_ENABLED = os.getenv("VECTOR_INDEX_ENABLED", "false").lower() == "true"
+VECTOR_INDEX_DIR = Path(os.getenv("VECTOR_INDEX_DIR", PROJECT_ROOT / ".cache" / "vector_index"))
+# "hashing" (local, determinístico) ou "gemini" (modelo de embeddings da API)
+VECTOR_EMBEDDER = os.getenv("VECTOR_EMBEDDER", "hashing").lower()
+VECTOR_EMBEDDING_MODEL = os.getenv("VECTOR_EMBEDDING_MODEL", "text-embedding-004")
+VECTOR_DIM = int(os.getenv("VECTOR_DIM", "384"))
+VECTOR_DTYPE = os.getenv("VECTOR_DTYPE", "float16").lower()
+VECTOR_CHUNK_CHARS = int(os.getenv("VECTOR_CHUNK_CHARS", "1000"))
+VECTOR_CHUNK_OVERLAP = int(os.getenv("VECTOR_CHUNK_OVERLAP", "200"))
+VECTOR_EMBED_BATCH_SIZE = int(os.getenv("VECTOR_EMBED_BATCH_SIZE", "64"))
+# Abaixo deste número de trechos a busca é exata; acima, usa o índice IVF
+VECTOR_ANN_MIN_ROWS = int(os.getenv("VECTOR_ANN_MIN_ROWS", "4096"))
+VECTOR_ANN_NPROBE = int(os.getenv("VECTOR_ANN_NPROBE", "8"))
+VECTOR_TOP_K = int(os.getenv("VECTOR_TOP_K", "5"))
+
+# Telemetria: spans (agentes, modelo, ferramentas, HTTP) e métricas no formato Prometheus
+TELEMETRY_ENABLED = os.getenv("TELEMETRY_ENABLED", "true").lower() == "true"
+# Espelha os spans no OpenTelemetry (instalado junto com o google-adk)
+TELEMETRY_OTEL_ENABLED = os.getenv("TELEMETRY_OTEL_ENABLED", "true").lower() == "true"
+# Endpoint OTLP padrão do OpenTelemetry; vazio = não configura exportador próprio
+TELEMETRY_OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT") or None
+TELEMETRY_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "paperless-orchestrator")
+# Porta do endpoint /metrics para Streamlit e bulk ingest (0 = desativado)
+TELEMETRY_METRICS_PORT = int(os.getenv("TELEMETRY_METRICS_PORT", "0"))
+
+# Buffer de logs do painel de debug da UI: registros por sessão e sessões mantidas
+LOG_BUFFER_SIZE = int(os.getenv("LOG_BUFFER_SIZE", "500"))
+LOG_BUFFER_MAX_SESSIONS = int(os.getenv("LOG_BUFFER_MAX_SESSIONS", "100"))
+
+# Fila de ingestão da UI: jobs concluídos mantidos na tabela de acompanhamento
+INGEST_QUEUE_HISTORY = int(os.getenv("INGEST_QUEUE_HISTORY", "200"))
+
+
+class ConfigError(ValueError):
+    """Raised by `validate_config()` when required settings are missing or invalid."""
+
+
+_validated = False
+
+
+def validate_config() -> None:
+    """
+    Checks the settings the app cannot run without. The check runs once per
+    process; later calls return immediately.
+
+    Raises:
+        ConfigError: Listing every missing or invalid setting.
+    """
+    global _validated
+    if _validated:
+        return
+    problems = []
+    if not PAPERLESS_URL:
+        problems.append("PAPERLESS_URL is not set")
+    elif not PAPERLESS_URL.startswith(("http://", "https://")):
+        problems.append(f"PAPERLESS_URL must be an http(s) URL (got {PAPERLESS_URL!r})")
+    if not PAPERLESS_API_TOKEN:
+        problems.append("PAPERLESS_API_TOKEN is not set")
+    if VECTOR_INDEX_ENABLED and VECTOR_DTYPE not in ("float16", "int8"):
+        problems.append(f"VECTOR_DTYPE must be float16 or int8 (got {VECTOR_DTYPE!r})")
+    if problems:
+        raise ConfigError("Invalid configuration (check the .env file): " + "; ".join(problems))
+    _validated = True
@@ -0,0 +1,87 @@
+"""
+Synchronizes the local search indexes with Paperless-NGX: the full-text index
+(`agent.tools.local_index`, LOCAL_INDEX_ENABLED) and the semantic vector index
+(`agent.tools.vector_index`, VECTOR_INDEX_ENABLED).
+
+The agent already refreshes them in the background when they get older than
+LOCAL_INDEX_SYNC_INTERVAL; this CLI is for the initial build and for keeping
+them warm from cron or a sidecar process.
+
+Usage:
+    python -m paperless_app.index_sync
+    python -m paperless_app.index_sync --full
+    python -m paperless_app.index_sync --watch 120
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+
+from paperless_app.agent.tools import paperless_api
+from paperless_app.agent.tools.http_client import aclose_client
+from paperless_app.agent.tools.local_index import get_local_index
+from paperless_app.config import ConfigError, validate_config
+
+
+async def _sync_all(full: bool) -> dict:
+    syncs = {}
+    if get_local_index() is not None:
+        syncs["fulltext"] = paperless_api.sync_local_index
+    if paperless_api.get_vector_index() is not None:
+        syncs["vectors"] = paperless_api.sync_vector_index
+    if not syncs:
+        return {
+            "status": "error",
+            "message": "✗ No local index is enabled (LOCAL_INDEX_ENABLED, VECTOR_INDEX_ENABLED).",
+        }
+    results = {name: await sync(full=full) for name, sync in syncs.items()}
+    ok = all(result["status"] == "success" for result in results.values())
+    return {"status": "success" if ok else "error", **results}
+
+
+async def _run(full: bool, watch: float) -> dict:
+    try:
+        result = await _sync_all(full)
+        while watch and result["status"] == "success":
+            await asyncio.sleep(watch)
+            result = await _sync_all(full=False)
+        return result
+    finally:
+        await aclose_client()
+
+
+def main(argv: list = None) -> int:
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Sync the local Paperless search indexes.")
+    parser.add_argument(
+        "--full", action="store_true", help="Re-read every document instead of the delta"
+    )
+    parser.add_argument(
+        "--watch",
+        type=float,
+        default=0,
+        metavar="SECONDS",
+        help="Keep running, syncing the delta every SECONDS",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+
+    try:
+        validate_config()
+    except ConfigError as e:
+        print(e, file=sys.stderr)
+        return 1
+    try:
+        result = asyncio.run(_run(args.full, args.watch))
+    except KeyboardInterrupt:
+        return 0
+    print(json.dumps(result, ensure_ascii=False))
+    return 0 if result["status"] == "success" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""
+In-memory ring buffer of log records for the debug panel of the UI.
+
+Loggers hand records to a `QueueHandler`, so logging from the agent loop (or
+any other thread) is a non-blocking queue put. A `QueueListener` thread then
+writes them to stdout and into bounded `deque`s: one for every record and one
+per ADK session. Records emitted while an agent turn runs are tagged with its
+session through the `log_session` context variable, which `AgentService`
+sets for the duration of the turn.
+
+The listener thread is the only writer and `deque.append` is atomic, so
+neither side takes a lock. Readers poll with `read(after=seq)` and only get
+records newer than the last one they rendered.
+"""
+import atexit
+import contextvars
+import itertools
+import logging
+import logging.handlers
+import queue
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Optional
+
+from paperless_app.config import LOG_BUFFER_MAX_SESSIONS, LOG_BUFFER_SIZE
+
+# Sessão ADK do turno em execução; registros emitidos nesse contexto vão para ela
+log_session: contextvars.ContextVar = contextvars.ContextVar("log_session", default=None)
+
+
+@dataclass(frozen=True)
+class LogEntry:
+    """A formatted log record. `seq` increases monotonically across the buffer."""
+
+    seq: int
+    created: float
+    levelno: int
+    levelname: str
+    name: str
+    message: str
+    session: Optional[str] = None
+
+
+class LogBuffer:
+    """
+    Bounded log history, globally and per session.
+
+    Args:
+        maxlen: Records kept per deque (the global one and each session's).
+        max_sessions: Sessions kept; the least recently active one is dropped.
+    """
+
+    def __init__(self, maxlen: int = LOG_BUFFER_SIZE, max_sessions: int = LOG_BUFFER_MAX_SESSIONS):
+        self.maxlen = maxlen
+        self.max_sessions = max_sessions
+        self._all: deque = deque(maxlen=maxlen)
+        self._sessions: OrderedDict = OrderedDict()
+        self._seq = itertools.count(1)
+        self.last_seq = 0
+
+    def append(self, record: logging.LogRecord, message: str) -> LogEntry:
+        """Stores a record. Only called from the listener thread."""
+        session = getattr(record, "log_session", None)
+        entry = LogEntry(
+            seq=next(self._seq),
+            created=record.created,
+            levelno=record.levelno,
+            levelname=record.levelname,
+            name=record.name,
+            message=message,
+            session=session,
+        )
+        self._all.append(entry)
+        if session is not None:
+            entries = self._sessions.get(session)
+            if entries is None:
+                entries = self._sessions[session] = deque(maxlen=self.maxlen)
+                if len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(session)
+            entries.append(entry)
+        self.last_seq = entry.seq
+        return entry
+
+    def read(
+        self,
+        session: Optional[str] = None,
+        after: int = 0,
+        min_level: int = logging.NOTSET,
+        limit: int = None,
+    ) -> list[LogEntry]:
+        """
+        Records newer than `after`, oldest first.
+
+        Args:
+            session: Only this ADK session's records (default: all records).
+            after: Sequence number of the last record already seen.
+            min_level: Minimum level, e.g. `logging.WARNING`.
+            limit: Keep only the newest `limit` records.
+        """
+        entries = self._all if session is None else self._sessions.get(session, ())
+        # tuple() copia a deque em C, sem ceder o GIL: é um snapshot consistente
+        snapshot = tuple(entries)
+        new = []
+        for entry in reversed(snapshot):
+            if entry.seq <= after or (limit is not None and len(new) >= limit):
+                break
+            if entry.levelno >= min_level:
+                new.append(entry)
+        new.reverse()
+        return new
+
+
+class _SessionFilter(logging.Filter):
+    """Tags records with the session of the emitting context (runs in the emitting thread)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.log_session = log_session.get()
+        return True
+
+
+class _BufferHandler(logging.Handler):
+    def __init__(self, buffer: LogBuffer):
+        super().__init__()
+        self.buffer = buffer
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.buffer.append(record, self.format(record))
+        except Exception:
+            self.handleError(record)
+
+
+_buffer: Optional[LogBuffer] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def install(
+    logger: logging.Logger,
+    handlers: list = (),
+    formatter: logging.Formatter = None,
+) -> LogBuffer:
+    """
+    Routes `logger` through a queue into the ring buffer and `handlers`.
+    Idempotent: the first call wins, later calls return the same buffer.
+
+    Args:
+        logger: Logger whose records are captured (e.g. "paperless_app").
+        handlers: Extra handlers run on the listener thread (e.g. stdout).
+        formatter: Format of buffered messages (default: "LEVEL: message").
+    """
+    global _buffer, _listener
+    if _buffer is not None:
+        return _buffer
+
+    _buffer = LogBuffer()
+    buffer_handler = _BufferHandler(_buffer)
+    buffer_handler.setFormatter(formatter or logging.Formatter("%(levelname)s: %(message)s"))
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(records)
+    queue_handler.addFilter(_SessionFilter())
+
+    logger.handlers.clear()
+    logger.addHandler(queue_handler)
+    _listener = logging.handlers.QueueListener(
+        records, buffer_handler, *handlers, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _buffer
+
+
+def get_log_buffer() -> Optional[LogBuffer]:
+    """The buffer set up by `install()`, or None if logging is not routed through it."""
+    return _buffer
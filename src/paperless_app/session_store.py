@@ -0,0 +1,471 @@
+"""
+Bounded, optionally persistent ADK session service.
+
+`InMemorySessionService` keeps every session forever, so a long-running
+process grows without bound and loses everything on restart. This service
+keeps at most SESSION_MAX_CACHED sessions in memory (LRU), expires sessions
+idle for longer than SESSION_IDLE_TTL and, when SESSION_DB_PATH is set,
+persists sessions to SQLite (WAL mode). Events and state changes are written
+in batches every SESSION_FLUSH_INTERVAL seconds, and several worker
+processes can share one database.
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.state import State
+
+from paperless_app.config import (
+    SESSION_DB_PATH,
+    SESSION_FLUSH_INTERVAL,
+    SESSION_IDLE_TTL,
+    SESSION_MAX_CACHED,
+)
+
+logger = logging.getLogger(__name__)
+
+_SWEEP_INTERVAL = 60.0
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS sessions ("
+    " app_name TEXT NOT NULL, user_id TEXT NOT NULL, id TEXT NOT NULL,"
+    " state TEXT NOT NULL, update_time REAL NOT NULL,"
+    " PRIMARY KEY (app_name, user_id, id))",
+    "CREATE INDEX IF NOT EXISTS sessions_update_time ON sessions (update_time)",
+    "CREATE TABLE IF NOT EXISTS events ("
+    " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+    " app_name TEXT NOT NULL, user_id TEXT NOT NULL, session_id TEXT NOT NULL,"
+    " data TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS events_session ON events (app_name, user_id, session_id, seq)",
+    "CREATE TABLE IF NOT EXISTS scoped_state ("
+    " app_name TEXT NOT NULL, user_id TEXT NOT NULL, state TEXT NOT NULL,"
+    " PRIMARY KEY (app_name, user_id))",
+)
+
+
+class _SQLiteSessionStore:
+    """Blocking SQLite persistence; called through `asyncio.to_thread`."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    def load(self, app_name: str, user_id: str, session_id: str) -> Optional[tuple]:
+        """Returns (state, update_time, events) or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state, update_time FROM sessions"
+                " WHERE app_name = ? AND user_id = ? AND id = ?",
+                (app_name, user_id, session_id),
+            ).fetchone()
+            if row is None:
+                return None
+            events = self._conn.execute(
+                "SELECT data FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?"
+                " ORDER BY seq",
+                (app_name, user_id, session_id),
+            ).fetchall()
+        return json.loads(row[0]), row[1], [Event.model_validate_json(data) for (data,) in events]
+
+    def update_time(self, app_name: str, user_id: str, session_id: str) -> Optional[float]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT update_time FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+                (app_name, user_id, session_id),
+            ).fetchone()
+        return row[0] if row else None
+
+    def load_scoped(self, app_name: str, user_id: str) -> dict:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state FROM scoped_state WHERE app_name = ? AND user_id = ?",
+                (app_name, user_id),
+            ).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def list_ids(self, app_name: str, user_id: str) -> list[tuple]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, update_time FROM sessions WHERE app_name = ? AND user_id = ?",
+                (app_name, user_id),
+            ).fetchall()
+
+    def write_batch(self, sessions: list[tuple], events: list[tuple], scoped: list[tuple]) -> None:
+        """Writes a batch of session snapshots, new events and scoped state in one transaction."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sessions (app_name, user_id, id, state, update_time)"
+                " VALUES (?, ?, ?, ?, ?)",
+                sessions,
+            )
+            self._conn.executemany(
+                "INSERT INTO events (app_name, user_id, session_id, data) VALUES (?, ?, ?, ?)",
+                events,
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO scoped_state (app_name, user_id, state) VALUES (?, ?, ?)",
+                scoped,
+            )
+
+    def delete(self, app_name: str, user_id: str, session_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+                (app_name, user_id, session_id),
+            )
+            self._conn.execute(
+                "DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                (app_name, user_id, session_id),
+            )
+
+    def purge_idle(self, older_than: float) -> int:
+        """Deletes sessions (and their events) last updated before `older_than`."""
+        with self._lock, self._conn:
+            expired = self._conn.execute(
+                "SELECT app_name, user_id, id FROM sessions WHERE update_time < ?", (older_than,)
+            ).fetchall()
+            self._conn.executemany(
+                "DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                expired,
+            )
+            self._conn.execute("DELETE FROM sessions WHERE update_time < ?", (older_than,))
+        return len(expired)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class BoundedSessionService(BaseSessionService):
+    """
+    Session service with LRU/TTL eviction and optional SQLite persistence.
+
+    Args:
+        max_cached: Maximum sessions kept in memory. Without persistence, the
+            least recently used session beyond this limit is dropped.
+        idle_ttl: Seconds without activity after which a session expires
+            (0 = never).
+        db_path: SQLite file for persistence, or None for memory only.
+        flush_interval: Seconds over which writes are batched.
+    """
+
+    def __init__(
+        self,
+        max_cached: int = SESSION_MAX_CACHED,
+        idle_ttl: float = SESSION_IDLE_TTL,
+        db_path: Optional[Path] = None,
+        flush_interval: float = SESSION_FLUSH_INTERVAL,
+    ):
+        self.max_cached = max(1, max_cached)
+        self.idle_ttl = idle_ttl
+        self.flush_interval = flush_interval
+        self._store = _SQLiteSessionStore(db_path) if db_path else None
+        # (app_name, user_id, session_id) -> Session, em ordem de uso (LRU)
+        self._sessions: "OrderedDict[tuple, Session]" = OrderedDict()
+        self._last_access: dict[tuple, float] = {}
+        # Estado com prefixo app:/user:, compartilhado entre sessões
+        self._app_state: dict[str, dict] = {}
+        self._user_state: dict[tuple, dict] = {}
+        self._pending_events: list[tuple] = []
+        # Sessões com alterações ainda não gravadas (mantidas mesmo se saírem do LRU)
+        self._dirty_sessions: dict[tuple, Session] = {}
+        self._dirty_scopes: set = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._last_sweep = time.monotonic()
+        self.stats = {"evicted": 0, "expired": 0, "loaded": 0, "flushes": 0}
+
+    # --- BaseSessionService API ---
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session_id = (session_id or "").strip() or str(uuid.uuid4())
+        key = (app_name, user_id, session_id)
+        await self._ensure_scoped_loaded(app_name, user_id)
+        session = Session(
+            id=session_id,
+            app_name=app_name,
+            user_id=user_id,
+            state={},
+            events=[],
+            last_update_time=time.time(),
+        )
+        self._apply_state(session, key, state or {})
+        self._remember(key, session)
+        self._mark_dirty(key, session)
+        return self._merged_copy(session)
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        key = (app_name, user_id, session_id)
+        self._sweep()
+        session = await self._load(key)
+        if session is None:
+            return None
+        copy = self._merged_copy(session)
+        if config:
+            if config.num_recent_events:
+                copy.events = copy.events[-config.num_recent_events :]
+            if config.after_timestamp:
+                copy.events = [e for e in copy.events if e.timestamp >= config.after_timestamp]
+        return copy
+
+    async def list_sessions(self, *, app_name: str, user_id: str) -> ListSessionsResponse:
+        sessions = {}
+        if self._store is not None:
+            await self.flush()
+            for session_id, update_time in await asyncio.to_thread(
+                self._store.list_ids, app_name, user_id
+            ):
+                sessions[session_id] = update_time
+        for (app, user, session_id), session in self._sessions.items():
+            if app == app_name and user == user_id:
+                sessions[session_id] = session.last_update_time
+        return ListSessionsResponse(
+            sessions=[
+                Session(
+                    id=session_id,
+                    app_name=app_name,
+                    user_id=user_id,
+                    state={},
+                    events=[],
+                    last_update_time=update_time,
+                )
+                for session_id, update_time in sessions.items()
+            ]
+        )
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        key = (app_name, user_id, session_id)
+        self._forget(key)
+        self._pending_events = [row for row in self._pending_events if row[:3] != key]
+        self._dirty_sessions.pop(key, None)
+        if self._store is not None:
+            await asyncio.to_thread(self._store.delete, *key)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        event = await super().append_event(session=session, event=event)
+        if event.partial:
+            return event
+        key = (session.app_name, session.user_id, session.id)
+        stored = self._sessions.get(key)
+        if stored is None:
+            stored = await self._load(key)
+        if stored is not None and stored is not session:
+            if event.actions and event.actions.state_delta:
+                self._apply_state(stored, key, event.actions.state_delta)
+            stored.events.append(event)
+            stored.last_update_time = event.timestamp
+            self._touch(key)
+        session.last_update_time = event.timestamp
+        if self._store is not None and stored is not None:
+            self._pending_events.append((*key, event.model_dump_json(exclude_none=True)))
+            self._mark_dirty(key, stored)
+        return event
+
+    # --- Memory management ---
+
+    def _remember(self, key: tuple, session: Session) -> None:
+        self._sessions[key] = session
+        self._touch(key)
+        while len(self._sessions) > self.max_cached:
+            old_key, _ = self._sessions.popitem(last=False)
+            self._last_access.pop(old_key, None)
+            self.stats["evicted"] += 1
+            if self._store is None:
+                logger.info("Session %s evicted (memory limit).", old_key[2])
+
+    def _touch(self, key: tuple) -> None:
+        if key in self._sessions:
+            self._sessions.move_to_end(key)
+            self._last_access[key] = time.monotonic()
+
+    def _forget(self, key: tuple) -> None:
+        self._sessions.pop(key, None)
+        self._last_access.pop(key, None)
+
+    def _sweep(self) -> None:
+        """Drops sessions idle for longer than `idle_ttl` (at most once a minute)."""
+        now = time.monotonic()
+        if not self.idle_ttl or now - self._last_sweep < _SWEEP_INTERVAL:
+            return
+        self._last_sweep = now
+        expired = [
+            key
+            for key, last_access in self._last_access.items()
+            if now - last_access > self.idle_ttl and key not in self._dirty_sessions
+        ]
+        for key in expired:
+            self._forget(key)
+        self.stats["expired"] += len(expired)
+        if self._store is not None:
+            self._schedule_flush(purge=True)
+
+    async def _load(self, key: tuple) -> Optional[Session]:
+        """Returns the stored session, loading it from SQLite if needed."""
+        session = self._sessions.get(key) or self._dirty_sessions.get(key)
+        if session is not None and (self._store is None or key in self._dirty_sessions):
+            self._touch(key)
+            return session
+        if self._store is None:
+            return None
+
+        if session is not None:
+            # Outro worker pode ter atualizado a sessão no banco
+            update_time = await asyncio.to_thread(self._store.update_time, *key)
+            if update_time is None:
+                self._forget(key)
+                return None
+            if update_time <= session.last_update_time:
+                self._touch(key)
+                return session
+
+        loaded = await asyncio.to_thread(self._store.load, *key)
+        if loaded is None:
+            return None
+        state, update_time, events = loaded
+        await self._ensure_scoped_loaded(key[0], key[1], force=True)
+        session = Session(
+            id=key[2],
+            app_name=key[0],
+            user_id=key[1],
+            state=state,
+            events=events,
+            last_update_time=update_time,
+        )
+        self._remember(key, session)
+        self.stats["loaded"] += 1
+        return session
+
+    # --- State scoping (app:/user:/temp:) ---
+
+    async def _ensure_scoped_loaded(self, app_name: str, user_id: str, force: bool = False):
+        if self._store is None:
+            return
+        if force or app_name not in self._app_state:
+            self._app_state[app_name] = await asyncio.to_thread(
+                self._store.load_scoped, app_name, ""
+            )
+        if force or (app_name, user_id) not in self._user_state:
+            self._user_state[(app_name, user_id)] = await asyncio.to_thread(
+                self._store.load_scoped, app_name, user_id
+            )
+
+    def _apply_state(self, session: Session, key: tuple, delta: dict) -> None:
+        app_name, user_id, _ = key
+        for name, value in delta.items():
+            if name.startswith(State.TEMP_PREFIX):
+                continue
+            if name.startswith(State.APP_PREFIX):
+                self._app_state.setdefault(app_name, {})[name[len(State.APP_PREFIX) :]] = value
+                self._dirty_scopes.add((app_name, ""))
+            elif name.startswith(State.USER_PREFIX):
+                user_state = self._user_state.setdefault((app_name, user_id), {})
+                user_state[name[len(State.USER_PREFIX) :]] = value
+                self._dirty_scopes.add((app_name, user_id))
+            else:
+                session.state[name] = value
+
+    def _merged_copy(self, session: Session) -> Session:
+        """Copy handed to the Runner: session state plus app:/user: scoped state."""
+        state = dict(session.state)
+        for name, value in self._app_state.get(session.app_name, {}).items():
+            state[State.APP_PREFIX + name] = value
+        for name, value in self._user_state.get((session.app_name, session.user_id), {}).items():
+            state[State.USER_PREFIX + name] = value
+        return Session(
+            id=session.id,
+            app_name=session.app_name,
+            user_id=session.user_id,
+            state=state,
+            events=list(session.events),
+            last_update_time=session.last_update_time,
+        )
+
+    # --- Batched persistence ---
+
+    def _mark_dirty(self, key: tuple, session: Session) -> None:
+        if self._store is None:
+            return
+        self._dirty_sessions[key] = session
+        self._schedule_flush()
+
+    def _schedule_flush(self, purge: bool = False) -> None:
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_later(purge))
+
+    async def _flush_later(self, purge: bool) -> None:
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+        if purge and self.idle_ttl:
+            purged = await asyncio.to_thread(self._store.purge_idle, time.time() - self.idle_ttl)
+            if purged:
+                logger.info("Purged %s idle sessions from the session store.", purged)
+
+    async def flush(self) -> None:
+        """Writes all pending events and state changes in a single transaction."""
+        if self._store is None or not (self._dirty_sessions or self._dirty_scopes):
+            return
+        sessions = [
+            (*key, json.dumps(session.state, default=str), session.last_update_time)
+            for key, session in self._dirty_sessions.items()
+        ]
+        scoped = []
+        for app_name, user_id in self._dirty_scopes:
+            state = (
+                self._app_state.get(app_name, {})
+                if user_id == ""
+                else self._user_state.get((app_name, user_id), {})
+            )
+            scoped.append((app_name, user_id, json.dumps(state, default=str)))
+        events = self._pending_events
+        self._pending_events = []
+        self._dirty_sessions = {}
+        self._dirty_scopes = set()
+        try:
+            await asyncio.to_thread(self._store.write_batch, sessions, events, scoped)
+            self.stats["flushes"] += 1
+        except sqlite3.Error as e:
+            logger.error("✗ Could not persist sessions: %s", e)
+
+    async def close(self) -> None:
+        """Flushes pending writes and closes the database."""
+        await self.flush()
+        if self._store is not None:
+            self._store.close()
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "cached": len(self._sessions), "persistent": self._store is not None}
+
+
+def build_session_service() -> BoundedSessionService:
+    """Creates the session service configured by the SESSION_* settings."""
+    return BoundedSessionService(db_path=SESSION_DB_PATH)
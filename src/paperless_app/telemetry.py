@@ -0,0 +1,647 @@
+"""
+Tracing spans and Prometheus-style metrics for the agent pipeline.
+
+Spans cover each agent run, model call, tool call, HTTP request to
+Paperless-NGX and pipeline stage (e.g. PDF text extraction). They record
+wall time plus attributes such as model token usage, HTTP bytes and cache
+hits. Every finished span feeds the `paperless_span_duration_seconds`
+histogram, rendered in the Prometheus text format by `render_prometheus()`
+(served at `/metrics` by the API server, or by `start_metrics_server()`).
+
+When OpenTelemetry is installed (it ships with google-adk), spans are also
+mirrored to the OpenTelemetry tracer, nested under ADK's own spans; set
+OTEL_EXPORTER_OTLP_ENDPOINT to export them over OTLP.
+
+Agents are instrumented through their ADK callbacks (`instrument_agent_tree`),
+so no agent code has to change.
+"""
+import bisect
+import contextvars
+import inspect
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Iterator, Optional
+
+from paperless_app.config import (
+    TELEMETRY_ENABLED,
+    TELEMETRY_METRICS_PORT,
+    TELEMETRY_OTEL_ENABLED,
+    TELEMETRY_OTLP_ENDPOINT,
+    TELEMETRY_SERVICE_NAME,
+)
+
+try:
+    from opentelemetry import trace as otel_trace
+    from opentelemetry.trace import Status, StatusCode
+except ImportError:  # pragma: no cover - opentelemetry vem com o google-adk
+    otel_trace = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+# --- Metrics ---
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels_text(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    def __init__(self, name: str, documentation: str, label_names: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self) -> dict:
+        """Current values keyed by label tuple."""
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels_text(self.label_names, key)} {value}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels (Prometheus semantics)."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: tuple = (),
+        buckets: tuple = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [contagem por bucket..., soma, contagem]
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def summary(self) -> dict:
+        """labels -> {"count", "sum", "mean"} for every series."""
+        with self._lock:
+            return {
+                key: {
+                    "count": series[-1],
+                    "sum": round(series[-2], 6),
+                    "mean": round(series[-2] / series[-1], 6) if series[-1] else 0.0,
+                }
+                for key, series in self._series.items()
+            }
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    labels = _labels_text(self.label_names, key, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _labels_text(self.label_names, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+                labels = _labels_text(self.label_names, key)
+                lines.append(f"{self.name}_sum{labels} {series[-2]}")
+                lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+SPAN_DURATION = Histogram(
+    "paperless_span_duration_seconds",
+    "Wall time of agent runs, model calls, tool calls, HTTP requests and pipeline stages.",
+    ("kind", "name", "status"),
+)
+LLM_TOKENS = Counter(
+    "paperless_llm_tokens_total", "Model tokens used, by agent and type.", ("agent", "type")
+)
+HTTP_BYTES = Counter(
+    "paperless_http_bytes_total",
+    "Bytes sent to and received from Paperless-NGX.",
+    ("route", "direction"),
+)
+CACHE_REQUESTS = Counter(
+    "paperless_cache_requests_total", "Cache lookups by cache and result.", ("cache", "result")
+)
+HTTP_POOL_WAIT = Histogram(
+    "paperless_http_pool_wait_seconds",
+    "Time HTTP requests waited for a pooled connection (or HTTP/2 stream) to Paperless-NGX.",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+METRICS = [SPAN_DURATION, LLM_TOKENS, HTTP_BYTES, CACHE_REQUESTS, HTTP_POOL_WAIT]
+
+
+def render_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def span_summary() -> dict:
+    """
+    Aggregated span timings, e.g. {"llm document_analyzer_agent": {"count",
+    "sum", "mean"}}, for reports such as the bulk ingest JSON.
+    """
+    summary: dict[str, dict] = {}
+    for (kind, name, status), stats in SPAN_DURATION.summary().items():
+        entry = summary.setdefault(f"{kind} {name}", {"count": 0, "sum": 0.0, "errors": 0})
+        entry["count"] += stats["count"]
+        entry["sum"] = round(entry["sum"] + stats["sum"], 6)
+        if status != "ok":
+            entry["errors"] += stats["count"]
+    for entry in summary.values():
+        entry["mean"] = round(entry["sum"] / entry["count"], 6) if entry["count"] else 0.0
+    return dict(sorted(summary.items(), key=lambda item: -item[1]["sum"]))
+
+
+# --- Tracing ---
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("telemetry_span", default=None)
+_span_listeners: list = []
+_tracer = None
+_tracer_configured = False
+_tracer_lock = threading.Lock()
+
+
+def _get_tracer():
+    """OpenTelemetry tracer, configuring an OTLP exporter on first use if requested."""
+    global _tracer, _tracer_configured
+    if otel_trace is None or not TELEMETRY_OTEL_ENABLED:
+        return None
+    if _tracer_configured:
+        return _tracer
+    with _tracer_lock:
+        if not _tracer_configured:
+            if TELEMETRY_OTLP_ENDPOINT:
+                _configure_otlp_exporter()
+            _tracer = otel_trace.get_tracer("paperless_app")
+            _tracer_configured = True
+    return _tracer
+
+
+def _configure_otlp_exporter() -> None:
+    try:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError as e:
+        logger.warning("OTLP export requested but the exporter is not installed: %s", e)
+        return
+    provider = TracerProvider(resource=Resource.create({"service.name": TELEMETRY_SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    otel_trace.set_tracer_provider(provider)
+    logger.info("Exporting traces over OTLP to %s", TELEMETRY_OTLP_ENDPOINT)
+
+
+def _otel_value(value: Any) -> Any:
+    if isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+class Span:
+    """
+    A timed unit of work. Use `span()` as a context manager; `start_span()`
+    and `Span.end()` are for work that starts and ends in different callbacks.
+    """
+
+    def __init__(self, name: str, kind: str, attributes: dict, parent: Optional["Span"]):
+        self.name = name
+        self.kind = kind
+        self.attributes = {k: v for k, v in attributes.items() if v is not None}
+        self.parent = parent
+        self.start = time.perf_counter()
+        self.duration: Optional[float] = None
+        self._otel = None
+        tracer = _get_tracer()
+        if tracer is not None:
+            context = None
+            if parent is not None and parent._otel is not None:
+                context = otel_trace.set_span_in_context(parent._otel)
+            self._otel = tracer.start_span(
+                f"{kind} {name}",
+                context=context,
+                attributes={k: _otel_value(v) for k, v in self.attributes.items()},
+            )
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is None:
+            return
+        self.attributes[key] = value
+        if self._otel is not None:
+            self._otel.set_attribute(key, _otel_value(value))
+
+    def end(self, error: BaseException = None, status: str = None) -> None:
+        """Finishes the span (idempotent) and records its duration."""
+        if self.duration is not None:
+            return
+        self.duration = time.perf_counter() - self.start
+        status = status or ("error" if error is not None else "ok")
+        SPAN_DURATION.observe(self.duration, kind=self.kind, name=self.name, status=status)
+        for listener in _span_listeners:
+            listener(self, status)
+        if self._otel is not None:
+            if error is not None:
+                self._otel.record_exception(error)
+                self._otel.set_status(Status(StatusCode.ERROR, str(error)))
+            self._otel.end()
+
+
+class _NoopSpan(Span):
+    def __init__(self):
+        self.name = self.kind = ""
+        self.attributes = {}
+        self.parent = None
+        self.duration = 0.0
+        self._otel = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def end(self, error: BaseException = None, status: str = None) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def add_span_listener(listener: Callable[[Span, str], None]) -> None:
+    """
+    Registers a callable invoked with every finished span and its status,
+    e.g. to keep raw durations for percentiles (the histogram only has buckets).
+    """
+    _span_listeners.append(listener)
+
+
+def remove_span_listener(listener: Callable[[Span, str], None]) -> None:
+    if listener in _span_listeners:
+        _span_listeners.remove(listener)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def start_span(name: str, kind: str, parent: Span = None, **attributes) -> Span:
+    """Starts a span (child of `parent` or of the current span). Call `end()` on it."""
+    if not TELEMETRY_ENABLED:
+        return _NOOP_SPAN
+    return Span(name, kind, attributes, parent or _current_span.get())
+
+
+@contextmanager
+def span(name: str, kind: str = "stage", **attributes) -> Iterator[Span]:
+    """Times the enclosed block as a span that is current while the block runs."""
+    current = start_span(name, kind, **attributes)
+    previous = _current_span.get()
+    # set() em vez de reset(token): o bloco pode terminar em outro contexto (async generators)
+    _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.end(error=e)
+        raise
+    finally:
+        _current_span.set(previous)
+        current.end()
+
+
+def record_cache(cache: str, result: str) -> None:
+    """Counts a cache lookup ("hit", "miss", "stale", ...) and tags the current span."""
+    if not TELEMETRY_ENABLED:
+        return
+    CACHE_REQUESTS.inc(cache=cache, result=result)
+    current = _current_span.get()
+    if current is not None:
+        current.set_attribute(f"cache.{cache}", result)
+
+
+def record_tokens(agent: str, usage) -> dict:
+    """Counts the token usage of one model response (`usage_metadata`)."""
+    tokens = {
+        "prompt": getattr(usage, "prompt_token_count", None),
+        "completion": getattr(usage, "candidates_token_count", None),
+        "cached": getattr(usage, "cached_content_token_count", None),
+        "total": getattr(usage, "total_token_count", None),
+    }
+    tokens = {kind: count for kind, count in tokens.items() if count}
+    if TELEMETRY_ENABLED:
+        for kind, count in tokens.items():
+            LLM_TOKENS.inc(count, agent=agent, type=kind)
+    return tokens
+
+
+_ROUTE_ID_RE = re.compile(r"/(\d+|[0-9a-f]{8}-[0-9a-f-]{27,})(?=/|$)")
+
+
+def http_route(path: str) -> str:
+    """Low-cardinality route for metrics: "/api/documents/12/" -> "/api/documents/:id/"."""
+    return _ROUTE_ID_RE.sub("/:id", path)
+
+
+def record_http_bytes(route: str, sent: Optional[int], received: Optional[int]) -> None:
+    if not TELEMETRY_ENABLED:
+        return
+    if sent:
+        HTTP_BYTES.inc(sent, route=route, direction="sent")
+    if received:
+        HTTP_BYTES.inc(received, route=route, direction="received")
+
+
+def record_http_pool_wait(seconds: float) -> None:
+    if TELEMETRY_ENABLED:
+        HTTP_POOL_WAIT.observe(seconds)
+
+
+# --- ADK agent instrumentation ---
+
+# Spans abertos entre um callback "before" e o "after" correspondente
+_MAX_OPEN_SPANS = 4096
+_open_spans: "OrderedDict[tuple, Span]" = OrderedDict()
+_open_spans_lock = threading.Lock()
+
+
+def _open(key: tuple, span_: Span) -> None:
+    with _open_spans_lock:
+        _open_spans[key] = span_
+        while len(_open_spans) > _MAX_OPEN_SPANS:
+            # O "after" nunca veio (erro no meio do turno): fecha como abandonado
+            _, stale = _open_spans.popitem(last=False)
+            stale.end(status="abandoned")
+
+
+def _close(key: tuple) -> Optional[Span]:
+    with _open_spans_lock:
+        return _open_spans.pop(key, None)
+
+
+def _peek(key: tuple) -> Optional[Span]:
+    with _open_spans_lock:
+        return _open_spans.get(key)
+
+
+async def _call_original(callback, **kwargs) -> Any:
+    """Calls an ADK callback (or list of callbacks) until one returns a value."""
+    if callback is None:
+        return None
+    for fn in callback if isinstance(callback, list) else [callback]:
+        result = fn(**kwargs)
+        if inspect.isawaitable(result):
+            result = await result
+        if result is not None:
+            return result
+    return None
+
+
+def _mark(fn):
+    fn._telemetry_wrapped = True
+    return fn
+
+
+def _agent_key(callback_context) -> tuple:
+    return ("agent", callback_context.invocation_id, callback_context.agent_name)
+
+
+def _wrap_before_agent(original):
+    async def before_agent_callback(callback_context):
+        key = _agent_key(callback_context)
+        agent_span = start_span(
+            callback_context.agent_name, "agent", invocation_id=callback_context.invocation_id
+        )
+        _open(key, agent_span)
+        _current_span.set(agent_span)
+        try:
+            result = await _call_original(original, callback_context=callback_context)
+        except Exception as e:
+            _close(key)
+            _current_span.set(agent_span.parent)
+            agent_span.end(error=e)
+            raise
+        if result is not None:
+            # O callback pulou o agente (ex.: resultado em cache); o "after" não virá
+            _close(key)
+            _current_span.set(agent_span.parent)
+            agent_span.set_attribute("skipped", True)
+            agent_span.end()
+        return result
+
+    return _mark(before_agent_callback)
+
+
+def _wrap_after_agent(original):
+    async def after_agent_callback(callback_context):
+        try:
+            return await _call_original(original, callback_context=callback_context)
+        finally:
+            agent_span = _close(_agent_key(callback_context))
+            if agent_span is not None:
+                _current_span.set(agent_span.parent)
+                agent_span.end()
+
+    return _mark(after_agent_callback)
+
+
+def _wrap_before_model(original):
+    async def before_model_callback(callback_context, llm_request):
+        key = ("llm",) + _agent_key(callback_context)[1:]
+        llm_span = start_span(
+            callback_context.agent_name,
+            "llm",
+            parent=_peek(_agent_key(callback_context)),
+            model=getattr(llm_request, "model", None),
+        )
+        _open(key, llm_span)
+        result = await _call_original(
+            original, callback_context=callback_context, llm_request=llm_request
+        )
+        if result is not None:
+            _close(key)
+            llm_span.set_attribute("skipped", True)
+            llm_span.end()
+        return result
+
+    return _mark(before_model_callback)
+
+
+def _wrap_after_model(original):
+    async def after_model_callback(callback_context, llm_response):
+        # No modo streaming o "after" é chamado para cada parcial; o span termina no final
+        if not getattr(llm_response, "partial", False):
+            llm_span = _close(("llm",) + _agent_key(callback_context)[1:])
+            usage = getattr(llm_response, "usage_metadata", None)
+            tokens = record_tokens(callback_context.agent_name, usage) if usage else {}
+            if llm_span is not None:
+                for kind, count in tokens.items():
+                    llm_span.set_attribute(f"llm.tokens.{kind}", count)
+                error = getattr(llm_response, "error_code", None)
+                llm_span.end(status="error" if error else None)
+        return await _call_original(
+            original, callback_context=callback_context, llm_response=llm_response
+        )
+
+    return _mark(after_model_callback)
+
+
+def _tool_key(tool_context) -> tuple:
+    return ("tool", tool_context.invocation_id, tool_context.function_call_id)
+
+
+def _wrap_before_tool(original):
+    async def before_tool_callback(tool, args, tool_context):
+        key = _tool_key(tool_context)
+        tool_span = start_span(
+            tool.name,
+            "tool",
+            parent=_peek(("agent", tool_context.invocation_id, tool_context.agent_name)),
+            agent=tool_context.agent_name,
+        )
+        _open(key, tool_span)
+        # Requisições HTTP feitas pela ferramenta ficam aninhadas neste span
+        _current_span.set(tool_span)
+        result = await _call_original(original, tool=tool, args=args, tool_context=tool_context)
+        if result is not None:
+            _close(key)
+            _current_span.set(tool_span.parent)
+            tool_span.set_attribute("skipped", True)
+            tool_span.end()
+        return result
+
+    return _mark(before_tool_callback)
+
+
+def _wrap_after_tool(original):
+    async def after_tool_callback(tool, args, tool_context, tool_response):
+        tool_span = _close(_tool_key(tool_context))
+        if tool_span is not None:
+            _current_span.set(tool_span.parent)
+            status = tool_response.get("status") if isinstance(tool_response, dict) else None
+            tool_span.set_attribute("tool.status", status)
+            tool_span.end(status="error" if status == "error" else None)
+        return await _call_original(
+            original,
+            tool=tool,
+            args=args,
+            tool_context=tool_context,
+            tool_response=tool_response,
+        )
+
+    return _mark(after_tool_callback)
+
+
+_WRAPPERS = {
+    "before_agent_callback": _wrap_before_agent,
+    "after_agent_callback": _wrap_after_agent,
+    "before_model_callback": _wrap_before_model,
+    "after_model_callback": _wrap_after_model,
+    "before_tool_callback": _wrap_before_tool,
+    "after_tool_callback": _wrap_after_tool,
+}
+
+
+def instrument_agent_tree(agent) -> None:
+    """
+    Wraps the ADK callbacks of `agent` and all its sub-agents so that agent
+    runs, model calls and tool calls produce spans. Existing callbacks keep
+    working; calling this twice is harmless.
+    """
+    if not TELEMETRY_ENABLED:
+        return
+    for attribute, wrap in _WRAPPERS.items():
+        if not hasattr(agent, attribute):
+            continue
+        original = getattr(agent, attribute)
+        if getattr(original, "_telemetry_wrapped", False):
+            continue
+        setattr(agent, attribute, wrap(original))
+    for sub_agent in getattr(agent, "sub_agents", None) or []:
+        instrument_agent_tree(sub_agent)
+
+
+# --- Standalone /metrics endpoint ---
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("metrics endpoint: " + format, *args)
+
+
+_metrics_server: Optional[ThreadingHTTPServer] = None
+_metrics_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int = None) -> Optional[int]:
+    """
+    Serves `/metrics` from a daemon thread, for front-ends without their own
+    HTTP server (Streamlit, bulk ingest). Idempotent; returns the bound port,
+    or None if disabled (TELEMETRY_METRICS_PORT=0).
+    """
+    global _metrics_server
+    port = TELEMETRY_METRICS_PORT if port is None else port
+    if not TELEMETRY_ENABLED or not port:
+        return None
+    with _metrics_server_lock:
+        if _metrics_server is None:
+            try:
+                _metrics_server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+            except OSError as e:
+                logger.warning("Could not start metrics endpoint on port %s: %s", port, e)
+                return None
+            threading.Thread(
+                target=_metrics_server.serve_forever, name="metrics-server", daemon=True
+            ).start()
+            logger.info("Prometheus metrics available at http://0.0.0.0:%s/metrics", port)
+    return _metrics_server.server_address[1]
@@ -0,0 +1,34 @@
+"""
+Shared fixtures. The settings are read when `paperless_app.config` is
+imported, so the fake Paperless server is started and the environment is set
+here, before any test module imports the app.
+"""
+import os
+import tempfile
+
+import pytest
+
+from benchmarks.fake_paperless import FakePaperless, FakePaperlessServer
+
+_workdir = tempfile.TemporaryDirectory(prefix="paperless-tests-")
+_server = FakePaperlessServer(FakePaperless(taxonomy_size=20, consume_delay=0.02)).start()
+
+os.environ.update(
+    PAPERLESS_URL=_server.url,
+    PAPERLESS_API_TOKEN="tests",
+    PROJECT_ROOT=_workdir.name,
+    TASK_POLL_MIN_INTERVAL="0.05",
+    TELEMETRY_METRICS_PORT="0",
+)
+os.environ.pop("OTEL_EXPORTER_OTLP_ENDPOINT", None)
+
+
+def pytest_unconfigure(config):
+    _server.stop()
+    _workdir.cleanup()
+
+
+@pytest.fixture
+def fake_paperless():
+    """State of the fake Paperless server shared by the whole test session."""
+    return _server.state
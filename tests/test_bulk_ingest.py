@@ -0,0 +1,32 @@
+import asyncio
+import shutil
+
+import pytest
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.scripted_llm import install_scripted_models
+from paperless_app.agent.definition import build_document_analyzer_agent
+from paperless_app.bulk_ingest import BulkIngestPipeline
+
+
+@pytest.mark.parametrize("write_concurrency", [1, 4])
+def test_same_file_twice_in_one_batch_is_uploaded_once(tmp_path, write_concurrency):
+    # Um documento diferente por caso, para não colidir com o índice de checksums do outro
+    (doc,) = generate_corpus(tmp_path / "corpus", 1, start_index=write_concurrency)
+    paths = [tmp_path / "first.pdf", tmp_path / "second.pdf"]
+    for path in paths:
+        shutil.copyfile(tmp_path / "corpus" / doc.filename, path)
+
+    analyzer = build_document_analyzer_agent()
+    install_scripted_models(analyzer)
+    pipeline = BulkIngestPipeline(
+        llm_concurrency=2,
+        write_concurrency=write_concurrency,
+        wait_for_tasks=False,
+        analyzer_agent=analyzer,
+    )
+    report = asyncio.run(pipeline.run(paths))
+
+    assert report.failed == 0
+    assert sorted(job.status for job in report.jobs) == ["done", "duplicate"]
+    assert report.duplicates == 1
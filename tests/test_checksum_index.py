@@ -0,0 +1,55 @@
+import asyncio
+import hashlib
+
+from paperless_app.agent.tools.checksum_index import ChecksumIndex
+from paperless_app.agent.tools.hashing import file_md5, file_sha256
+
+
+class _Paperless:
+    def __init__(self):
+        self.documents = {}
+        self.lookups = 0
+
+    async def lookup(self, checksum):
+        self.lookups += 1
+        return self.documents.get(checksum)
+
+
+def test_known_documents_are_checked_again_after_the_ttl():
+    paperless = _Paperless()
+    paperless.documents["abc"] = 7
+    index = ChecksumIndex(paperless.lookup, ttl=0, max_entries=10)
+
+    async def scenario():
+        assert (await index.find("ABC"))["document_id"] == 7
+        # Apagado no Paperless: a entrada antiga não pode mais valer
+        del paperless.documents["abc"]
+        assert await index.find("abc") is None
+        assert index.reserve("abc")
+
+    asyncio.run(scenario())
+    assert paperless.lookups == 2
+
+
+def test_index_is_bounded_and_keeps_pending_uploads():
+    paperless = _Paperless()
+    index = ChecksumIndex(paperless.lookup, ttl=300, max_entries=3)
+    assert index.reserve("pending")
+    for i in range(10):
+        index.add(f"doc-{i}", i)
+
+    assert len(index._known) == 3
+    assert not index.reserve("pending")
+    assert asyncio.run(index.find("doc-9"))["document_id"] == 9
+    assert paperless.lookups == 0
+    index.discard("pending")
+    assert index.reserve("pending")
+
+
+def test_file_hashes_match_hashlib(tmp_path):
+    path = tmp_path / "file.bin"
+    data = b"paperless" * 300_000
+    path.write_bytes(data)
+
+    assert file_md5(path) == hashlib.md5(data).hexdigest()
+    assert file_sha256(path) == hashlib.sha256(data).hexdigest()
@@ -0,0 +1,86 @@
+import random
+
+from paperless_app.agent.tools.entity_resolver import EntityResolver, names_are_similar
+
+_WORDS = [
+    "São",
+    "Paulo",
+    "Água",
+    "Energia",
+    "Elétrica",
+    "Serviços",
+    "Médicos",
+    "Banco",
+    "Brasil",
+    "Telecom",
+    "Construção",
+    "Ótica",
+    "Farmácia",
+    "Café",
+    "Amazon",
+    "da",
+    "de",
+    "do",
+    "e",
+    "BB",
+    "XP",
+]
+_SUFFIXES = ["", " Ltda", " Inc", " Corp"]
+
+
+def _linear_scan(entities, name):
+    for entity in entities:
+        if names_are_similar(name, entity["name"]):
+            return entity
+    return None
+
+
+def _taxonomy(rng, size):
+    entities = []
+    for entity_id in range(1, size + 1):
+        words = rng.sample(_WORDS, rng.randint(1, 4))
+        entities.append({"id": entity_id, "name": " ".join(words) + rng.choice(_SUFFIXES)})
+    return entities
+
+
+def _variants(rng, name):
+    words = name.split()
+    reordered = words[:]
+    rng.shuffle(reordered)
+    yield name
+    yield name.upper()
+    yield " ".join(reordered)
+    # Sem acentos e com espaços sobrando
+    yield "  ".join(w.encode("ascii", "ignore").decode() for w in words)
+    yield name + " " + rng.choice(_WORDS)
+    yield " ".join(words[:-1])
+    yield rng.choice(_WORDS)
+
+
+def test_find_similar_matches_a_linear_scan():
+    rng = random.Random(4)
+    entities = _taxonomy(rng, 300)
+    resolver = EntityResolver(entities)
+
+    queries = [v for entity in rng.sample(entities, 80) for v in _variants(rng, entity["name"])]
+    queries += ["", "BB", "XP Inc", "de da do", "Sao Paulo", "Paulo São"]
+    for query in queries:
+        assert resolver.find_similar(query) == _linear_scan(entities, query), query
+
+
+def test_find_similar_follows_updates_and_removals():
+    rng = random.Random(9)
+    entities = _taxonomy(rng, 120)
+    resolver = EntityResolver(entities)
+
+    # Renomeia e remove alguns: o índice tem que continuar igual ao scan
+    for entity in rng.sample(entities, 30):
+        entity["name"] = " ".join(rng.sample(_WORDS, rng.randint(1, 3)))
+        resolver.add(entity)
+    for entity in rng.sample(entities, 30):
+        entities.remove(entity)
+        resolver.remove(entity["id"])
+
+    for entity in rng.sample(entities, 40):
+        for query in _variants(rng, entity["name"]):
+            assert resolver.find_similar(query) == _linear_scan(entities, query), query
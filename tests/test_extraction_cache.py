@@ -0,0 +1,143 @@
+import asyncio
+import shutil
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.scripted_llm import ScriptedLlm, install_scripted_models
+from paperless_app.agent import definition
+from paperless_app.agent.tools.extraction_cache import ExtractionCache
+from paperless_app.agent.tools.hashing import file_sha256
+from paperless_app.config import TEMP_DATA_DIR
+
+INFO = {"status": "success", "correspondent_name": "ACME", "title": "Invoice"}
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = ExtractionCache(tmp_path / "cache.sqlite3", max_bytes=1024 * 1024)
+    monkeypatch.setattr(definition, "get_extraction_cache", lambda: cache)
+    return cache
+
+
+@pytest.fixture
+def document(tmp_path):
+    (doc,) = generate_corpus(tmp_path / "corpus", 1, start_index=900)
+    TEMP_DATA_DIR.mkdir(parents=True, exist_ok=True)
+    names = []
+
+    def copy():
+        # Nome novo a cada cópia, com o mesmo conteúdo (mesmo SHA-256)
+        name = f"{uuid.uuid4()}.pdf"
+        shutil.copyfile(tmp_path / "corpus" / doc.filename, TEMP_DATA_DIR / name)
+        names.append(name)
+        return name
+
+    yield copy
+    for name in names:
+        (TEMP_DATA_DIR / name).unlink(missing_ok=True)
+
+
+def test_entries_are_keyed_by_kind_version_and_digest(tmp_path):
+    cache = ExtractionCache(tmp_path / "cache.sqlite3", max_bytes=1024 * 1024)
+    cache.put("document_info", "v1", "abc", INFO)
+
+    assert cache.get("document_info", "v1", "abc") == INFO
+    assert cache.get("document_info", "v2", "abc") is None
+    assert cache.get("document_info", "v1", "def") is None
+    assert cache.get("text", "v1", "abc") is None
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 3
+
+    # Persistido em disco: outra instância no mesmo arquivo enxerga a entrada
+    assert ExtractionCache(cache.path, cache.max_bytes).get("document_info", "v1", "abc") == INFO
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ExtractionCache(tmp_path / "cache.sqlite3", max_bytes=250)
+    for digest in ("a", "b"):
+        cache.put("text", "v1", digest, "x" * 100)
+    assert cache.get("text", "v1", "a") is not None
+    cache.put("text", "v1", "c", "x" * 100)
+
+    assert cache.get("text", "v1", "b") is None
+    assert cache.get("text", "v1", "a") is not None
+    assert cache.get("text", "v1", "c") is not None
+
+    cache.put("text", "v1", "huge", "x" * 1000)
+    assert cache.get("text", "v1", "huge") is None
+
+
+def test_analysis_is_reused_by_checksum_until_the_version_changes(cache, document, monkeypatch):
+    first, second = document(), document()
+
+    async def scenario():
+        context = SimpleNamespace(state={"filename": first})
+        assert await definition.use_cached_analysis(context) is None
+        assert context.state["file_sha256"] == file_sha256(TEMP_DATA_DIR / first)
+        context.state["document_info"] = INFO
+        await definition.store_analysis(context)
+
+        # Outro nome, mesmo conteúdo: acerto no cache
+        context = SimpleNamespace(state={"filename": second, "document_info": {"old": True}})
+        assert await definition.use_cached_analysis(context) is not None
+        assert context.state["document_info"] == INFO
+
+        # Prompt ou modelo novo: a análise antiga não vale mais
+        monkeypatch.setattr(definition, "ANALYSIS_CACHE_VERSION", "bumped")
+        context = SimpleNamespace(state={"filename": second, "document_info": {"old": True}})
+        assert await definition.use_cached_analysis(context) is None
+        assert context.state["document_info"] is None
+
+    asyncio.run(scenario())
+
+
+def test_failed_analysis_is_not_cached(cache, document):
+    filename = document()
+
+    async def scenario():
+        context = SimpleNamespace(state={"filename": filename})
+        await definition.use_cached_analysis(context)
+        context.state["document_info"] = {"status": "error"}
+        await definition.store_analysis(context)
+        return await definition.use_cached_analysis(SimpleNamespace(state={"filename": filename}))
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_cache_hit_skips_the_analyzer_model(cache, document, monkeypatch):
+    model_calls = []
+    generate = ScriptedLlm.generate_content_async
+
+    def counting_generate(self, llm_request, stream=False):
+        model_calls.append(llm_request)
+        return generate(self, llm_request, stream)
+
+    monkeypatch.setattr(ScriptedLlm, "generate_content_async", counting_generate)
+    analyzer = definition.build_document_analyzer_agent()
+    install_scripted_models(analyzer)
+    runner = Runner(agent=analyzer, app_name="tests", session_service=InMemorySessionService())
+
+    async def analyze(filename):
+        session = await runner.session_service.create_session(
+            app_name="tests", user_id="u", state={"filename": filename}
+        )
+        message = types.Content(role="user", parts=[types.Part(text=f"Processar: {filename}")])
+        async for _ in runner.run_async(user_id="u", session_id=session.id, new_message=message):
+            pass
+        session = await runner.session_service.get_session(
+            app_name="tests", user_id="u", session_id=session.id
+        )
+        return session.state.get("document_info")
+
+    first = asyncio.run(analyze(document()))
+    assert first["status"] == "success"
+    calls_for_first = len(model_calls)
+    assert calls_for_first > 0
+
+    assert asyncio.run(analyze(document())) == first
+    assert len(model_calls) == calls_for_first
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from benchmarks.corpus import render_pdf
+from paperless_app.agent.tools import file_manager
+
+PAGES = [[f"Page {n} line {i}" for i in range(3)] for n in range(1, 7)]
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(render_pdf(PAGES))
+    return path
+
+
+@pytest.fixture
+def process_pool(monkeypatch):
+    # Documentos pequenos já vão para o pool nos testes
+    monkeypatch.setattr(file_manager, "PDF_PARALLEL_MIN_PAGES", 2)
+    yield
+    if file_manager._process_pool is not None:
+        file_manager._process_pool.shutdown()
+        file_manager._process_pool = None
+
+
+def _expected(pages):
+    return "\n".join("\n".join(lines) for lines in pages)
+
+
+def test_page_and_char_budget(pdf_path):
+    assert file_manager.extract_pdf_text(pdf_path) == _expected(PAGES)
+    assert file_manager.extract_pdf_text(pdf_path, max_pages=2) == _expected(PAGES[:2])
+
+    text = file_manager.extract_pdf_text(pdf_path, max_chars=30)
+    assert text == _expected(PAGES)[:30]
+
+
+def test_char_budget_stops_reading_pages(pdf_path, monkeypatch):
+    read = []
+    page_text = file_manager._page_text
+
+    def counting_page_text(page):
+        read.append(page.page_number)
+        return page_text(page)
+
+    monkeypatch.setattr(file_manager, "_page_text", counting_page_text)
+    file_manager.extract_pdf_text(pdf_path, max_chars=len(_expected(PAGES[:1])) + 5)
+    assert read == [1, 2]
+
+
+def test_pages_without_text_are_empty(tmp_path):
+    class _Page:
+        closed = False
+
+        def extract_text(self):
+            return None
+
+        def close(self):
+            self.closed = True
+
+    page = _Page()
+    assert file_manager._page_text(page) == ""
+    assert page.closed
+
+    # Página em branco no meio do documento
+    path = tmp_path / "blank.pdf"
+    path.write_bytes(render_pdf([["first"], [], ["third"]]))
+    assert file_manager.extract_pdf_text(path).split("\n") == ["first", "", "third"]
+
+
+@pytest.mark.usefixtures("process_pool")
+@pytest.mark.parametrize("max_pages", [None, 5])
+def test_process_pool_matches_sequential_extraction(pdf_path, max_pages):
+    parallel = file_manager.extract_pdf_text(pdf_path, max_pages=max_pages, workers=4)
+    assert file_manager._process_pool is not None
+    assert parallel == file_manager.extract_pdf_text(pdf_path, max_pages=max_pages)
+
+
+@pytest.mark.usefixtures("process_pool")
+def test_async_extraction_from_file_and_bytes(pdf_path, monkeypatch):
+    monkeypatch.setattr(file_manager, "TEMP_DATA_DIR", pdf_path.parent)
+    monkeypatch.setattr(file_manager, "PDF_EXTRACT_WORKERS", 2)
+    monkeypatch.setattr(file_manager, "get_extraction_cache", lambda: None)
+
+    async def scenario():
+        return await asyncio.gather(
+            file_manager.extract_text_from_pdf(filename=pdf_path.name, max_pages=3),
+            file_manager.extract_text_from_pdf(file_content=pdf_path.read_bytes(), max_pages=3),
+            file_manager.extract_text_from_pdf(filename="missing.pdf"),
+        )
+
+    from_file, from_bytes, missing = asyncio.run(scenario())
+    assert from_file == from_bytes == _expected(PAGES[:3])
+    assert missing == ""
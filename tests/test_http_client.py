@@ -0,0 +1,31 @@
+import asyncio
+
+import httpx
+
+from benchmarks.fake_paperless import FakePaperless, FakePaperlessServer
+from paperless_app.agent.tools import http_client
+
+
+def test_pool_wait_is_measured_when_connections_run_out():
+    server = FakePaperlessServer(FakePaperless(latency=0.05, taxonomy_size=1)).start()
+    before = http_client.get_pool_metrics()
+
+    async def scenario():
+        transport = http_client._instrumented_transport_class()(
+            limits=httpx.Limits(max_connections=1), http2=False
+        )
+        async with httpx.AsyncClient(transport=transport) as client:
+            responses = await asyncio.gather(
+                *(client.get(f"{server.url}/api/tags/") for _ in range(3))
+            )
+        assert all(response.status_code == 200 for response in responses)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        server.stop()
+    after = http_client.get_pool_metrics()
+    # Com uma só conexão, a segunda e a terceira requisição esperam ~50 ms e ~100 ms
+    # (a primeira também pode esperar um pouco enquanto a conexão é aberta)
+    assert after["pool_waits"] - before["pool_waits"] >= 2
+    assert after["pool_wait_seconds_total"] - before["pool_wait_seconds_total"] > 0.1
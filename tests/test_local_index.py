@@ -0,0 +1,26 @@
+from paperless_app.agent.tools.local_index import LocalSearchIndex, fts_query
+
+
+def _doc(doc_id: int, title: str, content: str = "") -> dict:
+    return {"id": doc_id, "title": title, "modified": "2024-01-01T00:00:00Z", "content": content}
+
+
+def test_short_words_are_exact_terms():
+    assert fts_query("NF Notas") == '"nf" AND "nota"*'
+
+
+def test_search_keeps_short_words(tmp_path):
+    index = LocalSearchIndex(tmp_path / "index.sqlite3")
+    index.upsert([_doc(1, "NF 2024 Amazon"), _doc(2, "RG 2024"), _doc(3, "Nfe 2024 Amazon")])
+
+    assert [r["id"] for r in index.search("NF 2024")["results"]] == [1]
+    assert [r["id"] for r in index.search("rg")["results"]] == [2]
+    assert {r["id"] for r in index.search("amazon")["results"]} == {1, 3}
+
+
+def test_delete_missing_removes_documents_gone_from_paperless(tmp_path):
+    index = LocalSearchIndex(tmp_path / "index.sqlite3")
+    index.upsert([_doc(1, "a"), _doc(2, "b")])
+
+    assert index.delete_missing({2, 3}) == 1
+    assert index.count() == 1
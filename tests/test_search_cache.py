@@ -0,0 +1,17 @@
+from paperless_app.agent.tools.search_cache import normalize_query, search_cache_key
+
+
+def test_short_words_are_part_of_the_key():
+    assert search_cache_key("NF 2024") != search_cache_key("RG 2024")
+    assert search_cache_key("IR 2023") != search_cache_key("2023")
+
+
+def test_case_accents_and_plurals_share_a_key():
+    assert normalize_query("Notas Fiscais Amazon") == normalize_query("nota fiscal amazon")
+    assert search_cache_key("Apólices", tag_ids=[2, 1]) == search_cache_key(
+        "apolice", tag_ids=[1, 2]
+    )
+
+
+def test_structured_queries_are_only_whitespace_normalized():
+    assert normalize_query('title:"Nota  Fiscal"') == 'title:"Nota Fiscal"'
@@ -0,0 +1,130 @@
+import asyncio
+
+from google.adk.events import Event, EventActions
+
+from paperless_app.session_store import BoundedSessionService
+
+APP, USER = "paperless", "ana"
+
+
+def _event(state_delta: dict) -> Event:
+    return Event(
+        invocation_id="inv",
+        author="user",
+        actions=EventActions(state_delta=state_delta),
+    )
+
+
+def _service(path=None, **kwargs) -> BoundedSessionService:
+    return BoundedSessionService(db_path=path, flush_interval=0, **kwargs)
+
+
+def test_state_survives_a_reload_and_temp_keys_are_not_persisted(tmp_path):
+    db = tmp_path / "sessions.sqlite3"
+
+    async def write():
+        service = _service(db)
+        session = await service.create_session(app_name=APP, user_id=USER, session_id="s1")
+        await service.append_event(session, _event({"filename": "a.pdf", "temp:scratch": 1}))
+        await service.close()
+
+    async def read():
+        service = _service(db)
+        session = await service.get_session(app_name=APP, user_id=USER, session_id="s1")
+        await service.close()
+        return session
+
+    asyncio.run(write())
+    session = asyncio.run(read())
+    assert session.state["filename"] == "a.pdf"
+    assert "temp:scratch" not in session.state
+    assert len(session.events) == 1
+
+
+def test_app_and_user_state_is_shared_across_sessions(tmp_path):
+    async def scenario():
+        service = _service(tmp_path / "sessions.sqlite3")
+        first = await service.create_session(app_name=APP, user_id=USER, session_id="s1")
+        await service.append_event(first, _event({"app:theme": "dark", "user:lang": "pt"}))
+        same_user = await service.create_session(app_name=APP, user_id=USER, session_id="s2")
+        other_user = await service.create_session(app_name=APP, user_id="bia", session_id="s3")
+        await service.close()
+        return same_user, other_user
+
+    same_user, other_user = asyncio.run(scenario())
+    assert same_user.state["app:theme"] == "dark"
+    assert same_user.state["user:lang"] == "pt"
+    assert other_user.state["app:theme"] == "dark"
+    assert "user:lang" not in other_user.state
+
+
+def test_delete_session(tmp_path):
+    async def scenario():
+        service = _service(tmp_path / "sessions.sqlite3")
+        await service.create_session(app_name=APP, user_id=USER, session_id="s1")
+        await service.flush()
+        await service.delete_session(app_name=APP, user_id=USER, session_id="s1")
+        session = await service.get_session(app_name=APP, user_id=USER, session_id="s1")
+        listed = await service.list_sessions(app_name=APP, user_id=USER)
+        await service.close()
+        return session, listed
+
+    session, listed = asyncio.run(scenario())
+    assert session is None
+    assert listed.sessions == []
+
+
+def test_lru_eviction_in_memory():
+    async def scenario():
+        service = _service(max_cached=2)
+        for session_id in ("s1", "s2", "s3"):
+            await service.create_session(app_name=APP, user_id=USER, session_id=session_id)
+        found = [
+            await service.get_session(app_name=APP, user_id=USER, session_id=session_id)
+            for session_id in ("s1", "s2", "s3")
+        ]
+        return service, found
+
+    service, found = asyncio.run(scenario())
+    assert found[0] is None
+    assert found[1] is not None and found[2] is not None
+    assert service.get_stats()["evicted"] == 1
+
+
+def test_evicted_sessions_are_reloaded_from_the_database(tmp_path):
+    async def scenario():
+        service = _service(tmp_path / "sessions.sqlite3", max_cached=1)
+        session = await service.create_session(app_name=APP, user_id=USER, session_id="s1")
+        await service.append_event(session, _event({"step": 1}))
+        await service.create_session(app_name=APP, user_id=USER, session_id="s2")
+        await service.flush()
+        reloaded = await service.get_session(app_name=APP, user_id=USER, session_id="s1")
+        await service.close()
+        return service, reloaded
+
+    service, reloaded = asyncio.run(scenario())
+    assert reloaded.state["step"] == 1
+    assert service.get_stats()["loaded"] == 1
+
+
+def test_second_worker_sees_appended_events(tmp_path):
+    db = tmp_path / "sessions.sqlite3"
+
+    async def scenario():
+        worker_a, worker_b = _service(db), _service(db)
+        session = await worker_a.create_session(app_name=APP, user_id=USER, session_id="s1")
+        await worker_a.flush()
+        # O worker B carrega a sessão antes de o A continuar a conversa
+        seen_by_b = await worker_b.get_session(app_name=APP, user_id=USER, session_id="s1")
+        assert seen_by_b.events == []
+
+        await worker_a.append_event(session, _event({"step": 2}))
+        await worker_a.flush()
+        seen_by_b = await worker_b.get_session(app_name=APP, user_id=USER, session_id="s1")
+        await worker_a.close()
+        await worker_b.close()
+        return seen_by_b
+
+    seen_by_b = asyncio.run(scenario())
+    assert len(seen_by_b.events) == 1
+    assert seen_by_b.state["step"] == 2
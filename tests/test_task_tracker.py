@@ -0,0 +1,76 @@
+import asyncio
+import uuid
+
+import pytest
+
+from paperless_app.agent.tools import paperless_api
+from paperless_app.agent.tools.task_tracker import TaskTracker
+
+
+def test_results_are_bounded_and_async_callbacks_run():
+    done = []
+
+    async def fetch_tasks(task_ids):
+        return [{"task_id": t, "status": "SUCCESS", "related_document": "1"} for t in task_ids]
+
+    async def on_done(result):
+        await asyncio.sleep(0)
+        done.append(result["task_id"])
+
+    tracker = TaskTracker(fetch_tasks, max_results=2)
+
+    async def scenario():
+        for task_id in ("a", "b", "c"):
+            tracker.track(task_id, on_done=on_done)
+        results = await asyncio.gather(*(tracker.wait(t, timeout=5) for t in ("a", "b", "c")))
+        assert [r["status"] for r in results] == ["success"] * 3
+        while tracker._callback_tasks:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert sorted(done) == ["a", "b", "c"]
+    assert tracker.get("a")["status"] == "unknown"
+    assert tracker.get("c")["document_id"] == 1
+
+
+def test_untracked_and_evicted_tasks_are_not_polled_again():
+    polled = []
+
+    async def fetch_tasks(task_ids):
+        polled.extend(task_ids)
+        return [{"task_id": t, "status": "SUCCESS"} for t in task_ids]
+
+    tracker = TaskTracker(fetch_tasks, max_results=1)
+
+    async def scenario():
+        assert (await tracker.wait("never-tracked"))["status"] == "unknown"
+        for task_id in ("a", "b"):
+            tracker.track(task_id)
+            await tracker.wait(task_id, timeout=5)
+        # "a" saiu do LRU: fica com estado final "unknown" em vez de voltar à fila
+        tracker.track("a")
+        assert (await tracker.wait("a"))["status"] == "unknown"
+        assert tracker.pending_count == 0
+
+    asyncio.run(scenario())
+    assert polled == ["a", "b"]
+
+
+def _add_task(fake_paperless, status: str = "SUCCESS") -> str:
+    task_id = str(uuid.uuid4())
+    fake_paperless.tasks[task_id] = {"task_id": task_id, "status": status, "result": None}
+    return task_id
+
+
+@pytest.mark.parametrize("task_id_in_filter", [True, False])
+def test_fetch_tasks_returns_only_the_requested_tasks(fake_paperless, task_id_in_filter):
+    wanted = [_add_task(fake_paperless) for _ in range(2)]
+    _add_task(fake_paperless, "PENDING")
+    fake_paperless.task_id_in_filter = task_id_in_filter
+    paperless_api._task_id_in_supported = None
+    try:
+        tasks = asyncio.run(paperless_api._fetch_tasks(wanted))
+    finally:
+        fake_paperless.task_id_in_filter = True
+    assert sorted(task["task_id"] for task in tasks) == sorted(wanted)
+    assert paperless_api._task_id_in_supported is task_id_in_filter
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from paperless_app.agent.tools import paperless_api
+from paperless_app.agent.tools.taxonomy_cache import TaxonomyCache
+
+
+class _Endpoint:
+    def __init__(self):
+        self.items = [{"id": 1, "name": "Banco Azul"}]
+        self.etag = '"v1"'
+
+    async def fetch_all(self):
+        return list(self.items)
+
+    async def probe(self):
+        return len(self.items), self.etag
+
+
+def test_revalidation_reuses_the_etag_captured_on_load():
+    endpoint = _Endpoint()
+    cache = TaxonomyCache("correspondents", endpoint.fetch_all, endpoint.probe, ttl=0)
+
+    async def scenario():
+        await cache.get_all()
+        await cache.get_all()
+        assert cache.stats["loads"] == 1
+        # Renomear não muda a contagem, só o ETag
+        endpoint.items = [{"id": 1, "name": "Banco Verde"}]
+        endpoint.etag = '"v2"'
+        assert await cache.get_by_name("Banco Verde") is not None
+        assert cache.stats["loads"] == 2
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize(
+    "create",
+    [
+        paperless_api.create_correspondent,
+        paperless_api.create_document_type,
+        paperless_api.create_tag,
+    ],
+)
+def test_create_returns_the_existing_entity_when_the_name_is_taken(create):
+    name = f"Criado em outro lugar {create.__name__}"
+
+    async def scenario():
+        first = await create(name)
+        again = await create(name.upper())
+        return first, again
+
+    first, again = asyncio.run(scenario())
+    assert again["id"] == first["id"]
+
+
+def test_name_locks_are_released_after_use():
+    async def scenario():
+        async with paperless_api._name_lock("tags", "Temporária"):
+            assert len(paperless_api._create_locks) == 1
+        return len(paperless_api._create_locks)
+
+    assert asyncio.run(scenario()) == 0
+
+
+class _ToolContext:
+    def __init__(self):
+        self.state = {}
+
+
+async def _not_found(items, predicate):
+    return None
+
+
+@pytest.mark.parametrize(
+    "kind, tool, state_key",
+    [
+        ("correspondents", paperless_api.get_or_create_correspondent, "correspondent_id"),
+        ("document_types", paperless_api.get_or_create_document_type, "document_type_id"),
+    ],
+)
+def test_name_created_concurrently_is_resolved_by_name(
+    fake_paperless, monkeypatch, kind, tool, state_key
+):
+    name = f"Concorrente {kind}"
+    cache = {
+        "correspondents": paperless_api._correspondent_cache,
+        "document_types": paperless_api._document_type_cache,
+    }[kind]
+    context = _ToolContext()
+
+    async def scenario():
+        await cache.get_all()
+        # Outro processo cria o nome depois que o cache foi carregado
+        created = fake_paperless.create(kind, name)
+        # e a busca por name__iexact ainda não o enxerga: o POST dá 400 -> already_exists
+        monkeypatch.setattr(paperless_api, "_find_first", _not_found)
+        assert (await cache.get_by_name(name)) is None
+        result = await tool(context, name)
+        return created, result
+
+    created, result = asyncio.run(scenario())
+    assert result["id"] == created["id"]
+    assert context.state[state_key] == created["id"]
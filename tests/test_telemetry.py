@@ -0,0 +1,138 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from google.adk.agents import LlmAgent
+from google.genai import types
+
+from paperless_app import telemetry
+
+
+@pytest.fixture
+def finished_spans():
+    spans = []
+
+    def listener(span, status):
+        spans.append((span.kind, span.name, status, dict(span.attributes)))
+
+    telemetry.add_span_listener(listener)
+    yield spans
+    telemetry.remove_span_listener(listener)
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = telemetry.Histogram("test_seconds", "Test.", ("route",), buckets=(5, 1, 2))
+    for value in (0.5, 1, 3, 10):
+        histogram.observe(value, route="/a")
+    histogram.observe(1.5, route="/b")
+
+    lines = histogram.render()
+    assert lines[:2] == ["# HELP test_seconds Test.", "# TYPE test_seconds histogram"]
+    assert lines[2:8] == [
+        'test_seconds_bucket{route="/a",le="1"} 2',
+        'test_seconds_bucket{route="/a",le="2"} 2',
+        'test_seconds_bucket{route="/a",le="5"} 3',
+        'test_seconds_bucket{route="/a",le="+Inf"} 4',
+        'test_seconds_sum{route="/a"} 14.5',
+        'test_seconds_count{route="/a"} 4',
+    ]
+    assert 'test_seconds_bucket{route="/b",le="1"} 0' in lines
+    assert 'test_seconds_bucket{route="/b",le="2"} 1' in lines
+
+
+@pytest.mark.parametrize(
+    "path, route",
+    [
+        ("/api/documents/12/", "/api/documents/:id/"),
+        ("/api/documents/12/download/", "/api/documents/:id/download/"),
+        ("/api/tasks/0f8fad5b-d9cb-469f-a165-70867728950e", "/api/tasks/:id"),
+        ("/api/documents/", "/api/documents/"),
+        ("/api/documents/12abc/", "/api/documents/12abc/"),
+        ("/api/v2/tags/", "/api/v2/tags/"),
+    ],
+)
+def test_http_route_collapses_ids(path, route):
+    assert telemetry.http_route(path) == route
+
+
+def test_spans_nest_and_restore_the_current_span(finished_spans):
+    assert telemetry.current_span() is None
+    with telemetry.span("outer") as outer:
+        with telemetry.span("inner", kind="tool") as inner:
+            assert inner.parent is outer
+            assert telemetry.current_span() is inner
+        assert telemetry.current_span() is outer
+
+        with pytest.raises(ValueError):
+            with telemetry.span("failing"):
+                raise ValueError("boom")
+        assert telemetry.current_span() is outer
+    assert telemetry.current_span() is None
+
+    statuses = [(kind, name, status) for kind, name, status, _ in finished_spans]
+    assert statuses == [
+        ("tool", "inner", "ok"),
+        ("stage", "failing", "error"),
+        ("stage", "outer", "ok"),
+    ]
+
+
+def _callback_context(agent_name):
+    return SimpleNamespace(invocation_id="inv-1", agent_name=agent_name)
+
+
+def test_instrument_agent_tree_is_idempotent_and_keeps_callbacks(finished_spans):
+    calls = []
+    child = LlmAgent(
+        name="child", before_agent_callback=lambda callback_context: calls.append("child")
+    )
+
+    async def after_root(callback_context):
+        calls.append("after_root")
+
+    root = LlmAgent(name="root", after_agent_callback=after_root, sub_agents=[child])
+
+    telemetry.instrument_agent_tree(root)
+    wrapped = (root.before_agent_callback, root.after_agent_callback, child.before_agent_callback)
+    telemetry.instrument_agent_tree(root)
+    assert (
+        root.before_agent_callback,
+        root.after_agent_callback,
+        child.before_agent_callback,
+    ) == wrapped
+
+    async def turn():
+        await root.before_agent_callback(callback_context=_callback_context("root"))
+        root_span = telemetry.current_span()
+        await child.before_agent_callback(callback_context=_callback_context("child"))
+        assert telemetry.current_span().parent is root_span
+        await child.after_agent_callback(callback_context=_callback_context("child"))
+        assert telemetry.current_span() is root_span
+        await root.after_agent_callback(callback_context=_callback_context("root"))
+        assert telemetry.current_span() is None
+
+    asyncio.run(turn())
+    assert calls == ["child", "after_root"]
+    assert [(kind, name, status) for kind, name, status, _ in finished_spans] == [
+        ("agent", "child", "ok"),
+        ("agent", "root", "ok"),
+    ]
+
+
+def test_skipping_before_agent_callback_ends_the_span(finished_spans):
+    cached = types.Content(role="model", parts=[types.Part(text="cached")])
+    agent = LlmAgent(name="cached", before_agent_callback=lambda callback_context: cached)
+    telemetry.instrument_agent_tree(agent)
+
+    async def turn():
+        context = _callback_context("cached")
+        result = await agent.before_agent_callback(callback_context=context)
+        # O "after" não vem quando o agente é pulado: o span não pode ficar aberto
+        assert telemetry.current_span() is None
+        assert telemetry._peek(telemetry._agent_key(context)) is None
+        return result
+
+    assert asyncio.run(turn()) is cached
+    assert finished_spans == [
+        ("agent", "cached", "ok", {"invocation_id": "inv-1", "skipped": True})
+    ]
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from paperless_app.agent.tools import vector_index
+from paperless_app.agent.tools.vector_index import HashingEmbedder, VectorIndex
+
+DIM = 64
+
+
+def _vectors(n: int, seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).normal(size=(n, DIM)).astype(np.float32)
+
+
+def _open(path, **kwargs) -> VectorIndex:
+    return VectorIndex(path, DIM, "float16", "test", **kwargs)
+
+
+def test_batch_add_replaces_documents_and_keeps_vectors(tmp_path):
+    index = _open(tmp_path)
+    first = _vectors(3, 1)
+    index.add_documents(
+        [(1, ["a", "b", "c"], first, "h1", None), (2, ["d"], _vectors(1, 2), "h2", None)]
+    )
+    index.add_documents([(2, ["e", "f"], _vectors(2, 3), "h3", None)])
+
+    assert index.stats()["chunks"] == 5
+    assert index.content_hashes() == {1: "h1", 2: "h3"}
+    assert index.search(first[1], top_k=1)[0] == {"document_id": 1, "score": 1.0, "chunk": "b"}
+
+
+def test_compaction_drops_dead_rows_and_survives_reopen(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_index, "_COMPACT_MIN_DEAD_ROWS", 4)
+    index = _open(tmp_path)
+    kept = _vectors(4, 1)
+    index.add_documents([(doc, ["x", "y"], _vectors(2, doc), None, None) for doc in range(1, 6)])
+    index.add_document(9, ["k1", "k2", "k3", "k4"], kept)
+    assert index.delete_missing({5, 9}) == 4
+
+    assert index.stats()["rows"] == 6
+    index.close()
+    index = _open(tmp_path)
+    assert index.stats()["rows"] == 6
+    assert index.search(kept[2], top_k=1)[0]["chunk"] == "k3"
+    assert {hit["document_id"] for hit in index.search(kept[0], top_k=5)} == {5, 9}
+
+
+@pytest.mark.parametrize("rows", [1, 5])
+def test_ivf_training_with_fewer_rows_than_lists(tmp_path, rows):
+    index = _open(tmp_path, ann_min_rows=1, nprobe=2)
+    vectors = HashingEmbedder(DIM).embed([f"documento numero {i}" for i in range(rows)])
+    index.add_document(1, [str(i) for i in range(rows)], vectors)
+
+    assert 1 <= index.stats()["ivf_lists"] <= rows
+    assert index.search(vectors[0], top_k=1)[0]["document_id"] == 1
+
+
+def test_embedders_must_implement_embed():
+    class Incomplete(vector_index.Embedder):
+        name, dim = "incomplete", DIM
+
+    with pytest.raises(TypeError):
+        Incomplete()
+    assert HashingEmbedder(DIM).embed_query("nota fiscal").shape == (DIM,)